@@ -0,0 +1,119 @@
+#  <analytics.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Vectorized performance statistics over per-trade PnL (price units, as
+# logPnL) and, when available, a ledger.TradeLedger. Everything is plain
+# array arithmetic, cheap enough to run for every configuration of a sweep.
+# Money figures are scaled by lotUnits like summarizeTrades' netPnL.
+import numpy as np
+import backtest as bt
+import ledger as tradeledger
+
+STAT_COLUMNS = ("netPnL", "maxDrawdown", "maxDrawdownTrades", "maxDrawdownBars", "sharpe", "sortino",
+                "profitFactor", "expectancy")
+
+
+def equityCurve(pnl, lotUnits=bt.DEFAULT_LOT_UNITS):
+    return np.cumsum(np.asarray(pnl, dtype=np.float64)) * lotUnits
+
+
+def drawdowns(equity):
+    # (drawdown per trade, index of the running peak), the peak starting at 0 before the first trade
+    equity = np.concatenate(([0.0], equity))
+    peak = np.maximum.accumulate(equity)
+    peakAt = np.maximum.accumulate(np.where(equity == peak, np.arange(len(equity)), 0))
+    return (peak - equity)[1:], peakAt[1:] - 1
+
+
+def analyze(pnl, exitIndex=None, lotUnits=bt.DEFAULT_LOT_UNITS, periodsPerYear=None):
+    # Summary statistics of a trade sequence. Drawdown duration is counted in
+    # trades, and in bars when the exit bar of every trade is given (a
+    # drawdown from the start counts from the first exit).
+    # Sharpe/Sortino are per trade, scaled by sqrt(periodsPerYear) if given.
+    pnl = np.asarray(pnl, dtype=np.float64)
+    stats = dict.fromkeys(STAT_COLUMNS, 0.0)
+    stats["trades"] = len(pnl)
+    if not len(pnl):
+        return stats
+    equity = equityCurve(pnl, lotUnits)
+    depth, peakAt = drawdowns(equity)
+    worst = int(np.argmax(depth))
+    stats["netPnL"] = float(equity[-1])
+    stats["maxDrawdown"] = float(depth[worst])
+    # Longest stretch below a previous peak, in trades (and bars)
+    underwater = depth > 0
+    if underwater.any():
+        length = np.arange(len(pnl)) - peakAt
+        stats["maxDrawdownTrades"] = int(length[underwater].max())
+        if exitIndex is not None:
+            exitIndex = np.asarray(exitIndex, dtype=np.int64)
+            peakBar = np.where(peakAt >= 0, exitIndex[np.maximum(peakAt, 0)], exitIndex[0])
+            stats["maxDrawdownBars"] = int((exitIndex - peakBar)[underwater].max())
+
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl <= 0]
+    grossLoss = -losses.sum()
+    stats["profitFactor"] = float(wins.sum() / grossLoss) if grossLoss > 0 else float("inf") if len(wins) else 0.0
+    stats["expectancy"] = float(pnl.mean() * lotUnits)
+    scale = np.sqrt(periodsPerYear) if periodsPerYear else 1.0
+    std = pnl.std(ddof=1) if len(pnl) > 1 else 0.0
+    stats["sharpe"] = float(pnl.mean() / std * scale) if std > 0 else 0.0
+    downside = np.sqrt(np.mean(np.minimum(pnl, 0) ** 2))
+    stats["sortino"] = float(pnl.mean() / downside * scale) if downside > 0 else 0.0
+    return stats
+
+
+def excursions(trades, high, low):
+    # (MAE, MFE) per trade in price units: the worst and best price reached
+    # between entry and exit bar (inclusive), relative to the entry price
+    if not len(trades):
+        return np.zeros(0), np.zeros(0)
+    entry = trades.entryIndex
+    bounds = np.column_stack((entry, trades.exitIndex + 1)).ravel()
+    if bounds[-1] >= len(high):
+        bounds = bounds[:-1]  # reduceat runs the last slice to the end anyway
+    highest = np.maximum.reduceat(np.asarray(high), bounds)[::2]
+    lowest = np.minimum.reduceat(np.asarray(low), bounds)[::2]
+    price = trades.entryPrice
+    isBuy = trades.side == tradeledger.BUY
+    mfe = np.where(isBuy, highest - price, price - lowest)
+    mae = np.where(isBuy, price - lowest, highest - price)
+    return mae, mfe
+
+
+def analyzeLedger(trades, high=None, low=None, lotUnits=bt.DEFAULT_LOT_UNITS, periodsPerYear=None):
+    stats = analyze(trades.pnl, trades.exitIndex, lotUnits, periodsPerYear)
+    held = trades.barsHeld
+    stats["avgBarsHeld"] = float(held.mean()) if len(held) else 0.0
+    stats["exitReasons"] = {reason: int(count) for reason, count in
+                            zip(tradeledger.EXIT_REASONS, np.bincount(trades.reason, minlength=len(tradeledger.EXIT_REASONS)))}
+    if high is not None and low is not None and len(trades):
+        mae, mfe = excursions(trades, high, low)
+        stats["avgMAE"] = float(mae.mean())
+        stats["avgMFE"] = float(mfe.mean())
+        stats["maxMAE"] = float(mae.max())
+        stats["maxMFE"] = float(mfe.max())
+    return stats
+
+
+def printStats(stats):
+    print("\n=== TRADE STATISTICS ===")
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{key} {count}" for key, count in value.items())
+        elif isinstance(value, float):
+            value = f"{value:.5f}" if abs(value) < 1 else f"{value:.2f}"
+        print(f"{name}: {value}")
@@ -15,10 +15,19 @@
 #  along with this program.  If not, see <https:www.gnu.org/licenses/>.
 
 # CSV SCHEMA = Date Time, Open, High, Low, Close, Volume
+import argparse
+import cProfile
+import json
+import time
+from dataclasses import dataclass, fields, asdict
 import numpy as np
-import csv
-import datetime as dt
-import os
+import barstore
+import checkpoint
+import indicators
+import intrabar
+import ledger
+import profiling
+import timeindex
 
 # Default Configuration Values
 DEFAULT_RSI_OVERBOUGHT = 72
@@ -39,77 +48,127 @@ DEFAULT_MIN_ATR = 0.0003
 DEFAULT_MAX_ATR = 0.002
 DEFAULT_PRICE_REVERSAL = 0.0001
 DEFAULT_ENTRY_ADJUSTMENT = 0.00008
+DEFAULT_COMMISSION = 0.00008
 DEFAULT_TP_ATR_MULTIPLIER = 4
 DEFAULT_SL_ATR_MULTIPLIER = 2
 DEFAULT_VWAP_PERIOD = 20
 DEFAULT_CMF_PERIOD = 20
+DEFAULT_LOT_UNITS = 100000
+DEFAULT_FILL_MODE = "close"  # "intrabar" checks TP/SL against each bar's high/low
+DEFAULT_BOTH_TOUCHED = "stop"  # see intrabar.BOTH_TOUCHED_RULES
+DEFAULT_DATA_FILE = "./EURUSD_H4.csv"
 
 
-class Cache:
+class RingBuffer:
+    # Fixed-size window over the latest values. Each value is written twice, at
+    # pos and pos + size, so the newest `size` values are always one contiguous
+    # slice of the backing array: append is O(1) and last() is a zero-copy view.
+    __slots__ = ("size", "buffer", "pos", "count")
+
+    def __init__(self, size, dtype=np.float64):
+        self.size = max(size, 1)
+        self.buffer = np.zeros(2 * self.size, dtype=dtype)
+        self.pos = self.size - 1
+        self.count = 0
+
+    def append(self, value):
+        self.pos += 1
+        if self.pos == self.size:
+            self.pos = 0
+        self.buffer[self.pos] = value
+        self.buffer[self.pos + self.size] = value
+        self.count += 1
+
+    def last(self, n=None):
+        length = min(self.count, self.size)
+        if n is not None:
+            length = min(n, length)
+        end = self.pos + 1 + self.size
+        return self.buffer[end - length:end]
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+
+class BarWindow:
+    # The latest `size` bars as close/high/low/volume ring buffers; the object
+    # StreamingSignals.evaluate reads. Cache fills it from a bar file, the
+    # live runner from a bar feed. Compact runs use float32 prices and uint32 volumes.
+    def __init__(self, size, dtype=np.float64, volumeDtype=np.float64):
+        self.size = size
+        self.closes = RingBuffer(size, dtype)
+        self.highs = RingBuffer(size, dtype)
+        self.lows = RingBuffer(size, dtype)
+        self.volumes = RingBuffer(size, volumeDtype)
+        self.refresh()
+
+    def refresh(self):
+        # Zero-copy views of the window, oldest first, so arr[-period:] works as
+        # before. The indicators read them some 30 times per bar, so they are
+        # taken once per appended bar (and after the rings are restored).
+        self.cacheArr = self.closes.last()
+        self.highArr = self.highs.last()
+        self.lowArr = self.lows.last()
+        self.volumeArr = self.volumes.last()
+
+    def appendBar(self, close, high, low, volume):
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.volumes.append(volume)
+        self.refresh()
+
+    def isFull(self):
+        return len(self.closes) >= self.size
+
+
+class Cache(BarWindow):
     
-    def __init__ (self, start = 0, csvFile = "./EURUSD_M15.csv", window = 14):
-        self.cacheArr = []  # Close prices
-        self.highArr = []   # High prices
-        self.lowArr = []    # Low prices
-        self.volumeArr = [] # Volume data
+    # Rows [start, end) of the bar file; run_backtest picks them with timeindex.rowRange
+    def __init__ (self, start = 0, csvFile = DEFAULT_DATA_FILE, window = 14, quiet = False, end = None, bars = None):
         self.start = start
-        self.csvFile_handle = open(csvFile, "r")
-        self.csvReader = csv.reader(self.csvFile_handle)
-        for i in range (self.start):
-            try: 
-                next(self.csvReader)
-            except StopIteration:
-                print(f"Warning: File has fewer than {window} lines. Skipping all available lines.")
+        self.quiet = quiet
+        # Bars come from the memory-mapped columnar store, built from the CSV on first use
+        self.bars = barstore.loadBars(csvFile) if bars is None else bars
+        self.end = len(self.bars) if end is None else min(end, len(self.bars))
+        if self.start > self.end:
+            print(f"Warning: File has fewer than {self.start} lines. Skipping all available lines.")
+            self.start = self.end
+        end = min(self.start + max(window, 1), self.end)
+        # Window length is fixed by what could be loaded, as with the old shifting arrays
+        BarWindow.__init__(self, end - self.start, self.bars.close.dtype, self.bars.volume.dtype)
         try:
-            for line in self.csvReader:
-                self.cacheArr.append(float(line[4]))  # Close
-                self.highArr.append(float(line[2]))   # High
-                self.lowArr.append(float(line[3]))    # Low
-                self.volumeArr.append(float(line[5])) # Volume
-                window -=1
-                if window <= 0:
-                    break
-            self.cacheArr = np.array(self.cacheArr)
-            self.highArr = np.array(self.highArr)
-            self.lowArr = np.array(self.lowArr)
-            self.volumeArr = np.array(self.volumeArr)
+            for i in range(self.start, end):
+                self.appendBar(self.bars.close[i], self.bars.high[i], self.bars.low[i], self.bars.volume[i])
+            self.nextRow = end
         except Exception as e:
             print(f"Error {e}")
-            
+
     def shiftCacheOne(self):
         try:
-            line = next(self.csvReader)
-            new_close = float(line[4])
-            new_high = float(line[2])
-            new_low = float(line[3])
-            new_volume = float(line[5])
-            
-            # Shift arrays
-            self.cacheArr[:-1] = self.cacheArr[1:] 
-            self.cacheArr[-1] = new_close
-            
-            self.highArr[:-1] = self.highArr[1:]
-            self.highArr[-1] = new_high
-            
-            self.lowArr[:-1] = self.lowArr[1:]
-            self.lowArr[-1] = new_low
-            
-            self.volumeArr[:-1] = self.volumeArr[1:]
-            self.volumeArr[-1] = new_volume
-            
+            if self.nextRow >= self.end:
+                raise StopIteration
+            row = self.nextRow
+            self.appendBar(self.bars.close[row], self.bars.high[row], self.bars.low[row], self.bars.volume[row])
+            self.nextRow += 1
             self.start += 1
             return True
         except StopIteration:
-            print("End of file reached — can't shift further.")
+            if not self.quiet:
+                print("End of file reached — can't shift further.")
             return False
         except Exception as e:
             print(f"Error shifting cache: {e}")
             return False
+
+    def close(self):
+        # Drop the memory maps so the store file can be rebuilt or removed
+        self.bars = None
             
     def __del__(self):
         # Cleanup when object is destroyed
-        if hasattr(self, 'csvFile_handle'):
-            self.csvFile_handle.close()
+        if hasattr(self, 'bars'):
+            self.close()
 
 def calculateATR(cache, period=14):
     if len(cache.cacheArr) < 2:
@@ -128,6 +187,8 @@ def calculateATR(cache, period=14):
     return atr
 
 class EMACalc:
+    __slots__ = ("alpha", "prevEMA", "window")
+
     def __init__(self, window):
         self.alpha = 1/(window-1)
         self.prevEMA = None
@@ -159,6 +220,9 @@ def RSIBuyOrSell(cache,emaBuy, emaLoss, overBought = 72, overSold = 30, window =
     else:
         RS = avgGain / avgLoss
         RSI = 100 - (100 / (1 + RS))
+    return classifyRSI(RSI, overBought, overSold)
+
+def classifyRSI(RSI, overBought = 72, overSold = 30):
     if RSI > overBought: return -1
     elif RSI < overSold: return 1
     elif RSI < 40: return 0.2  
@@ -166,6 +230,8 @@ def RSIBuyOrSell(cache,emaBuy, emaLoss, overBought = 72, overSold = 30, window =
     else: return 0
 
 class SMACrossOver:
+    __slots__ = ("fastWindow", "slowWindow", "prevSMASlow", "prevSMAFast")
+
     def __init__(self, fastWindow = 7, slowWindow = 14):
         self.fastWindow = fastWindow
         self.slowWindow = slowWindow
@@ -220,6 +286,8 @@ def EMACheck(cacheArr, prevEma, period=14):
         return [ema, 0]
     
 class MACD:
+    __slots__ = ("fastPeriod", "slowPeriod", "signalPeriod", "prevFast", "prevSlow", "prevSignal")
+
     def __init__(self, fast=DEFAULT_MACD_FAST, slow=DEFAULT_MACD_SLOW, signal=DEFAULT_MACD_SIGNAL):
         self.fastPeriod = fast
         self.slowPeriod = slow
@@ -261,6 +329,9 @@ def williamR(cachArr, highArr, LowArr, period):
     lowestLow = np.min(LowArr[-period:])
     close = cachArr[-1]
     william = ((highestHigh-close)/(highestHigh-lowestLow)) *-100
+    return classifyWilliamR(william)
+
+def classifyWilliamR(william):
     if william > -20 and william <= -0:
         return -1
     elif william <= -80 and william >= -100:
@@ -272,37 +343,80 @@ def williamR(cachArr, highArr, LowArr, period):
     else:
         return 0
 
+def stochastic(cachArr, highArr, lowArr, period, dPeriod=DEFAULT_STOCHASTIC_D_PERIOD):
+    # %K of the last dPeriod bars (50 on a flat range) and %D, their mean
+    percentK = []
+    for end in range(len(cachArr) - dPeriod + 1, len(cachArr) + 1):
+        highestHigh = np.max(highArr[end - period:end])
+        lowestLow = np.min(lowArr[end - period:end])
+        if highestHigh == lowestLow:
+            percentK.append(50.0)
+        else:
+            percentK.append((cachArr[end - 1] - lowestLow) / (highestHigh - lowestLow) * 100)
+    return classifyStochastic(percentK[-1], np.mean(percentK))
+
+def classifyStochastic(k, d):
+    if k > 80 and k < d:
+        return -1  # overbought and turning down
+    elif k < 20 and k > d:
+        return 1  # oversold and turning up
+    elif k > 80:
+        return -0.2
+    elif k < 20:
+        return 0.2
+    else:
+        return 0
+
+def bollinger(cacheArr, period=DEFAULT_BOLLINGER_PERIOD, numStd=DEFAULT_BOLLINGER_STD):
+    closes = cacheArr[-period:]
+    band = numStd * np.std(closes)
+    if band == 0:
+        return 0
+    percentB = (cacheArr[-1] - (np.mean(closes) - band)) / (2 * band)
+    return classifyBollinger(percentB)
+
+def classifyBollinger(percentB):
+    if percentB > 1:
+        return -1  # closed above the upper band
+    elif percentB < 0:
+        return 1  # closed below the lower band
+    elif percentB > 0.8:
+        return -0.2
+    elif percentB < 0.2:
+        return 0.2
+    else:
+        return 0
+
 def calculateADX(high_arr, low_arr, close_arr, period=14):
     if len(high_arr) < period + 1:
         return 0
     highs = high_arr[-(period+1):]
     lows = low_arr[-(period+1):]
     closes = close_arr[-(period+1):]
-    
-    tr_values = []
-    plus_dm_values = []
-    minus_dm_values = []
-    
-    for i in range(1, len(highs)):
-        high_low = highs[i] - lows[i]
-        high_close = abs(highs[i] - closes[i-1])
-        low_close = abs(lows[i] - closes[i-1])
-        tr = max(high_low, high_close, low_close)
-        tr_values.append(tr)
-
-        up_move = highs[i] - highs[i-1]
-        down_move = lows[i-1] - lows[i]
-        
-        plus_dm = up_move if up_move > down_move and up_move > 0 else 0
-        minus_dm = down_move if down_move > up_move and down_move > 0 else 0
-        
-        plus_dm_values.append(plus_dm)
-        minus_dm_values.append(minus_dm)
-    
+    # Array form of the per-bar loop this replaced, with the same means: the
+    # old lists held a Python 0 for bars without directional movement, which
+    # made NumPy average float32 movements in float64
+    high_low = highs[1:] - lows[1:]
+    high_close = np.abs(highs[1:] - closes[:-1])
+    low_close = np.abs(lows[1:] - closes[:-1])
+    tr_values = np.maximum(high_low, np.maximum(high_close, low_close))
+    up_move = highs[1:] - highs[:-1]
+    down_move = lows[:-1] - lows[1:]
+    plus = (up_move > down_move) & (up_move > 0)
+    minus = (down_move > up_move) & (down_move > 0)
+    plus_dm_values = np.where(plus, up_move, 0)
+    minus_dm_values = np.where(minus, down_move, 0)
+    if not plus.all():
+        plus_dm_values = plus_dm_values.astype(np.float64)
+    if not minus.all():
+        minus_dm_values = minus_dm_values.astype(np.float64)
+
     smoothed_tr = np.mean(tr_values)
     smoothed_plus_dm = np.mean(plus_dm_values)
     smoothed_minus_dm = np.mean(minus_dm_values)
-    
+    return classifyADX(smoothed_tr, smoothed_plus_dm, smoothed_minus_dm)
+
+def classifyADX(smoothed_tr, smoothed_plus_dm, smoothed_minus_dm):
     if smoothed_tr == 0:
         return 0
     
@@ -322,6 +436,8 @@ def calculateADX(high_arr, low_arr, close_arr, period=14):
         return 0.2 if plus_di > minus_di else -0.2  # Moderate trend\
     
 class OBV:
+    __slots__ = ("obvArr",)
+
     def __init__(self):
         self.obvArr = np.array([0])
     def calc(self, closeArr, volArr):
@@ -346,6 +462,8 @@ class OBV:
                 return 0
             
 class CMF:
+    __slots__ = ("mfv", "vol")
+
     def __init__(self):
         self.mfv = []
         self.vol = []
@@ -374,19 +492,23 @@ class CMF:
             return 0
 
         cmf = np.sum(self.mfv) / np.sum(self.vol)
+        return classifyCMF(cmf)
 
-        if cmf >= 0.2:
-            return 1
-        elif cmf >= 0.25:
-            return 0.2
-        elif cmf <= -0.2:
-            return -1
-        elif cmf <= -0.25:
-            return -0.2
-        else:
-            return 0
+def classifyCMF(cmf):
+    if cmf >= 0.2:
+        return 1
+    elif cmf >= 0.25:
+        return 0.2
+    elif cmf <= -0.2:
+        return -1
+    elif cmf <= -0.25:
+        return -0.2
+    else:
+        return 0
         
 class VWAP:
+    __slots__ = ("typical_price_volume", "volume")
+
     def __init__(self):
         self.typical_price_volume = []
         self.volume = []
@@ -411,19 +533,23 @@ class VWAP:
 
         vwap = np.sum(self.typical_price_volume) / np.sum(self.volume)
         price_ratio = close / vwap
+        return classifyVWAP(price_ratio)
 
-        if price_ratio >= 1.01:
-            return 1
-        elif price_ratio >= 1.002:
-            return 0.2
-        elif price_ratio <= 0.99:
-            return -1
-        elif price_ratio <= 0.998:
-            return -0.2
-        else:
-            return 0
+def classifyVWAP(price_ratio):
+    if price_ratio >= 1.01:
+        return 1
+    elif price_ratio >= 1.002:
+        return 0.2
+    elif price_ratio <= 0.99:
+        return -1
+    elif price_ratio <= 0.998:
+        return -0.2
+    else:
+        return 0
 
 class ParabolicSAR:
+    __slots__ = ("af", "af_step", "af_max", "ep", "sar", "trend")
+
     def __init__(self, af_step=DEFAULT_SAR_ACCELERATION, af_max=DEFAULT_SAR_MAXIMUM):
         self.af = af_step         # Acceleration factor
         self.af_step = af_step
@@ -489,159 +615,518 @@ class ParabolicSAR:
         return 0  # Neutral
 
 
-position = None
-entryPrice = None
-logPnL = []
-overbought_input = input(f"Enter RSI overbought (default {DEFAULT_RSI_OVERBOUGHT}): ")
-overbought = int(overbought_input) if overbought_input.strip() else DEFAULT_RSI_OVERBOUGHT
-oversold_input = input(f"Enter RSI oversold (default {DEFAULT_RSI_OVERSOLD}): ")
-oversold = int(oversold_input) if oversold_input.strip() else DEFAULT_RSI_OVERSOLD
-windowInput = input(f"Enter RSI window and slow SMA window (default {DEFAULT_WINDOW}): ")
-window1 = int(windowInput) if windowInput.strip() else DEFAULT_WINDOW
-
-windowInput2 = input(f"Enter fast SMA window (default {DEFAULT_FAST_WINDOW}): ")
-window2 = int(windowInput2) if windowInput2.strip() else DEFAULT_FAST_WINDOW
-
-cache = Cache(window=max(window1, DEFAULT_MACD_SLOW))
-emaObj1 = EMACalc(window=window1)
-emaObj2 = EMACalc(window=window1)
-macd = MACD(fast=max(window2, DEFAULT_MACD_FAST), slow=max(window1, DEFAULT_MACD_SLOW))
-smaCalculator = SMACrossOver(slowWindow=window1, fastWindow=window2)
-
-obvObj = OBV()
-takeLoss = None
-takeProfit = None
-buyAfterReversal = [False, None]
-sellAfterReversal = [False, None] 
-vwapObj= VWAP()
-cmfObj = CMF()
-sar = ParabolicSAR()
-
-while True:
-    atr = calculateATR(cache)
-    RSIsignal = RSIBuyOrSell(cache,emaObj1, emaObj2, overBought=overbought, overSold=oversold, window=window1)
-    SMAsignal = smaCalculator.calc(cache.cacheArr)
-    macdSignal = macd.macd(cacheArr=cache.cacheArr)
-    williamRSignal = williamR(cachArr=cache.cacheArr, LowArr=cache.lowArr, highArr=cache.highArr, period=window1)
-    adxSignal = calculateADX(high_arr=cache.highArr, low_arr=cache.lowArr, period=window1, close_arr=cache.cacheArr)
-    obvSignal = obvObj.calc(closeArr=cache.cacheArr, volArr=cache.volumeArr)
-    cmfSignal = cmfObj.calc(closeArr=cache.cacheArr, highArr=cache.highArr, lowArr=cache.lowArr, volArr=cache.volumeArr)
-    vwapSignal = vwapObj.calc(cache.highArr, cache.cacheArr, cache.lowArr, cache.volumeArr)
-    sarSignal = sar.calc(cache.highArr, cache.lowArr)
-    trendScore = ((SMAsignal) + (adxSignal) + sarSignal)
-    momentumScore = (RSIsignal + macdSignal + williamRSignal)
-    volumeScore = (vwapSignal+cmfSignal+ obvSignal)
-    
-    score = (volumeScore + momentumScore + trendScore)/9
-    # print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, Williams R={williamRSignal}, ADX={adxSignal}, OBV={obvSignal} score={score}")
-        
-    
-    if score >= DEFAULT_SCORE_THRESHOLD and position == None and atr > DEFAULT_MIN_ATR and atr < DEFAULT_MAX_ATR and liquidityIndicator(cache.volumeArr) and (RSIsignal >= DEFAULT_SCORE_THRESHOLD or williamRSignal >= DEFAULT_SCORE_THRESHOLD) and not buyAfterReversal[0]:
-        buyAfterReversal = [True, cache.cacheArr[-1]]
-    
-    if buyAfterReversal[0] and cache.cacheArr[-1] < (buyAfterReversal[1] - DEFAULT_PRICE_REVERSAL) and score >= DEFAULT_SCORE_THRESHOLD:
-        entryPrice = cache.cacheArr[-1] + DEFAULT_ENTRY_ADJUSTMENT
-        print(f"entered buy position at currentPrice = {entryPrice}")
-        print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, Williams R={williamRSignal}, ADX={adxSignal}, OBV={obvSignal} score={score}")
-        position = "buy"
-        takeLoss = entryPrice - (atr * DEFAULT_SL_ATR_MULTIPLIER)
-        takeProfit = entryPrice + (atr * DEFAULT_TP_ATR_MULTIPLIER)
-        buyAfterReversal = [False, None]
-        print(f"TP: {takeProfit:.5f}, SL: {takeLoss:.5f}")
-    elif score < 0.2:
-        buyAfterReversal = [False, None]
-    if score <= -0.2 and position == None and atr > 0.0003 and atr < 0.002 and liquidityIndicator(cache.volumeArr) and (RSIsignal <= -0.2 or williamRSignal <= -0.2) and not sellAfterReversal[0]:
-        sellAfterReversal = [True, cache.cacheArr[-1]]
-    if sellAfterReversal[0] and cache.cacheArr[-1] > (sellAfterReversal[1] + 0.0001) and score <= -0.2:
-        entryPrice = cache.cacheArr[-1] - 0.00008
-        print(f"entered sell position at currentPrice = {entryPrice}")
-        print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, Williams R={williamRSignal}, ADX={adxSignal}, OBV={obvSignal} score={score}")
-        
-        position = "sell"
-        takeProfit = entryPrice - (atr * 4)  # Profit target below entry for shorts
-        takeLoss = entryPrice + (atr * 2)    # Stop loss above entry for shorts
-        sellAfterReversal = [False, None]
-        print(f"TP: {takeProfit:.5f}, SL: {takeLoss:.5f}")
-    elif score > -0.2:
-        sellAfterReversal = [False, None]
-    if position == "buy":
-        current_price = cache.cacheArr[-1]
-        if current_price >= takeProfit:
-            pnl = current_price - entryPrice -  0.00008
-            logPnL.append(pnl)
-            print(f"exited buy position at currentPrice = {current_price} (take profit)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-        elif current_price <= takeLoss:
-            pnl = current_price - entryPrice - 0.00008
-            logPnL.append(pnl)
-            print(f"exited buy position at currentPrice = {current_price} (stop loss)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-    if position == "sell":
-        current_price = cache.cacheArr[-1]
-        if current_price <= takeProfit:  # Price going down is profit for shorts
-            pnl = entryPrice - current_price - 0.00008
-            logPnL.append(pnl)
-            print(f"exited sell position at currentPrice = {current_price} (take profit)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-        elif current_price >= takeLoss:  # Price going up is loss for shorts
-            pnl = entryPrice - current_price -  0.00008
-            logPnL.append(pnl)
-            print(f"exited sell position at currentPrice = {current_price} (stop loss)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-    if score <= -0.2:
-        buyAfterReversal = [False, None]
-        if position == "buy":
-            pnl = cache.cacheArr[-1] - entryPrice -  0.00008
-            logPnL.append(pnl)
-            print(f"exited buy position at currentPrice = {cache.cacheArr[-1]} (signal exit)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-    
-    if score >= 0.2:
-        sellAfterReversal = [False, None]
-        if position == "sell":
-            pnl = entryPrice - cache.cacheArr[-1] - 0.00008
-            logPnL.append(pnl)
-            print(f"exited sell position at currentPrice = {cache.cacheArr[-1]} (signal exit)")
-            print(f"RSI={RSIsignal}, SMA={SMAsignal}, MACD={macdSignal}, score={score}")
-            position = None
-            
-    if not cache.shiftCacheOne():
-        if position == 'buy':
-            pnl = cache.cacheArr[-1] - entryPrice
-            logPnL.append(pnl)
-            print(f"forced exited buy position at currentPrice = {cache.cacheArr[-1]}")
-            position = None
-        elif position == 'sell':
-            pnl = entryPrice - cache.cacheArr[-1]
-            logPnL.append(pnl)
-            print(f"forced exited sell position at currentPrice = {cache.cacheArr[-1]}")
-            position = None
-        cache.csvFile_handle.close()
-        break
-        
-totalTrades = len(logPnL)
-if totalTrades == 0:
-    print("No trades made.")
-else:
-    logPnL = np.array(logPnL)
+def summarizeTrades(logPnL):
+    # PnL and drawdown are in account currency for DEFAULT_LOT_UNITS (1 lot)
+    logPnL = np.asarray(logPnL, dtype=np.float64)
+    totalTrades = len(logPnL)
     losses = np.where(logPnL<=0, -logPnL, 0)
     profits = np.where(logPnL>0, logPnL, 0)
     winningTrades = np.count_nonzero(profits)
     losingTrades = np.count_nonzero(losses)
     avgWin = np.mean(profits[profits > 0]) if winningTrades > 0 else 0
     avgLoss = np.mean(losses[losses > 0]) if losingTrades > 0 else 0
-    winrate = float(float(winningTrades)/totalTrades * 100)
-
-    print("\n=== BACKTEST SUMMARY ===")
-    print(f"Total Trades: {totalTrades}")
-    print(f"Winning Trades: {winningTrades}")
-    print(f"Losing Trades: {losingTrades}")
-    print(f"Average Win: {avgWin:.5f}")
-    print(f"Average Loss: {avgLoss:.5f}")
-    print(f"Winrate: {winrate:.2f}%")
-    print(f"Net PnL assuming trading 100000units or 1lots: {(np.sum(logPnL) * 100000):.2f}")
\ No newline at end of file
+    winrate = float(float(winningTrades)/totalTrades * 100) if totalTrades > 0 else 0
+    equity = np.cumsum(logPnL) * DEFAULT_LOT_UNITS
+    peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    maxDrawdown = float(np.max(peak - equity)) if totalTrades > 0 else 0.0
+    return {
+        "totalTrades": totalTrades,
+        "winningTrades": int(winningTrades),
+        "losingTrades": int(losingTrades),
+        "avgWin": float(avgWin),
+        "avgLoss": float(avgLoss),
+        "winrate": winrate,
+        "netPnL": float(np.sum(logPnL) * DEFAULT_LOT_UNITS),
+        "maxDrawdown": maxDrawdown,
+    }
+
+
+def indicatorPeriods(window1=DEFAULT_WINDOW, window2=DEFAULT_FAST_WINDOW):
+    # What the registered lookbacks (indicators.register) are functions of
+    return {"window1": window1, "window2": window2, "macdFast": DEFAULT_MACD_FAST, "macdSlow": DEFAULT_MACD_SLOW,
+            "stochasticD": DEFAULT_STOCHASTIC_D_PERIOD, "bollinger": DEFAULT_BOLLINGER_PERIOD,
+            "vwap": DEFAULT_VWAP_PERIOD, "cmf": DEFAULT_CMF_PERIOD}
+
+
+def engineWindow(window1=DEFAULT_WINDOW, window2=DEFAULT_FAST_WINDOW):
+    # Bars of the Cache/BarWindow, the warm-up (window - 1) of both engines
+    # and the liquidity mean: the longest registered lookback, and never less
+    # than the ATR the trade rules read on every bar. The weights do not
+    # enter, so zeroing one leaves the entry filters and first bar alone.
+    return indicators.engineWindow(indicatorPeriods(window1, window2), DEFAULT_ATR_PERIOD + 1)
+
+
+class StreamingSignals:
+    # Indicator objects of the main loop; evaluate(cache) runs them on the
+    # newest bar in the same order as before and returns the signal dict.
+    # weights (indicators.parseWeights spec or dict) set the score; indicators
+    # with weight 0 are not evaluated and read 0. With a
+    # profiling.StageProfiler as profiler every indicator and the scoring are
+    # timed as their own stage.
+    def __init__(self, overbought=DEFAULT_RSI_OVERBOUGHT, oversold=DEFAULT_RSI_OVERSOLD,
+                 window1=DEFAULT_WINDOW, window2=DEFAULT_FAST_WINDOW, profiler=None, weights=None):
+        self.overbought = overbought
+        self.oversold = oversold
+        self.window1 = window1
+        self.profiler = profiler
+        self.weights = indicators.parseWeights(weights)
+        self.window = engineWindow(window1, window2)
+        self.emaObj1 = EMACalc(window=window1)
+        self.emaObj2 = EMACalc(window=window1)
+        self.macd = MACD(fast=max(window2, DEFAULT_MACD_FAST), slow=max(window1, DEFAULT_MACD_SLOW))
+        self.smaCalculator = SMACrossOver(slowWindow=window1, fastWindow=window2)
+        self.obvObj = OBV()
+        self.vwapObj = VWAP()
+        self.cmfObj = CMF()
+        self.sar = ParabolicSAR()
+        builtin = (
+            ("close", lambda cache: cache.cacheArr[-1]),
+            ("atr", calculateATR),
+            ("liquidity", lambda cache: liquidityIndicator(cache.volumeArr)),
+            ("rsi", lambda cache: RSIBuyOrSell(cache, self.emaObj1, self.emaObj2, overBought=self.overbought, overSold=self.oversold, window=window1)),
+            ("sma", lambda cache: self.smaCalculator.calc(cache.cacheArr)),
+            ("macd", lambda cache: self.macd.macd(cacheArr=cache.cacheArr)),
+            ("williamR", lambda cache: williamR(cachArr=cache.cacheArr, LowArr=cache.lowArr, highArr=cache.highArr, period=window1)),
+            ("adx", lambda cache: calculateADX(high_arr=cache.highArr, low_arr=cache.lowArr, period=window1, close_arr=cache.cacheArr)),
+            ("obv", lambda cache: self.obvObj.calc(closeArr=cache.cacheArr, volArr=cache.volumeArr)),
+            ("cmf", lambda cache: self.cmfObj.calc(closeArr=cache.cacheArr, highArr=cache.highArr, lowArr=cache.lowArr, volArr=cache.volumeArr)),
+            ("vwap", lambda cache: self.vwapObj.calc(cache.highArr, cache.cacheArr, cache.lowArr, cache.volumeArr)),
+            ("sar", lambda cache: self.sar.calc(cache.highArr, cache.lowArr)),
+            ("stochastic", lambda cache: stochastic(cache.cacheArr, cache.highArr, cache.lowArr, period=window1)),
+            ("bollinger", lambda cache: bollinger(cache.cacheArr)),
+        )
+        active = indicators.active(self.weights)
+        names = {name for name, _ in builtin}
+        plugged = []
+        for name in active:
+            if name not in names:
+                factory = indicators.INDICATORS[name].streaming
+                if factory is None:
+                    raise ValueError(f"Indicator '{name}' has no streaming implementation")
+                plugged.append((name, factory(self)))
+        self.indicators = tuple((name, indicator) for name, indicator in builtin
+                                if name not in indicators.INDICATORS or name in active) + tuple(plugged)
+        self.skipped = {name: 0 for name in indicators.INDICATORS if name not in active}
+
+    def evaluate(self, cache):
+        profiler = self.profiler
+        if profiler is None:
+            signals = {name: indicator(cache) for name, indicator in self.indicators}
+            signals.update(self.skipped)
+            signals["score"] = self.score(signals)
+        else:
+            signals = {name: profiler.time("indicator:" + name, indicator, cache) for name, indicator in self.indicators}
+            signals.update(self.skipped)
+            signals["score"] = profiler.time("score", self.score, signals)
+        return signals
+
+    def score(self, signals):
+        return indicators.score(signals, self.weights)
+
+
+@dataclass
+class Config:
+    overbought: int = DEFAULT_RSI_OVERBOUGHT
+    oversold: int = DEFAULT_RSI_OVERSOLD
+    window1: int = DEFAULT_WINDOW  # RSI window and slow SMA window
+    window2: int = DEFAULT_FAST_WINDOW  # fast SMA window
+    scoreThreshold: float = DEFAULT_SCORE_THRESHOLD
+    minATR: float = DEFAULT_MIN_ATR
+    maxATR: float = DEFAULT_MAX_ATR
+    priceReversal: float = DEFAULT_PRICE_REVERSAL
+    entryAdjustment: float = DEFAULT_ENTRY_ADJUSTMENT
+    commission: float = DEFAULT_COMMISSION
+    tpMultiplier: float = DEFAULT_TP_ATR_MULTIPLIER
+    slMultiplier: float = DEFAULT_SL_ATR_MULTIPLIER
+    start: int = 0  # rows to skip (after dateFrom)
+    dateFrom: str = ""  # first bar, "YYYY-MM-DD[ HH:MM]" UTC; --from
+    dateTo: str = ""  # last bar; a bare date includes that day; --to
+    session: str = ""  # only open trades in this session (timeindex.SESSIONS or "HH-HH" UTC)
+    quiet: bool = False  # no per-trade prints
+    fillMode: str = DEFAULT_FILL_MODE
+    bothTouched: str = DEFAULT_BOTH_TOUCHED  # intrabar: which level a bar touching both hit first
+    refineData: str = ""  # intrabar: lower-timeframe CSV for bothTouched="refine"
+    compact: bool = False  # float32 prices / uint32 volumes, see compact.py
+    weights: str = ""  # score weights, "name=w;name=w" (indicators.parseWeights); "" for the defaults
+
+    @classmethod
+    def fromDict(cls, values):
+        names = {f.name for f in fields(cls)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f"Unknown config key(s): {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+    def tradeParams(self):
+        # Keyword arguments of vectorized.simulateTrades
+        return {name: getattr(self, name) for name in ("scoreThreshold", "minATR", "maxATR", "priceReversal",
+                                                      "entryAdjustment", "commission", "tpMultiplier", "slMultiplier")}
+
+
+@dataclass
+class Result:
+    logPnL: list
+    summary: dict
+    bars: int = 0
+    elapsed: float = 0.0
+    ledger: object = None  # ledger.TradeLedger of the closed trades
+
+
+class TradeLogic:
+    # Entry/exit state machine of the main loop for one instrument. onBar takes
+    # the bar's close and the StreamingSignals dict; allowBuy/allowSell let a
+    # caller veto new setups (e.g. a higher-timeframe filter), exits are never vetoed.
+    # Closed trades go to logPnL and, with bar row and time, to the ledger.
+    # With an intrabar.IntrabarFills as fills, TP/SL on the bars after the
+    # entry are checked with the high/low of the bar row passed as index.
+    def __init__(self, config, log=print, fills=None):
+        self.config = config
+        self.log = log
+        self.fills = fills
+        self.ledger = ledger.TradeLedger()
+        self.bar = -1  # row of the bar being processed
+        self.barTime = 0
+        self.entryBar = None
+        self.entryTime = 0
+        self.position = None
+        self.entryPrice = None
+        self.takeLoss = None
+        self.takeProfit = None
+        self.logPnL = []
+        self.buyAfterReversal = [False, None]
+        self.sellAfterReversal = [False, None]
+
+    def onBar(self, currentPrice, signals, allowBuy=True, allowSell=True, index=None, timestamp=0):
+        # index/timestamp locate the bar for the ledger; without them bars are counted from 0
+        self.bar = self.bar + 1 if index is None else index
+        self.barTime = timestamp
+        # Trade bookkeeping stays in float64 when the bars and indicators are float32
+        currentPrice = float(currentPrice)
+        config = self.config
+        log = self.log
+        threshold = config.scoreThreshold
+        atr = float(signals["atr"])
+        RSIsignal = signals["rsi"]
+        williamRSignal = signals["williamR"]
+        score = signals["score"]
+        atrOk = atr > config.minATR and atr < config.maxATR
+
+        if allowBuy and score >= threshold and self.position == None and atrOk and signals["liquidity"] and (RSIsignal >= threshold or williamRSignal >= threshold) and not self.buyAfterReversal[0]:
+            self.buyAfterReversal = [True, currentPrice]
+        
+        if self.buyAfterReversal[0] and currentPrice < (self.buyAfterReversal[1] - config.priceReversal) and score >= threshold:
+            self.entryPrice = currentPrice + config.entryAdjustment
+            log(f"entered buy position at currentPrice = {self.entryPrice}")
+            log(f"RSI={RSIsignal}, SMA={signals['sma']}, MACD={signals['macd']}, Williams R={williamRSignal}, ADX={signals['adx']}, OBV={signals['obv']} score={score}")
+            self.position = "buy"
+            self.entryBar, self.entryTime = self.bar, self.barTime
+            self.takeLoss = self.entryPrice - (atr * config.slMultiplier)
+            self.takeProfit = self.entryPrice + (atr * config.tpMultiplier)
+            self.buyAfterReversal = [False, None]
+            log(f"TP: {self.takeProfit:.5f}, SL: {self.takeLoss:.5f}")
+        elif score < threshold:
+            self.buyAfterReversal = [False, None]
+        if allowSell and score <= -threshold and self.position == None and atrOk and signals["liquidity"] and (RSIsignal <= -threshold or williamRSignal <= -threshold) and not self.sellAfterReversal[0]:
+            self.sellAfterReversal = [True, currentPrice]
+        if self.sellAfterReversal[0] and currentPrice > (self.sellAfterReversal[1] + config.priceReversal) and score <= -threshold:
+            self.entryPrice = currentPrice - config.entryAdjustment
+            log(f"entered sell position at currentPrice = {self.entryPrice}")
+            log(f"RSI={RSIsignal}, SMA={signals['sma']}, MACD={signals['macd']}, Williams R={williamRSignal}, ADX={signals['adx']}, OBV={signals['obv']} score={score}")
+            
+            self.position = "sell"
+            self.entryBar, self.entryTime = self.bar, self.barTime
+            self.takeProfit = self.entryPrice - (atr * config.tpMultiplier)  # Profit target below entry for shorts
+            self.takeLoss = self.entryPrice + (atr * config.slMultiplier)    # Stop loss above entry for shorts
+            self.sellAfterReversal = [False, None]
+            log(f"TP: {self.takeProfit:.5f}, SL: {self.takeLoss:.5f}")
+        elif score > -threshold:
+            self.sellAfterReversal = [False, None]
+        if self.fills is not None and self.position is not None and self.bar > self.entryBar:
+            fill = self.fills.check(self.position, self.takeProfit, self.takeLoss, self.bar)
+            if fill is not None:
+                self.exit(fill[0], signals, fill[1])
+        else:
+            if self.position == "buy":
+                if currentPrice >= self.takeProfit:
+                    self.exit(currentPrice, signals, "take profit")
+                elif currentPrice <= self.takeLoss:
+                    self.exit(currentPrice, signals, "stop loss")
+            if self.position == "sell":
+                if currentPrice <= self.takeProfit:  # Price going down is profit for shorts
+                    self.exit(currentPrice, signals, "take profit")
+                elif currentPrice >= self.takeLoss:  # Price going up is loss for shorts
+                    self.exit(currentPrice, signals, "stop loss")
+        if score <= -threshold:
+            self.buyAfterReversal = [False, None]
+            if self.position == "buy":
+                self.exit(currentPrice, signals, "signal exit")
+        
+        if score >= threshold:
+            self.sellAfterReversal = [False, None]
+            if self.position == "sell":
+                self.exit(currentPrice, signals, "signal exit")
+
+    def exit(self, currentPrice, signals, reason):
+        if self.position == "buy":
+            self.logPnL.append(currentPrice - self.entryPrice - self.config.commission)
+        else:
+            self.logPnL.append(self.entryPrice - currentPrice - self.config.commission)
+        self.record(currentPrice, ledger.EXIT_REASONS.index(reason))
+        self.log(f"exited {self.position} position at currentPrice = {currentPrice} ({reason})")
+        self.log(f"RSI={signals['rsi']}, SMA={signals['sma']}, MACD={signals['macd']}, score={signals['score']}")
+        self.position = None
+
+    def forceExit(self, currentPrice):
+        # End of data: close at the last price, no commission
+        if self.position == 'buy':
+            self.logPnL.append(currentPrice - self.entryPrice)
+        elif self.position == 'sell':
+            self.logPnL.append(self.entryPrice - currentPrice)
+        else:
+            return
+        self.record(currentPrice, ledger.EXIT_FORCED)
+        self.log(f"forced exited {self.position} position at currentPrice = {currentPrice}")
+        self.position = None
+
+    def record(self, currentPrice, reason):
+        side = ledger.BUY if self.position == "buy" else ledger.SELL
+        self.ledger.record(side, self.entryBar, self.bar, self.entryPrice, currentPrice, self.logPnL[-1], reason,
+                           self.entryTime, self.barTime)
+
+
+def run_backtest(config=None, data=DEFAULT_DATA_FILE, profiler=None, checkpointPath=None,
+                 checkpointEvery=checkpoint.DEFAULT_EVERY, resume=False):
+    # Streaming backtest over the bar file `data`; nothing is read from stdin.
+    # A profiling.StageProfiler times the shift, indicator, trade and log stages.
+    # With checkpointPath the engine is snapshotted every checkpointEvery bars
+    # and at the end of the data; resume=True continues from that snapshot.
+    config = config or Config()
+    log = (lambda *args: None) if config.quiet else print
+    started = time.perf_counter()
+    bars = barstore.loadBars(data, barstore.storeDtype(config.compact))
+    start, end = timeindex.rowRange(config, bars)
+    cache = Cache(start=start, csvFile=data, window=engineWindow(config.window1, config.window2),
+                  quiet=config.quiet, end=end, bars=bars)
+    session = timeindex.TimeIndex(bars.time).sessionMask(config.session) if config.session else None
+    streaming = StreamingSignals(overbought=config.overbought, oversold=config.oversold,
+                                 window1=config.window1, window2=config.window2, profiler=profiler,
+                                 weights=config.weights)
+    if profiler is not None:
+        log = profiler.wrap("log", log)
+    trader = TradeLogic(config, log, intrabar.fromConfig(config, cache.bars))
+    onBar = trader.onBar if profiler is None else profiler.wrap("trade", trader.onBar)
+    shift = cache.shiftCacheOne if profiler is None else profiler.wrap("shift", cache.shiftCacheOne)
+    times = bars.time
+    bars = 0
+    snapshots = None if checkpointPath is None else checkpoint.Checkpointer(checkpointPath, checkpointEvery)
+    more = True
+    if resume:
+        if snapshots is None:
+            raise ValueError("resume needs a checkpoint path")
+        bars = resumeBacktest(checkpointPath, config, data, cache, streaming, trader)
+        more = shift()
+    while more:
+        bars += 1
+        row = cache.nextRow - 1
+        # Outside the session no new setups are taken; open trades are still managed
+        allowed = True if session is None else bool(session[row])
+        onBar(cache.cacheArr[-1], streaming.evaluate(cache), allowed, allowed, index=row, timestamp=int(times[row]))
+        if snapshots is not None and snapshots.due(bars):
+            saveBacktest(snapshots, config, data, cache, streaming, trader, bars)
+        more = shift()
+    if snapshots is not None:
+        # The end state, before the forced exit: what live.py warm-starts from
+        saveBacktest(snapshots, config, data, cache, streaming, trader, bars)
+    trader.forceExit(cache.cacheArr[-1])
+    cache.close()
+
+    return Result(logPnL=trader.logPnL, summary=summarizeTrades(trader.logPnL), bars=bars,
+                  elapsed=time.perf_counter() - started, ledger=trader.ledger)
+
+
+def saveBacktest(snapshots, config, data, cache, streaming, trader, bars):
+    snapshots.save(cache, streaming, trader, config, kind="backtest", data=data, row=cache.nextRow - 1,
+                   start=cache.start, bars=bars, dataBars=len(cache.bars))
+
+
+def loadSnapshot(path, config):
+    # (meta, arrays) of a run_backtest snapshot taken with the settings of config
+    meta, arrays = checkpoint.load(path)
+    if meta.get("kind") != "backtest":
+        raise ValueError(f"{path} is not a backtest snapshot")
+    checkpoint.checkConfig(meta, config)
+    return meta, arrays
+
+
+def resumeBacktest(path, config, data, cache, streaming, trader):
+    # Loads a run_backtest snapshot into a freshly built engine; returns the bars already evaluated
+    meta, arrays = loadSnapshot(path, config)
+    row = meta["row"]
+    if meta["dataBars"] != len(cache.bars) or not cache.start <= row < cache.end:
+        raise ValueError(f"{path} was taken on other data ({meta['data']}, {meta['dataBars']} bars)")
+    checkpoint.restoreEngine(meta, arrays, cache, streaming, trader)
+    cache.nextRow, cache.start = row + 1, meta["start"]
+    size = len(cache.cacheArr)
+    if not np.array_equal(cache.cacheArr, cache.bars.close[row + 1 - size:row + 1]):
+        raise ValueError(f"{path} does not match the bars of {data}")
+    return meta["bars"]
+
+
+def printSummary(summary):
+    if summary["totalTrades"] == 0:
+        print("No trades made.")
+    else:
+        print("\n=== BACKTEST SUMMARY ===")
+        print(f"Total Trades: {summary['totalTrades']}")
+        print(f"Winning Trades: {summary['winningTrades']}")
+        print(f"Losing Trades: {summary['losingTrades']}")
+        print(f"Average Win: {summary['avgWin']:.5f}")
+        print(f"Average Loss: {summary['avgLoss']:.5f}")
+        print(f"Winrate: {summary['winrate']:.2f}%")
+        print(f"Net PnL assuming trading 100000units or 1lots: {summary['netPnL']:.2f}")
+
+
+def promptConfig(config):
+    # The original interactive prompts, kept behind --interactive
+    overbought_input = input(f"Enter RSI overbought (default {config.overbought}): ")
+    config.overbought = int(overbought_input) if overbought_input.strip() else config.overbought
+    oversold_input = input(f"Enter RSI oversold (default {config.oversold}): ")
+    config.oversold = int(oversold_input) if oversold_input.strip() else config.oversold
+    windowInput = input(f"Enter RSI window and slow SMA window (default {config.window1}): ")
+    config.window1 = int(windowInput) if windowInput.strip() else config.window1
+    windowInput2 = input(f"Enter fast SMA window (default {config.window2}): ")
+    config.window2 = int(windowInput2) if windowInput2.strip() else config.window2
+    return config
+
+
+def addConfigArguments(parser):
+    # --config JSON, --quiet and one flag per Config field; read back with configFromArgs
+    parser.add_argument("--config", help="JSON file with Config fields; command line flags override it")
+    parser.add_argument("--quiet", action="store_true", default=None, help="no per-trade output")
+    parser.add_argument("--from", dest="dateFrom", help="first bar, YYYY-MM-DD[ HH:MM] UTC")
+    parser.add_argument("--to", dest="dateTo", help="last bar, YYYY-MM-DD[ HH:MM] UTC; a bare date includes that day")
+    for f in fields(Config):
+        if f.name in ("quiet", "dateFrom", "dateTo"):
+            continue
+        if f.type is bool:
+            parser.add_argument(f"--{f.name}", action="store_true", default=None)
+            continue
+        parser.add_argument(f"--{f.name}", type=f.type if f.type in (int, float) else type(f.default), default=None)
+    return parser
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(description="Multi-indicator forex backtest")
+    parser.add_argument("--data", default=DEFAULT_DATA_FILE, help="CSV bar file (Date Time, Open, High, Low, Close, Volume)")
+    parser.add_argument("--interactive", action="store_true", help="ask for the RSI/SMA parameters on stdin")
+    parser.add_argument("--output", help="write the result summary as JSON to this file")
+    parser.add_argument("--stats", action="store_true", help="print drawdown duration, Sharpe/Sortino, MAE/MFE, ...")
+    parser.add_argument("--profile", action="store_true", help="print time spent per loop stage and indicator")
+    parser.add_argument("--trace-out", help="write the stage timings as Chrome trace-event JSON (implies --profile)")
+    parser.add_argument("--pstats-out", help="run under cProfile and dump pstats to this file")
+    parser.add_argument("--montecarlo", type=int, metavar="N", help="resample the trades N times afterwards (montecarlo.py)")
+    parser.add_argument("--checkpoint", help="snapshot the engine to this .npz file while running (checkpoint.py)")
+    parser.add_argument("--checkpoint-every", type=int, default=checkpoint.DEFAULT_EVERY, metavar="N",
+                        help="bars between snapshots")
+    parser.add_argument("--resume", action="store_true", help="continue from the --checkpoint snapshot")
+    parser.add_argument("--store", help="SQLite result store (runstore.py): reuse an identical stored run, else add this one")
+    parser.add_argument("--rerun", action="store_true", help="simulate even if --store has the run")
+    import montecarlo  # imports this module, so not at the top
+    montecarlo.addArguments(parser)
+    return addConfigArguments(parser)
+
+
+def configFromArgs(args):
+    values = {}
+    if args.config:
+        with open(args.config, "r") as handle:
+            values.update(json.load(handle))
+    for f in fields(Config):
+        value = getattr(args, f.name, None)
+        if value is not None:
+            values[f.name] = value
+    config = Config.fromDict(values)
+    # Fail on a bad date or session name now rather than when the run reaches it
+    timeindex.toEpoch(config.dateFrom or 0)
+    timeindex.toEpoch(config.dateTo or 0)
+    if config.session:
+        timeindex.sessionHours(config.session)
+    indicators.parseWeights(config.weights)
+    return config
+
+
+def main(argv=None):
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    try:
+        config = configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    if args.interactive:
+        config = promptConfig(config)
+    profiler = None
+    if args.profile or args.trace_out:
+        profiler = profiling.StageProfiler(trace=bool(args.trace_out))
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.checkpoint_every < 1:
+        parser.error("--checkpoint-every must be positive")
+    if args.resume:
+        try:
+            loadSnapshot(args.checkpoint, config)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"checkpoint: {e}")
+    if args.montecarlo is not None and args.montecarlo < 1:
+        parser.error("--montecarlo must be positive")
+    runArgs = (config, args.data, profiler, args.checkpoint, args.checkpoint_every, args.resume)
+    store = stored = None
+    if args.store:
+        import runstore  # imports this module, so not at the top
+        store = runstore.RunStore(args.store)
+        key, runManifest = runstore.backtestKey(config, args.data)
+        # Profiling and snapshots are side effects of running, so those always run
+        if not (args.rerun or profiler or args.pstats_out or args.checkpoint):
+            stored = store.get(key)
+    if stored is not None:
+        result = stored.result()
+        print(f"Stored run {key[:12]} from {args.store} ({result.elapsed:.2f}s when it ran)")
+    elif args.pstats_out:
+        profile = cProfile.Profile()
+        result = profile.runcall(run_backtest, *runArgs)
+        profile.dump_stats(args.pstats_out)
+    else:
+        result = run_backtest(*runArgs)
+    if store is not None:
+        if stored is None:
+            store.add(key, runManifest, args.data, result.logPnL, result.ledger, result.bars, result.elapsed,
+                      result.summary)
+        store.close()
+    printSummary(result.summary)
+    stats = None
+    if args.stats or args.output:
+        import analytics  # analytics imports this module, so not at the top
+        bars = barstore.loadBars(args.data)
+        stats = analytics.analyzeLedger(result.ledger, bars.high, bars.low)
+        if args.stats:
+            analytics.printStats(stats)
+    monteCarlo = None
+    if args.montecarlo:
+        import montecarlo
+        try:
+            monteCarlo = montecarlo.runFromArgs(args, result, args.data, args.montecarlo)
+        except ValueError as e:
+            parser.error(str(e))
+    if profiler is not None:
+        profiler.printSummary(result.elapsed)
+        if args.trace_out:
+            profiler.writeTrace(args.trace_out)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"config": asdict(config), "data": args.data, "bars": result.bars,
+                       "elapsed": result.elapsed, "summary": result.summary, "stats": stats, "monteCarlo": monteCarlo, "logPnL": result.logPnL,
+                       "trades": result.ledger.rows()}, handle, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#  <barstore.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Columnar binary bar store. A CSV is converted once into
+#   [64 byte header][time int64 x n][open][high][low][close][volume]
+# and later runs np.memmap the columns instead of parsing text.
+# The header records the source CSV's size and mtime; when either changes the
+# store is rebuilt on the next load.
+# Prices are float64, or float32 in the compact store (.f32.bars, 28 instead
+# of 48 bytes per bar), whose volumes are uint32; see compact.py for the
+# error bound.
+import csv
+import datetime as dt
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from collections import namedtuple
+import numpy as np
+
+MAGIC = b"FXBARS\x00\x01"
+VERSION = 2  # 2: uint32 volumes in the float32 store
+HEADER_FORMAT = "<8sIIqqq"  # magic, version, price itemsize, rows, source size, source mtime_ns
+HEADER_SIZE = 64
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+CONVERT_BLOCK_ROWS = 1 << 16  # CSV rows parsed per block during conversion
+UINT32_MAX = np.iinfo(np.uint32).max
+
+Bar = namedtuple("Bar", "time open high low close volume")
+
+
+def barPath(csvFile, priceDtype=np.float64):
+    stem = os.path.splitext(csvFile)[0]
+    suffix = ".bars" if np.dtype(priceDtype).itemsize == 8 else ".f32.bars"
+    return stem + suffix
+
+
+def parseTimestamp(text):
+    # CSV "Date Time" column, "YYYY-MM-DD HH:MM", read as UTC epoch seconds
+    stamp = dt.datetime.strptime(text.strip()[:16], "%Y-%m-%d %H:%M")
+    return int(stamp.replace(tzinfo=dt.timezone.utc).timestamp())
+
+
+def storeDtype(compact):
+    # Price dtype of the store a run reads, from its compact setting
+    return np.float32 if compact else np.float64
+
+
+def volumeDtype(priceDtype):
+    return np.dtype(np.float64) if np.dtype(priceDtype).itemsize == 8 else np.dtype(np.uint32)
+
+
+def compactVolume(volume):
+    # Volumes of the float32 store; they must be whole numbers that fit uint32
+    if len(volume) and (volume.min() < 0 or volume.max() > UINT32_MAX or np.any(volume != np.floor(volume))):
+        raise ValueError("Volumes are not whole numbers within uint32 range; use the float64 store")
+    return volume.astype(np.uint32)
+
+
+def parseTimestamps(texts):
+    # Vectorized parseTimestamp: NumPy's datetime64 parser over a whole block
+    # of "YYYY-MM-DD HH:MM" strings instead of strptime per row
+    seconds = np.asarray(texts, dtype=str).astype("datetime64[s]").astype(np.int64)
+    return seconds - seconds % 60  # parseTimestamp ignores anything after the minutes
+
+
+def parseBar(line):
+    # One CSV line as a Bar, None for blank and header lines
+    fields = line.strip().split(",")
+    if len(fields) < 6:
+        return None
+    try:
+        stamp = parseTimestamp(fields[0])
+    except ValueError:
+        return None
+    return Bar(stamp, *(float(field) for field in fields[1:6]))
+
+
+def readHeader(barFile):
+    with open(barFile, "rb") as handle:
+        raw = handle.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"{barFile} is not a bar store (truncated header)")
+    magic, version, itemsize, rows, sourceSize, sourceMtime = struct.unpack_from(HEADER_FORMAT, raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{barFile} is not a version {VERSION} bar store")
+    return {"itemsize": itemsize, "rows": rows, "sourceSize": sourceSize, "sourceMtime": sourceMtime}
+
+
+def isFresh(csvFile, barFile):
+    if not os.path.exists(barFile):
+        return False
+    try:
+        header = readHeader(barFile)
+    except ValueError:
+        return False
+    stat = os.stat(csvFile)
+    return header["sourceSize"] == stat.st_size and header["sourceMtime"] == stat.st_mtime_ns
+
+
+def readBlocks(handle, blockRows=CONVERT_BLOCK_ROWS):
+    # Yields (times, [open, high, low, close, volume]) arrays of up to blockRows rows.
+    # Rows are only split here; the text of each block is parsed column by column.
+    rows = []
+    for line in csv.reader(handle):
+        if not line or not line[0][:1].isdigit():
+            continue  # blank or header row
+        rows.append(line[:6])
+        if len(rows) == blockRows:
+            yield parseBlock(rows)
+            rows = []
+    if rows:
+        yield parseBlock(rows)
+
+
+def parseBlock(rows):
+    text = np.array(rows, dtype=str)
+    return parseTimestamps(text[:, 0]), [text[:, i].astype(np.float64) for i in range(1, 6)]
+
+
+def convertCSV(csvFile, barFile=None, priceDtype=np.float64, blockRows=CONVERT_BLOCK_ROWS):
+    barFile = barFile or barPath(csvFile, priceDtype)
+    with open(csvFile, "r") as handle:
+        return writeStore(readBlocks(handle, blockRows), barFile, priceDtype, os.stat(csvFile))
+
+
+def writeStore(blocks, barFile, priceDtype=np.float64, source=None):
+    # Writes (times, [open, high, low, close, volume]) blocks as a store.
+    # Converts block by block, so memory stays bounded for files larger than RAM:
+    # times go straight into the store, each price column into its own part
+    # file that is appended once the row count is known. source is the
+    # os.stat of the file the store is derived from (isFresh compares it).
+    priceDtype = np.dtype(priceDtype)
+    dtypes = [priceDtype] * (len(PRICE_COLUMNS) - 1) + [volumeDtype(priceDtype)]
+    # Write to a file of our own next to the target and rename, so a crashed
+    # conversion never leaves a half-written store that looks valid and two
+    # processes converting the same file never write into each other's
+    handle, tmpFile = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(barFile)),
+                                       prefix=os.path.basename(barFile) + ".", suffix=".tmp")
+    partFiles = [f"{tmpFile}.{name}" for name in PRICE_COLUMNS]
+    rows = 0
+    try:
+        with os.fdopen(handle, "wb") as out:
+            out.write(b"\x00" * HEADER_SIZE)
+            parts = [open(path, "wb") for path in partFiles]
+            try:
+                for times, columns in blocks:
+                    out.write(np.asarray(times, dtype=np.int64).tobytes())
+                    if priceDtype.itemsize != 8:
+                        columns = columns[:-1] + [compactVolume(columns[-1])]
+                    for part, column, dtype in zip(parts, columns, dtypes):
+                        part.write(np.asarray(column).astype(dtype, copy=False).tobytes())
+                    rows += len(times)
+            finally:
+                for part in parts:
+                    part.close()
+            for path in partFiles:
+                with open(path, "rb") as part:
+                    shutil.copyfileobj(part, out)
+            header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, priceDtype.itemsize, rows,
+                                 source.st_size if source else 0, source.st_mtime_ns if source else 0)
+            out.seek(0)
+            out.write(header.ljust(HEADER_SIZE, b"\x00"))
+    except BaseException:
+        if os.path.exists(tmpFile):
+            os.remove(tmpFile)
+        raise
+    finally:
+        for path in partFiles:
+            if os.path.exists(path):
+                os.remove(path)
+    os.replace(tmpFile, barFile)
+    return barFile
+
+
+class BarStore:
+    def __init__(self, barFile):
+        header = readHeader(barFile)
+        self.path = barFile
+        self.rows = header["rows"]
+        priceDtype = np.dtype(np.float64 if header["itemsize"] == 8 else np.float32)
+        offset = HEADER_SIZE
+        if self.rows == 0:
+            self.time = np.empty(0, dtype=np.int64)
+        else:
+            self.time = np.memmap(barFile, dtype=np.int64, mode="r", offset=offset, shape=(self.rows,))
+        offset += self.rows * 8
+        for name in PRICE_COLUMNS:
+            dtype = volumeDtype(priceDtype) if name == "volume" else priceDtype
+            if self.rows == 0:
+                column = np.empty(0, dtype=dtype)
+            else:
+                column = np.memmap(barFile, dtype=dtype, mode="r", offset=offset, shape=(self.rows,))
+            setattr(self, name, column)
+            offset += self.rows * dtype.itemsize
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def datetimes(self):
+        # The time column as datetime64[s], a view of the same int64 memory map
+        return self.time.view("datetime64[s]")
+
+    def bar(self, i):
+        return Bar(int(self.time[i]), float(self.open[i]), float(self.high[i]), float(self.low[i]),
+                   float(self.close[i]), float(self.volume[i]))
+
+
+def inferBarSeconds(times):
+    # Bar length from the most common spacing of the first bars (weekend gaps are rarer)
+    times = np.asarray(times[:1000], dtype=np.int64)
+    if len(times) < 2:
+        return 0
+    gaps, counts = np.unique(np.diff(times), return_counts=True)
+    return int(gaps[np.argmax(counts)])
+
+
+def loadBars(csvFile, priceDtype=np.float64):
+    # Memory-maps the bar store for csvFile, converting first if it is missing or stale.
+    # "file.csv@D1" (or "@H8+21:00", ...) is a higher timeframe of the file, see resample.py
+    if "@" in csvFile:
+        import resample  # reads base stores through this module
+        return resample.loadSpec(csvFile, priceDtype)
+    barFile = barPath(csvFile, priceDtype)
+    if not isFresh(csvFile, barFile):
+        convertCSV(csvFile, barFile, priceDtype)
+    return BarStore(barFile)
+
+
+if __name__ == "__main__":
+    for csvFile in sys.argv[1:]:
+        store = loadBars(csvFile)
+        print(f"{csvFile} -> {store.path} ({len(store)} bars)")
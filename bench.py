@@ -0,0 +1,261 @@
+#  <bench.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Throughput benchmarks, in bars per second.
+#   per indicator  each streaming indicator call of the main loop, timed on its own
+#   loop           Cache + StreamingSignals + TradeLogic, as run_backtest
+#   incremental    incremental.SignalSet + TradeLogic, as live.py --incremental
+#   vectorized     computeSignals + simulateTrades over the whole file
+#   chunked        run_chunked with the default block size
+# Datasets are CSV files or "synthetic:N", an N-bar random walk written once
+# to --synthetic-dir. The per-bar benchmarks stop after --stream-bars bars so
+# multi-million-bar series stay practical; the rate is what is compared.
+# Results are written as JSON. --compare flags every benchmark whose rate fell
+# by more than --threshold against a baseline file, and exits 1 if any did.
+#
+#   python bench.py EURUSD_D1.csv EURUSD_H4.csv synthetic:2000000 --out bench.json
+#   python bench.py EURUSD_H4.csv --compare bench.json --threshold 0.1
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import backtest as bt
+import barstore
+import chunked
+import incremental
+import vectorized
+
+DEFAULT_STREAM_BARS = 20000
+DEFAULT_THRESHOLD = 0.10
+SYNTHETIC_DIR = ".bench"
+INDICATORS = ("calculateATR", "liquidityIndicator", "RSIBuyOrSell", "SMACrossOver.calc", "MACD.macd",
+              "williamR", "calculateADX", "OBV.calc", "CMF.calc", "VWAP.calc", "ParabolicSAR.calc")
+
+
+def syntheticCSV(bars, directory=SYNTHETIC_DIR, seed=7):
+    # H4 random walk around 1.2 with EURUSD-like ranges and volumes, written once
+    path = os.path.join(directory, f"synthetic_{bars}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    close = 1.2 * np.exp(np.cumsum(rng.normal(0, 0.0025, bars)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, (2, bars)))
+    high = np.maximum(open_, close) + spread[0]
+    low = np.minimum(open_, close) - spread[1]
+    volume = rng.integers(1000, 40000, bars)
+    stamps = np.datetime64("2000-01-03T00:00") + np.arange(bars) * np.timedelta64(4, "h")
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "w") as handle:
+        for block in range(0, bars, 100000):
+            rows = slice(block, block + 100000)
+            lines = [f"{stamp.replace('T', ' ')},{o:.5f},{h:.5f},{l:.5f},{c:.5f},{v}\n" for stamp, o, h, l, c, v in
+                     zip(np.datetime_as_string(stamps[rows], unit="m"), open_[rows].tolist(), high[rows].tolist(),
+                         low[rows].tolist(), close[rows].tolist(), volume[rows].tolist())]
+            handle.writelines(lines)
+    os.replace(tmpPath, path)
+    return path
+
+
+def resolveDataset(name, directory=SYNTHETIC_DIR):
+    if name.startswith("synthetic:"):
+        return syntheticCSV(int(name.partition(":")[2]), directory)
+    return name
+
+
+def _rate(bars, seconds):
+    return {"bars": bars, "seconds": seconds, "barsPerSecond": bars / seconds if seconds > 0 else float("inf")}
+
+
+def benchIndicators(data, maxBars=DEFAULT_STREAM_BARS, window1=bt.DEFAULT_WINDOW, window2=bt.DEFAULT_FAST_WINDOW):
+    # Walks the Cache once and times every indicator call separately
+    window = bt.engineWindow(window1, window2)
+    cache = bt.Cache(csvFile=data, window=window, quiet=True)
+    emaGain, emaLoss = bt.EMACalc(window=window1), bt.EMACalc(window=window1)
+    sma = bt.SMACrossOver(slowWindow=window1, fastWindow=window2)
+    macd = bt.MACD(fast=max(window2, bt.DEFAULT_MACD_FAST), slow=max(window1, bt.DEFAULT_MACD_SLOW))
+    obv, cmf, vwap, sar = bt.OBV(), bt.CMF(), bt.VWAP(), bt.ParabolicSAR()
+    calls = {
+        "calculateATR": lambda: bt.calculateATR(cache),
+        "liquidityIndicator": lambda: bt.liquidityIndicator(cache.volumeArr),
+        "RSIBuyOrSell": lambda: bt.RSIBuyOrSell(cache, emaGain, emaLoss, window=window1),
+        "SMACrossOver.calc": lambda: sma.calc(cache.cacheArr),
+        "MACD.macd": lambda: macd.macd(cacheArr=cache.cacheArr),
+        "williamR": lambda: bt.williamR(cache.cacheArr, cache.highArr, cache.lowArr, period=window1),
+        "calculateADX": lambda: bt.calculateADX(cache.highArr, cache.lowArr, cache.cacheArr, period=window1),
+        "OBV.calc": lambda: obv.calc(cache.cacheArr, cache.volumeArr),
+        "CMF.calc": lambda: cmf.calc(cache.cacheArr, cache.highArr, cache.lowArr, cache.volumeArr),
+        "VWAP.calc": lambda: vwap.calc(cache.highArr, cache.cacheArr, cache.lowArr, cache.volumeArr),
+        "ParabolicSAR.calc": lambda: sar.calc(cache.highArr, cache.lowArr),
+    }
+    elapsed = dict.fromkeys(calls, 0)
+    bars = 0
+    clock = time.perf_counter_ns
+    while bars < maxBars:
+        for name, call in calls.items():
+            t0 = clock()
+            call()
+            elapsed[name] += clock() - t0
+        bars += 1
+        if not cache.shiftCacheOne():
+            break
+    cache.close()
+    return {name: _rate(bars, elapsed[name] / 1e9) for name in INDICATORS}
+
+
+def benchLoop(data, maxBars=DEFAULT_STREAM_BARS, config=None):
+    config = config or bt.Config(quiet=True)
+    cache = bt.Cache(start=config.start, csvFile=data,
+                     window=bt.engineWindow(config.window1, config.window2), quiet=True)
+    streaming = bt.StreamingSignals(overbought=config.overbought, oversold=config.oversold,
+                                    window1=config.window1, window2=config.window2, weights=config.weights)
+    trader = bt.TradeLogic(config, lambda *args: None)
+    bars = 0
+    started = time.perf_counter()
+    while bars < maxBars:
+        trader.onBar(cache.cacheArr[-1], streaming.evaluate(cache))
+        bars += 1
+        if not cache.shiftCacheOne():
+            break
+    seconds = time.perf_counter() - started
+    cache.close()
+    return _rate(bars, seconds)
+
+
+def benchIncremental(data, maxBars=DEFAULT_STREAM_BARS, config=None):
+    config = config or bt.Config(quiet=True)
+    bars = barstore.loadBars(data)
+    signalSet = incremental.SignalSet(overbought=config.overbought, oversold=config.oversold,
+                                      window1=config.window1, window2=config.window2, weights=config.weights)
+    trader = bt.TradeLogic(config, lambda *args: None)
+    evaluated = 0
+    started = time.perf_counter()
+    for i in range(config.start, len(bars)):
+        signals = signalSet.update(bars.bar(i))
+        if signals is None:
+            continue
+        trader.onBar(signals["close"], signals)
+        evaluated += 1
+        if evaluated >= maxBars:
+            break
+    return _rate(evaluated, time.perf_counter() - started)
+
+
+def benchVectorized(data, config=None):
+    config = config or bt.Config(quiet=True)
+    columns = vectorized.loadCSV(data)
+    started = time.perf_counter()
+    signals = vectorized.computeSignals(*columns, overbought=config.overbought, oversold=config.oversold,
+                                        window1=config.window1, window2=config.window2, weights=config.weights)
+    vectorized.simulateTrades(signals, **config.tradeParams())
+    return _rate(len(signals["close"]), time.perf_counter() - started)
+
+
+def benchChunked(data, config=None):
+    result = chunked.run_chunked(config or bt.Config(quiet=True), data)
+    return _rate(result.bars, result.elapsed)
+
+
+def runBenchmarks(datasets, streamBars=DEFAULT_STREAM_BARS, repeat=1, synthetic=SYNTHETIC_DIR, log=print):
+    # {dataset: {benchmark: {bars, seconds, barsPerSecond}}}, best of `repeat` runs
+    results = {}
+    for name in datasets:
+        data = resolveDataset(name, synthetic)
+        barstore.loadBars(data)  # conversion is not part of any benchmark
+        log(f"{name}: {len(barstore.loadBars(data))} bars")
+        runs = {}
+        for _ in range(repeat):
+            rows = {f"indicator:{key}": value for key, value in benchIndicators(data, streamBars).items()}
+            rows["loop"] = benchLoop(data, streamBars)
+            rows["incremental"] = benchIncremental(data, streamBars)
+            rows["vectorized"] = benchVectorized(data)
+            rows["chunked"] = benchChunked(data)
+            for key, value in rows.items():
+                if key not in runs or value["barsPerSecond"] > runs[key]["barsPerSecond"]:
+                    runs[key] = value
+        results[name] = runs
+    return results
+
+
+def compareResults(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # [(dataset, benchmark, baseline rate, rate, change)] for rates that fell by more than threshold
+    regressions = []
+    for dataset, rows in results.items():
+        for key, row in rows.items():
+            base = baseline.get(dataset, {}).get(key)
+            if base is None:
+                continue
+            change = row["barsPerSecond"] / base["barsPerSecond"] - 1
+            if change < -threshold:
+                regressions.append((dataset, key, base["barsPerSecond"], row["barsPerSecond"], change))
+    return regressions
+
+
+def printResults(results, baseline=None):
+    for dataset, rows in results.items():
+        print(f"\n{dataset}")
+        width = max(len(key) for key in rows)
+        for key, row in rows.items():
+            line = f"  {key.ljust(width)}  {row['barsPerSecond']:>14,.0f} bars/s  ({row['bars']} bars, {row['seconds']:.3f}s)"
+            base = (baseline or {}).get(dataset, {}).get(key)
+            if base:
+                line += f"  {row['barsPerSecond'] / base['barsPerSecond'] - 1:+.1%}"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicator and end-to-end throughput benchmarks")
+    parser.add_argument("datasets", nargs="*", default=["EURUSD_D1.csv", "EURUSD_H4.csv"],
+                        help="CSV bar files or synthetic:N")
+    parser.add_argument("--stream-bars", type=int, default=DEFAULT_STREAM_BARS,
+                        help="bars timed by the per-bar (indicator, loop) benchmarks")
+    parser.add_argument("--repeat", type=int, default=1, help="keep the best of this many runs")
+    parser.add_argument("--synthetic-dir", default=SYNTHETIC_DIR)
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON written by an earlier --out")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as handle:
+            baseline = json.load(handle)["results"]
+    results = runBenchmarks(args.datasets, args.stream_bars, args.repeat, args.synthetic_dir)
+    printResults(results, baseline)
+    if args.out:
+        meta = {"time": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                "streamBars": args.stream_bars, "repeat": args.repeat}
+        with open(args.out, "w") as handle:
+            json.dump({"meta": meta, "results": results}, handle, indent=2)
+    if baseline is not None:
+        regressions = compareResults(results, baseline, args.threshold)
+        for dataset, key, before, after, change in regressions:
+            print(f"REGRESSION {dataset} {key}: {before:,.0f} -> {after:,.0f} bars/s ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,220 @@
+#  <checkpoint.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Snapshots of the streaming engine: the bar window (ring buffers), the
+# indicator objects of StreamingSignals (EMACalc, MACD, SMACrossOver, OBV,
+# CMF, VWAP, ParabolicSAR), the TradeLogic position and the ledger so far.
+# One .npz per snapshot: the arrays as they are, everything else as JSON
+# that keeps NumPy scalar types, so a float32 run resumes in float32.
+# Written to a temporary file, fsynced and renamed over the old snapshot, so
+# a crash leaves either the previous snapshot or the new one.
+#
+# run_backtest(checkpoint=...) snapshots every `every` bars and once more at
+# the end of the data (before the forced exit); resume=True continues from
+# the snapshot with the same trades as an uninterrupted run. The live runner
+# warm-starts from such a snapshot instead of replaying the history.
+#
+#   python backtest.py --quiet --checkpoint run.ckpt.npz --checkpoint-every 5000
+#   python backtest.py --quiet --checkpoint run.ckpt.npz --resume
+#   python checkpoint.py run.ckpt.npz
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+import numpy as np
+import ledger
+
+VERSION = 1
+DEFAULT_EVERY = 5000  # evaluated bars between snapshots
+RINGS = ("closes", "highs", "lows", "volumes")
+TRADER_FIELDS = ("bar", "barTime", "entryBar", "entryTime", "position", "entryPrice", "takeLoss", "takeProfit",
+                 "buyAfterReversal", "sellAfterReversal")
+
+
+def encode(value):
+    # JSON form of a state value; NumPy scalars and arrays keep their dtype
+    if isinstance(value, np.ndarray):
+        return {"dtype": value.dtype.str, "array": value.tolist()}
+    if isinstance(value, np.generic):
+        return {"dtype": value.dtype.str, "value": value.item()}
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    return value
+
+
+def decode(value):
+    if isinstance(value, dict):
+        if "array" in value:
+            return np.array(value["array"], dtype=value["dtype"])
+        return np.dtype(value["dtype"]).type(value["value"])
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    return value
+
+
+def objectState(obj):
+    return {slot: encode(getattr(obj, slot)) for slot in type(obj).__slots__ if hasattr(obj, slot)}
+
+
+def restoreObject(obj, state):
+    for slot, value in state.items():
+        setattr(obj, slot, decode(value))
+
+
+def indicatorObjects(streaming):
+    # The stateful indicator objects of a StreamingSignals (all of them use __slots__)
+    return {name: value for name, value in vars(streaming).items() if hasattr(type(value), "__slots__")}
+
+
+def configState(config, ignore=("quiet",)):
+    return {name: value for name, value in asdict(config).items() if name not in ignore}
+
+
+def checkConfig(meta, config, ignore=("quiet",)):
+    saved = {name: value for name, value in meta["config"].items() if name not in ignore}
+    current = configState(config, ignore)
+    differing = sorted(name for name in set(saved) | set(current) if saved.get(name) != current.get(name))
+    if differing:
+        raise ValueError(f"Snapshot was taken with other settings: {', '.join(differing)}")
+
+
+def engineState(window, streaming, trader):
+    # (meta, arrays) of a BarWindow, StreamingSignals and TradeLogic
+    arrays = {}
+    rings = {}
+    for name in RINGS:
+        ring = getattr(window, name)
+        arrays["ring." + name] = ring.buffer
+        rings[name] = {"size": ring.size, "pos": ring.pos, "count": ring.count}
+    trades = trader.ledger
+    for name, _ in ledger.COLUMNS:
+        arrays["ledger." + name] = getattr(trades, name)
+    arrays["logPnL"] = np.asarray(trader.logPnL, dtype=np.float64)
+    meta = {
+        "version": VERSION,
+        "rings": rings,
+        "indicators": {name: objectState(obj) for name, obj in indicatorObjects(streaming).items()},
+        "trader": {name: encode(getattr(trader, name)) for name in TRADER_FIELDS},
+    }
+    return meta, arrays
+
+
+def restoreEngine(meta, arrays, window, streaming, trader):
+    if meta.get("version") != VERSION:
+        raise ValueError(f"Snapshot version {meta.get('version')}, expected {VERSION}")
+    for name in RINGS:
+        ring = getattr(window, name)
+        saved = meta["rings"][name]
+        buffer = arrays["ring." + name]
+        if saved["size"] != ring.size or buffer.dtype != ring.buffer.dtype:
+            raise ValueError(f"Snapshot window is {saved['size']} bars of {buffer.dtype}, "
+                             f"the run uses {ring.size} of {ring.buffer.dtype}")
+        ring.buffer[:] = buffer
+        ring.pos, ring.count = saved["pos"], saved["count"]
+    window.refresh()
+    objects = indicatorObjects(streaming)
+    if set(objects) != set(meta["indicators"]):
+        raise ValueError("Snapshot indicators do not match the engine's")
+    for name, state in meta["indicators"].items():
+        restoreObject(objects[name], state)
+    for name, value in meta["trader"].items():
+        setattr(trader, name, decode(value))
+    size = len(arrays["logPnL"])
+    trades = ledger.TradeLedger(max(size, 64))
+    for name, _ in ledger.COLUMNS:
+        trades.arrays[name][:size] = arrays["ledger." + name]
+    trades.size = size
+    trader.ledger = trades
+    trader.logPnL = arrays["logPnL"].tolist()
+
+
+def save(path, meta, arrays):
+    # Atomic: write next to the target, fsync, rename over it
+    tmpFile = path + ".tmp"
+    try:
+        with open(tmpFile, "wb") as handle:
+            np.savez(handle, meta=np.array(json.dumps(meta)), **arrays)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmpFile, path)
+    finally:
+        if os.path.exists(tmpFile):
+            os.remove(tmpFile)
+    if hasattr(os, "O_DIRECTORY"):
+        directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def load(path):
+    with np.load(path, allow_pickle=False) as archive:
+        arrays = {name: archive[name] for name in archive.files if name != "meta"}
+        meta = json.loads(str(archive["meta"]))
+    return meta, arrays
+
+
+class Checkpointer:
+    # Snapshots a running engine to `path` every `every` evaluated bars
+    def __init__(self, path, every=DEFAULT_EVERY):
+        if every < 1:
+            raise ValueError("Snapshot interval must be at least one bar")
+        self.path = path
+        self.every = every
+
+    def due(self, bars):
+        return bars % self.every == 0
+
+    def save(self, window, streaming, trader, config, **extra):
+        meta, arrays = engineState(window, streaming, trader)
+        meta["config"] = configState(config)
+        meta.update(extra)
+        save(self.path, meta, arrays)
+
+
+def describe(path):
+    import backtest as bt  # imports this module, so not at the top
+    meta, arrays = load(path)
+    trader = {name: decode(value) for name, value in meta["trader"].items()}
+    logPnL = arrays["logPnL"]
+    lines = [f"{path}: {meta.get('kind', 'engine')} snapshot v{meta['version']}, "
+             f"{os.path.getsize(path):,} bytes",
+             f"  data {meta.get('data', '?')}, last bar row {meta.get('row', trader['bar'])} "
+             f"at {np.datetime64(int(trader['barTime']), 's')}, {meta.get('bars', '?')} bars evaluated",
+             f"  {len(logPnL)} closed trades, net PnL {float(logPnL.sum()) * bt.DEFAULT_LOT_UNITS:.2f} per lot"]
+    if trader["position"] is not None:
+        lines.append(f"  open {trader['position']} since row {trader['entryBar']} at {trader['entryPrice']:.5f} "
+                     f"(TP {trader['takeProfit']:.5f}, SL {trader['takeLoss']:.5f})")
+    else:
+        lines.append("  flat")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show what an engine snapshot holds")
+    parser.add_argument("snapshot", nargs="+")
+    args = parser.parse_args(argv)
+    for path in args.snapshot:
+        try:
+            print("\n".join(describe(path)))
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"{path}: {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
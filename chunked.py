@@ -0,0 +1,173 @@
+#  <chunked.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Chunked batch mode for bar files larger than RAM.
+# The bar store is read in blocks of N bars. Each block is prefixed with the
+# last (window - 1) bars of the previous one, enough lookback for the longest
+# indicator window (backtest.engineWindow), and
+# the recursive indicators (RSI/MACD EMAs, OBV, SAR, SMA crossings) carry their
+# state from block to block. Signals and trades are the same as one
+# vectorized pass over the whole file while only ~N bars of columns are alive.
+#
+#   python chunked.py EURUSD_H4.csv --chunk-bars 5000 --check
+import argparse
+import sys
+import time
+import numpy as np
+import backtest as bt
+import barstore
+import indicators
+import intrabar
+import timeindex
+import vectorized
+
+DEFAULT_CHUNK_BARS = 1 << 16
+ROW_COLUMNS = ("close", "atr", "liquidity", "score") + vectorized.SIGNAL_COLUMNS
+
+
+class ChunkedSignals:
+    # Feed consecutive blocks of bars; each feed returns the vectorized.computeSignals
+    # columns for the bars that became evaluable (None while still warming up),
+    # with "index" counted from the first bar ever fed
+    def __init__(self, overbought=bt.DEFAULT_RSI_OVERBOUGHT, oversold=bt.DEFAULT_RSI_OVERSOLD,
+                 window1=bt.DEFAULT_WINDOW, window2=bt.DEFAULT_FAST_WINDOW, dtype=np.float64, weights=None):
+        self.params = {"overbought": overbought, "oversold": oversold, "window1": window1, "window2": window2,
+                       "dtype": dtype, "weights": indicators.parseWeights(weights)}
+        self.dtype = dtype
+        self.window = bt.engineWindow(window1, window2)
+        self.state = {}
+        self.tail = None  # lookback bars kept from the previous block
+        self.offset = 0  # global index of tail[0]
+
+    def feed(self, close, high, low, volume):
+        block = [np.asarray(column, dtype=self.dtype) for column in (close, high, low, volume)]
+        if self.tail is not None:
+            block = [np.concatenate((old, new)) for old, new in zip(self.tail, block)]
+        if not self.state:
+            if len(block[0]) < self.window:
+                self.tail = block
+                return None
+            start = self.window - 1
+        else:
+            start = len(self.tail[0])
+        if len(block[0]) == start:
+            return None
+        signals = vectorized.computeSignals(*block, start=start, state=self.state, **self.params)
+        signals["index"] = signals["index"] + self.offset
+        keep = self.window - 1
+        self.offset += len(block[0]) - keep
+        self.tail = [column[-keep:].copy() for column in block]
+        return signals
+
+
+def iterChunks(bars, chunkBars=DEFAULT_CHUNK_BARS, first=0, last=None):
+    # (close, high, low, volume) slices of rows [first, last) of a BarStore's memory maps, chunkBars rows at a time
+    last = len(bars) if last is None else last
+    for blockStart in range(first, last, chunkBars):
+        blockEnd = min(blockStart + chunkBars, last)
+        yield (bars.close[blockStart:blockEnd], bars.high[blockStart:blockEnd],
+               bars.low[blockStart:blockEnd], bars.volume[blockStart:blockEnd])
+
+
+def iterRows(signals):
+    # Per-bar dicts in the StreamingSignals layout, as TradeLogic.onBar expects
+    columns = [signals[name].tolist() for name in ROW_COLUMNS]
+    for values in zip(*columns):
+        yield dict(zip(ROW_COLUMNS, values))
+
+
+def run_chunked(config=None, data=bt.DEFAULT_DATA_FILE, chunkBars=DEFAULT_CHUNK_BARS):
+    # Same contract as backtest.run_backtest, computed block by block
+    config = config or bt.Config()
+    log = (lambda *args: None) if config.quiet else print
+    started = time.perf_counter()
+    dtype = barstore.storeDtype(config.compact)
+    bars = barstore.loadBars(data, dtype)
+    engine = ChunkedSignals(overbought=config.overbought, oversold=config.oversold,
+                            window1=config.window1, window2=config.window2, dtype=dtype, weights=config.weights)
+    trader = bt.TradeLogic(config, log, intrabar.fromConfig(config, bars))
+    first, last = timeindex.rowRange(config, bars)
+    session = timeindex.TimeIndex(bars.time).sessionMask(config.session) if config.session else None
+    price = None
+    count = 0
+    for block in iterChunks(bars, chunkBars, first, last):
+        signals = engine.feed(*block)
+        if signals is None:
+            continue
+        index = signals["index"] + first
+        allowed = session[index].tolist() if session is not None else [True] * len(index)
+        for row, i, stamp, ok in zip(iterRows(signals), index.tolist(), bars.time[index].tolist(), allowed):
+            price = row["close"]
+            trader.onBar(price, row, ok, ok, index=i, timestamp=stamp)
+            count += 1
+    if price is not None:
+        trader.forceExit(price)
+    return bt.Result(logPnL=trader.logPnL, summary=bt.summarizeTrades(trader.logPnL), bars=count,
+                     elapsed=time.perf_counter() - started, ledger=trader.ledger)
+
+
+def checkChunked(data, chunkBars, **params):
+    # Compares chunked and single-pass columns; returns {column: mismatching rows}
+    whole = vectorized.computeSignals(*vectorized.loadCSV(data), **params)
+    parts = []
+    engine = ChunkedSignals(**params)
+    for block in iterChunks(barstore.loadBars(data), chunkBars):
+        signals = engine.feed(*block)
+        if signals is not None:
+            parts.append(signals)
+    mismatches = {}
+    for name in ("index",) + ROW_COLUMNS:
+        joined = np.concatenate([part[name] for part in parts]) if parts else np.empty(0)
+        if len(joined) != len(whole[name]):
+            mismatches[name] = np.array([])
+            continue
+        bad = np.flatnonzero(joined != whole[name])
+        if len(bad):
+            mismatches[name] = bad
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest a bar file in fixed-size chunks")
+    parser.add_argument("data", help="CSV bar file")
+    parser.add_argument("--chunk-bars", type=int, default=DEFAULT_CHUNK_BARS, help="bars per block")
+    parser.add_argument("--check", action="store_true",
+                        help="compare the chunked signal columns with a single vectorized pass")
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    if args.chunk_bars < 1:
+        parser.error("--chunk-bars must be positive")
+
+    if args.check:
+        params = {name: getattr(config, name) for name in ("overbought", "oversold", "window1", "window2", "weights")}
+        mismatches = checkChunked(args.data, args.chunk_bars, **params)
+        for name, rows in mismatches.items():
+            print(f"MISMATCH {name}: {len(rows)} rows, first {rows[:10]}")
+        if mismatches:
+            sys.exit(1)
+        print(f"Chunked signals ({args.chunk_bars} bars per block) match the single pass.")
+    result = run_chunked(config, args.data, args.chunk_bars)
+    bt.printSummary(result.summary)
+    print(f"{result.bars} bars in {result.elapsed:.2f}s")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
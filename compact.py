@@ -0,0 +1,148 @@
+#  <compact.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Compact mode (Config.compact, --compact): the float32 bar store with uint32
+# volumes, float32 indicator windows and float32 price series in the batch
+# engine. Trade bookkeeping (entry, TP/SL, PnL) stays float64.
+#
+# Error bound relative to the float64 run:
+#   prices    |p32 - p64| <= 2**-24 * |p64| (round to nearest; for EURUSD
+#             < 1e-7, well below the 1e-5 quote step), volumes exact
+#   ATR       relative error <= ATR_REL_BOUND
+#   RSI       absolute error <= RSI_ABS_BOUND (RSI points)
+#   signals   an indicator flips only where its float64 value is within the
+#             above of a classification band edge (ADX ties are the usual
+#             case); at most SCORE_FLIP_BOUND of the bars get another score
+# A flipped score can move an entry or exit, so trades are compared and
+# reported, not bounded.
+#
+#   python compact.py EURUSD_H4.csv EURUSD_D1.csv --pairs 50 --bars 3700000
+import argparse
+import sys
+from dataclasses import replace
+import numpy as np
+import backtest as bt
+import barstore
+import vectorized
+
+PRICE_REL_BOUND = 2.0 ** -24
+ATR_REL_BOUND = 1e-4
+RSI_ABS_BOUND = 1e-2
+SCORE_FLIP_BOUND = 0.005  # fraction of evaluated bars
+
+
+def storeBytesPerBar(compact):
+    price = np.dtype(barstore.storeDtype(compact))
+    return 8 + price.itemsize * (len(barstore.PRICE_COLUMNS) - 1) + barstore.volumeDtype(price).itemsize
+
+
+def precisionCheck(data, config=None):
+    # {name: (measured, bound)} for the bounded quantities, plus "trades" details
+    config = config or bt.Config(quiet=True)
+    params = {name: getattr(config, name) for name in ("overbought", "oversold", "window1", "window2", "weights")}
+    wide = [np.asarray(column) for column in vectorized.loadCSV(data)]
+    narrow = [np.asarray(column) for column in vectorized.loadCSV(data, compact=True)]
+    report = {}
+    report["price"] = (max(float(np.max(np.abs(small.astype(np.float64) - big) / np.abs(big)))
+                           for small, big in zip(narrow[:3], wide[:3])), PRICE_REL_BOUND)
+    report["volume"] = (float(np.max(np.abs(narrow[3].astype(np.float64) - wide[3]))), 0.0)
+
+    exact = vectorized.computeSignals(*wide, **params)
+    approx = vectorized.computeSignals(*narrow, dtype=np.float32, **params)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        atrError = np.abs(approx["atr"] - exact["atr"]) / exact["atr"]
+    report["atr"] = (float(np.nanmax(atrError)), ATR_REL_BOUND)
+    start = int(exact["index"][0])
+    rsiExact = vectorized.rsiValues(wide[0], start, config.window1)
+    rsiApprox = vectorized.rsiValues(narrow[0].astype(np.float32), start, config.window1)
+    report["rsi"] = (float(np.nanmax(np.abs(rsiApprox - rsiExact))), RSI_ABS_BOUND)
+    report["score"] = (float(np.mean(approx["score"] != exact["score"])), SCORE_FLIP_BOUND)
+    flips = {name: int(np.sum(approx[name] != exact[name])) for name in vectorized.SIGNAL_COLUMNS}
+
+    full = bt.run_backtest(replace(config, quiet=True, compact=False), data).ledger
+    small = bt.run_backtest(replace(config, quiet=True, compact=True), data).ledger
+    same = len(full) == len(small) and np.array_equal(full.entryIndex, small.entryIndex) \
+        and np.array_equal(full.exitIndex, small.exitIndex)
+    report["trades"] = {"float64": len(full), "compact": len(small), "sameBars": same,
+                        "netPnLDiff": float((small.pnl.sum() - full.pnl.sum()) * bt.DEFAULT_LOT_UNITS),
+                        "signalFlips": flips}
+    return report
+
+
+def memoryReport(data, pairs=None, barsPerPair=None):
+    # Bytes of the bar store, the batch-engine input columns and the streaming
+    # state, float64 against compact
+    bars = len(barstore.loadBars(data))
+    window = bt.engineWindow()
+    report = {"bars": bars}
+    for compact in (False, True):
+        name = "compact" if compact else "float64"
+        dtype = barstore.storeDtype(compact)
+        columns = vectorized.loadCSV(data, compact)
+        streaming = bt.BarWindow(window, dtype, barstore.volumeDtype(dtype))
+        report[name] = {
+            "storeBytesPerBar": storeBytesPerBar(compact),
+            "storeBytes": storeBytesPerBar(compact) * bars,
+            "batchInputBytes": sum(np.asarray(column, dtype=dtype).nbytes for column in columns),
+            "windowBytes": sum(ring.buffer.nbytes for ring in (streaming.closes, streaming.highs,
+                                                               streaming.lows, streaming.volumes)),
+        }
+        if pairs and barsPerPair:
+            report[name]["universeBytes"] = storeBytesPerBar(compact) * pairs * barsPerPair
+    return report
+
+
+def printReports(data, precision, memory):
+    print(f"\n=== {data}: float32 vs float64 ===")
+    failed = False
+    for name in ("price", "volume", "atr", "rsi", "score"):
+        measured, bound = precision[name]
+        ok = measured <= bound
+        failed |= not ok
+        print(f"{name:>7}: {measured:.3e} (bound {bound:.3e}) {'ok' if ok else 'EXCEEDED'}")
+    trades = precision["trades"]
+    flips = ", ".join(f"{name} {count}" for name, count in trades["signalFlips"].items() if count)
+    print(f" trades: {trades['float64']} float64, {trades['compact']} compact, "
+          f"{'same' if trades['sameBars'] else 'different'} entry/exit bars, "
+          f"net PnL {trades['netPnLDiff']:+.2f}; signal flips: {flips or 'none'}")
+    wide, narrow = memory["float64"], memory["compact"]
+    print(f"{memory['bars']} bars           float64      compact")
+    for key in ("storeBytesPerBar", "storeBytes", "batchInputBytes", "windowBytes", "universeBytes"):
+        if key in wide:
+            print(f"{key:>16}: {wide[key]:>12,} {narrow[key]:>12,}  ({narrow[key] / wide[key]:.0%})")
+    return not failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precision parity and memory report of the compact float32 mode")
+    parser.add_argument("data", nargs="+", help="CSV bar files")
+    parser.add_argument("--pairs", type=int, help="universe size for the projected store size")
+    parser.add_argument("--bars", type=int, help="bars per pair for the projected store size")
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    ok = True
+    for data in args.data:
+        ok &= printReports(data, precisionCheck(data, config), memoryReport(data, args.pairs, args.bars))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
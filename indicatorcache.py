@@ -0,0 +1,169 @@
+#  <indicatorcache.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Memoization of computed indicator arrays, keyed by
+# (dataset fingerprint, indicator name, parameters).
+# Arrays live in an in-memory LRU bounded by a byte budget. With a spill
+# directory every computed array is also written there as .npy, so later
+# processes and re-runs load it instead of recomputing. Spill files are
+# written under a temporary name unique to the writer and renamed into place,
+# so sweep workers computing the same column at once never see a partial file.
+#
+#   python indicatorcache.py EURUSD_H4.csv --workers 8   # multi-worker sweep on an empty spill dir
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def datasetFingerprint(*arrays):
+    digest = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        digest.update(str((arr.dtype.str, arr.shape)).encode())
+        digest.update(arr.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    def __init__(self, maxBytes=DEFAULT_CACHE_BYTES, spillDir=None):
+        self.maxBytes = maxBytes
+        self.spillDir = spillDir
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        if spillDir:
+            os.makedirs(spillDir, exist_ok=True)
+
+    def key(self, fingerprint, name, params):
+        return (fingerprint, name, tuple(sorted(params.items())))
+
+    def spillPath(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.spillDir, f"{key[1]}-{name}.npy")
+
+    def get(self, key):
+        arr = self.entries.get(key)
+        if arr is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return arr
+        if self.spillDir:
+            path = self.spillPath(key)
+            if os.path.exists(path):
+                try:
+                    arr = np.load(path)
+                except (OSError, ValueError):
+                    return None  # unreadable spill file, recompute and overwrite it
+                self.diskHits += 1
+                self.remember(key, arr)
+                return arr
+        return None
+
+    def put(self, key, arr):
+        arr = np.asarray(arr)
+        if self.spillDir:
+            self.spill(self.spillPath(key), arr)
+        self.remember(key, arr)
+        return arr
+
+    def spill(self, path, arr):
+        handle, tmpPath = tempfile.mkstemp(dir=self.spillDir, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as out:
+                np.save(out, arr)
+            os.replace(tmpPath, path)
+        except OSError:
+            # Another process put the same column there first; its file is as good as ours
+            if not os.path.exists(path):
+                raise
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    def remember(self, key, arr):
+        # Cached arrays are shared between callers, so hand out read-only views
+        arr = arr.view()
+        arr.flags.writeable = False
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key).nbytes
+        if arr.nbytes > self.maxBytes:
+            return
+        self.entries[key] = arr
+        self.bytes += arr.nbytes
+        while self.bytes > self.maxBytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def getOrCompute(self, fingerprint, name, params, compute):
+        key = self.key(fingerprint, name, params)
+        arr = self.get(key)
+        if arr is None:
+            self.misses += 1
+            arr = self.put(key, compute())
+            arr = self.entries.get(key, arr)
+        return arr
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                "diskHits": self.diskHits, "misses": self.misses}
+
+
+def main(argv=None):
+    import sweep  # imports this module, so not at the top
+    parser = argparse.ArgumentParser(description="Check the spill directory under concurrent sweep workers")
+    parser.add_argument("data", help="CSV bar file")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cache-dir", help="directory to hold the check's own empty spill directory "
+                                            "(default: the system temporary directory)")
+    args = parser.parse_args(argv)
+    # Every task shares ATR, OBV, CMF, VWAP and SAR, so the workers race to spill them
+    grid = sweep.parseGrid(["window1=10,11,12,13,14,15,16,17", "window2=3,4,5,6"])
+    configs = list(sweep.gridConfigs(grid))
+    # A fresh directory of the check's own; only it is removed afterwards
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+    cacheDir = tempfile.mkdtemp(prefix="indicatorcache-check-", dir=args.cache_dir)
+    try:
+        key = lambda row: tuple(row[name] for name in grid)
+        reference = sorted(sweep.runSweep(args.data, configs, workers=1), key=key)
+        cold = sorted(sweep.runSweep(args.data, configs, args.workers, cacheDir), key=key)
+        spilled = len([name for name in os.listdir(cacheDir) if name.endswith(".npy")])
+        leftover = [name for name in os.listdir(cacheDir) if not name.endswith(".npy")]
+        warm = sorted(sweep.runSweep(args.data, configs, args.workers, cacheDir), key=key)
+    finally:
+        shutil.rmtree(cacheDir, ignore_errors=True)
+    print(f"{len(configs)} configs, {args.workers} workers, {spilled} spilled arrays, {len(leftover)} stray files")
+    if cold != reference or warm != reference or leftover:
+        print("MISMATCH: spilled cache results differ from the uncached sweep.")
+        sys.exit(1)
+    print("Cold and warm spill-dir sweeps match the uncached sweep.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
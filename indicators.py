@@ -0,0 +1,281 @@
+#  <indicators.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Indicator registry, score weights and the planner of the batch engine.
+#
+# Every scored indicator is registered here with its score group, default
+# weight and lookback, the bars of history it reads. The engines keep the
+# longest lookback of all registered indicators, whatever the weights, so
+# the warm-up and the liquidity mean do not move when a weight is zeroed.
+# score = sum(weight * signal) / sum(weight), summed group by group in the
+# order of the original volume/momentum/trend score, so the default weights
+# (1 for the nine original signals, 0 for the rest) give exactly the old
+# (volume + momentum + trend) / 9.
+#
+# The batch engine (vectorized.py) registers one Node per column and per
+# shared intermediate (true range, rolling means, EMAs, highest high, ...).
+# A node names the nodes it reads and their parameters; plan() resolves the
+# nodes the active indicators need into a topologically ordered list in which
+# every (node, parameters) pair appears once, so e.g. the mean true range is
+# computed once for ATR and ADX when their periods agree and Williams %R and
+# the stochastic read the same rolling high/low. Indicators whose weight is
+# zero are not planned unless the trade rules read them (TRADE_INPUTS).
+#
+# The streaming loop (backtest.StreamingSignals) evaluates the same active
+# set per bar; an indicator registered with a streaming factory plugs into it
+# as well.
+#
+#   python indicators.py --weights "adx=0;bollinger=1"   # print the plan
+import argparse
+import sys
+
+# Summation order of the score; the groups of the original score come first
+SCORE_GROUPS = ("volume", "momentum", "trend")
+# Read by the trade rules (entry filters), so always evaluated
+TRADE_INPUTS = ("rsi", "williamR")
+
+
+class Indicator:
+    __slots__ = ("name", "group", "weight", "lookback", "streaming")
+
+    def __init__(self, name, group, weight, lookback, streaming):
+        self.name = name
+        self.group = group
+        self.weight = weight
+        # Bars of history the indicator reads, an int or fn(periods) -> int
+        self.lookback = lookback
+        # fn(StreamingSignals) -> fn(cache) -> signal, for indicators the
+        # streaming loop does not implement itself
+        self.streaming = streaming
+
+    def bars(self, periods):
+        return self.lookback(periods) if callable(self.lookback) else self.lookback
+
+
+INDICATORS = {}
+
+
+def register(name, group, weight=0.0, lookback=1, streaming=None):
+    # lookback(periods) gets window1, window2 and the fixed periods of
+    # backtest.indicatorPeriods (see engineWindow)
+    if group not in SCORE_GROUPS:
+        raise ValueError(f"Unknown score group '{group}', expected one of {', '.join(SCORE_GROUPS)}")
+    INDICATORS[name] = Indicator(name, group, float(weight), lookback, streaming)
+    return INDICATORS[name]
+
+
+register("vwap", "volume", 1, lookback=lambda p: p["vwap"])
+register("cmf", "volume", 1, lookback=lambda p: p["cmf"])
+register("obv", "volume", 1, lookback=2)
+register("rsi", "momentum", 1, lookback=lambda p: p["window1"])
+register("macd", "momentum", 1, lookback=lambda p: max(p["window1"], p["window2"], p["macdFast"], p["macdSlow"]))
+register("williamR", "momentum", 1, lookback=lambda p: p["window1"])
+register("stochastic", "momentum", 0, lookback=lambda p: p["window1"] + p["stochasticD"] - 1)
+register("sma", "trend", 1, lookback=lambda p: max(p["window1"], p["window2"]))
+register("adx", "trend", 1, lookback=lambda p: p["window1"] + 1)
+register("sar", "trend", 1, lookback=2)
+register("bollinger", "trend", 0, lookback=lambda p: p["bollinger"])
+
+
+def parseWeights(spec=None):
+    # Weights of every registered indicator from "name=w;name=w" (or "," as
+    # separator, or a dict); unnamed indicators keep their default weight
+    weights = {name: indicator.weight for name, indicator in INDICATORS.items()}
+    if not spec:
+        return weights
+    if isinstance(spec, dict):
+        items = spec.items()
+    else:
+        items = []
+        for part in spec.replace(";", ",").split(","):
+            name, sep, value = part.partition("=")
+            if not part.strip():
+                continue
+            if not sep:
+                raise ValueError(f"Weight '{part}' is not name=value")
+            items.append((name.strip(), value))
+    for name, value in items:
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}', expected one of {', '.join(INDICATORS)}")
+        try:
+            weights[name] = float(value)
+        except ValueError:
+            raise ValueError(f"Weight of {name} is not a number: '{value}'")
+    if not sum(weights.values()):
+        raise ValueError("Weights must not sum to zero")
+    return weights
+
+
+def active(weights):
+    # Indicators to evaluate, in registry order
+    return [name for name in INDICATORS if weights[name] != 0 or name in TRADE_INPUTS]
+
+
+def engineWindow(periods, minimum=1):
+    # Bars the engine keeps: the longest lookback of every registered
+    # indicator, at least `minimum` (the inputs every bar reads, e.g. ATR)
+    return max([minimum] + [indicator.bars(periods) for indicator in INDICATORS.values()])
+
+
+def score(signals, weights):
+    # Works on scalars (streaming loop) and on columns (batch engine)
+    total = None
+    for group in SCORE_GROUPS:
+        groupSum = None
+        for name, indicator in INDICATORS.items():
+            weight = weights[name]
+            if indicator.group != group or weight == 0:
+                continue
+            term = signals[name] if weight == 1 else weight * signals[name]
+            groupSum = term if groupSum is None else groupSum + term
+        if groupSum is not None:
+            total = groupSum if total is None else total + groupSum
+    return total / sum(weights.values())
+
+
+class Node:
+    # One column or intermediate of the batch engine. inputs are
+    # (node name, fn(settings, params) -> params of that input, or None when
+    # not needed); params(settings) gives the parameters of a top-level column.
+    # compute(context, params, *input values) returns the array. memo: the
+    # value goes through the IndicatorCache; stateful: compute reads/writes
+    # context.state(...).
+    __slots__ = ("name", "compute", "inputs", "params", "memo", "stateful")
+
+    def __init__(self, name, compute, inputs=(), params=lambda settings: {}, memo=False, stateful=False):
+        self.name = name
+        self.compute = compute
+        self.inputs = inputs
+        self.params = params
+        self.memo = memo
+        self.stateful = stateful
+
+
+NODES = {}
+
+
+def node(name, inputs=(), params=lambda settings: {}, memo=False, stateful=False):
+    # Decorator registering a compute function as a batch node
+    def wrap(compute):
+        NODES[name] = Node(name, compute, tuple(inputs), params, memo, stateful)
+        return compute
+    return wrap
+
+
+def nodeKey(name, params):
+    return (name, tuple(sorted(params.items())))
+
+
+class Plan:
+    def __init__(self, steps, outputs):
+        self.steps = steps  # key -> (node, params, input keys), inputs before their consumers
+        self.outputs = outputs  # column name -> key
+
+    def consumers(self):
+        counts = dict.fromkeys(self.steps, 0)
+        for _, _, inputKeys in self.steps.values():
+            for inputKey in inputKeys:
+                if inputKey is not None:
+                    counts[inputKey] += 1
+        return counts
+
+    def evaluate(self, context, column=None):
+        # {column name: array}. column(name, params, compute) wraps memoized
+        # nodes; inputs are computed on demand, so a memo hit skips them.
+        values = {}
+
+        def value(key):
+            if key is None:
+                return None
+            if key not in values:
+                node, params, inputKeys = self.steps[key]
+                compute = lambda: node.compute(context, params, *[value(inputKey) for inputKey in inputKeys])
+                values[key] = column(node.name, params, compute) if node.memo and column is not None else compute()
+            return values[key]
+
+        return {name: value(key) for name, key in self.outputs.items()}
+
+    def describe(self):
+        counts = self.consumers()
+        lines = []
+        for key, (node, params, _) in self.steps.items():
+            label = ", ".join(f"{name}={value}" for name, value in params.items() if name != "start")
+            shared = f"  shared by {counts[key]}" if counts[key] > 1 else ""
+            lines.append(f"{node.name}({label}){shared}")
+        return lines
+
+
+def plan(columns, settings):
+    # Plan for the named columns; settings are the engine parameters
+    # (overbought, oversold, window1, window2, window, start)
+    steps = {}
+
+    def visit(name, params):
+        if params is None:
+            return None
+        key = nodeKey(name, params)
+        if key not in steps:
+            target = NODES[name]
+            inputKeys = [visit(inputName, paramsOf(settings, params)) for inputName, paramsOf in target.inputs]
+            steps[key] = (target, params, inputKeys)
+        return key
+
+    outputs = {name: visit(name, NODES[name].params(settings)) for name in columns}
+    return Plan(steps, outputs)
+
+
+class Context:
+    # Inputs of one evaluation: bar columns, the first evaluated row and the
+    # per-node state carried between chunks (chunked.ChunkedSignals)
+    def __init__(self, close, high, low, volume, start, window, carried):
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.start = start
+        self.window = window
+        self.carried = carried
+
+    def state(self, name, params=None):
+        # Keyed without "start", which moves from block to block
+        items = sorted(item for item in (params or {}).items() if item[0] != "start")
+        return self.carried.setdefault(name + repr(items) if items else name, {})
+
+
+def main(argv=None):
+    import backtest as bt
+    import vectorized  # registers the batch nodes
+    parser = argparse.ArgumentParser(description="Show the batch computation plan for a set of weights")
+    parser.add_argument("--weights", default="", help="name=w;name=w, e.g. 'adx=0;bollinger=1'")
+    parser.add_argument("--window1", type=int, default=bt.DEFAULT_WINDOW)
+    parser.add_argument("--window2", type=int, default=bt.DEFAULT_FAST_WINDOW)
+    args = parser.parse_args(argv)
+    try:
+        weights = parseWeights(args.weights)
+    except ValueError as e:
+        parser.error(str(e))
+    size = bt.engineWindow(args.window1, args.window2)
+    settings = vectorized.signalSettings(bt.DEFAULT_RSI_OVERBOUGHT, bt.DEFAULT_RSI_OVERSOLD,
+                                         args.window1, args.window2, size, size - 1)
+    print("weights: " + ", ".join(f"{name} {weight:g}" for name, weight in weights.items()))
+    print(f"window: {size} bars")
+    for line in plan(vectorized.planColumns(weights), settings).describe():
+        print("  " + line)
+
+
+if __name__ == "__main__":
+    import indicators  # the registry vectorized fills, not this __main__ copy
+    indicators.main(sys.argv[1:])
@@ -0,0 +1,119 @@
+#  <intrabar.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Intrabar take-profit / stop-loss fills. Instead of comparing the close with
+# the levels, each bar after the entry bar is checked with its high and low:
+# a touched level fills at the level, or at the open when the bar gapped
+# through it. When one bar touches both levels the order is unknown and
+# BOTH_TOUCHED_RULES decide:
+#   stop    the stop loss was hit first (pessimistic)
+#   target  the take profit was hit first
+#   open    whichever level is nearer the bar's open was hit first
+#   refine  replay the bar with a lower-timeframe file, found through a
+#           searchsorted lookup on its time column; "stop" when that is
+#           still ambiguous or the lower timeframe has no bars there
+import numpy as np
+import barstore
+
+FILL_MODES = ("close", "intrabar")
+BOTH_TOUCHED_RULES = ("stop", "target", "open", "refine")
+
+
+class LowerTimeframe:
+    def __init__(self, data):
+        self.bars = barstore.loadBars(data)
+        self.times = self.bars.time  # sorted open times, the lookup index
+
+    def span(self, start, end):
+        # Rows of the lower-timeframe bars opening in [start, end)
+        lo, hi = np.searchsorted(self.times, (start, end))
+        return int(lo), int(hi)
+
+    def firstTouch(self, start, end, position, takeProfit, takeLoss):
+        # True / False if the take profit / stop loss is touched first, None when unresolved
+        lo, hi = self.span(start, end)
+        if lo == hi:
+            return None
+        high = np.asarray(self.bars.high[lo:hi])
+        low = np.asarray(self.bars.low[lo:hi])
+        if position == "buy":
+            tpHits, slHits = high >= takeProfit, low <= takeLoss
+        else:
+            tpHits, slHits = low <= takeProfit, high >= takeLoss
+        firstTP = int(np.argmax(tpHits)) if tpHits.any() else hi
+        firstSL = int(np.argmax(slHits)) if slHits.any() else hi
+        if firstTP == firstSL:
+            return None
+        return firstTP < firstSL
+
+
+class IntrabarFills:
+    def __init__(self, bars, bothTouched="stop", refineData=None):
+        if bothTouched not in BOTH_TOUCHED_RULES:
+            raise ValueError(f"Unknown both-touched rule '{bothTouched}', expected one of {', '.join(BOTH_TOUCHED_RULES)}")
+        if bothTouched == "refine" and not refineData:
+            raise ValueError("The 'refine' rule needs a lower-timeframe file (refineData)")
+        self.bars = bars
+        self.bothTouched = bothTouched
+        self.lower = LowerTimeframe(refineData) if bothTouched == "refine" else None
+        self.barSeconds = barstore.inferBarSeconds(bars.time)
+        self.refined = 0  # bars resolved through the lower timeframe
+
+    def check(self, position, takeProfit, takeLoss, row):
+        # (fill price, reason) if a level was touched on bar `row`, else None
+        bars = self.bars
+        open_, high, low = float(bars.open[row]), float(bars.high[row]), float(bars.low[row])
+        if position == "buy":
+            tpHit, slHit = high >= takeProfit, low <= takeLoss
+            tpPrice, slPrice = max(takeProfit, open_), min(takeLoss, open_)
+            gapTP, gapSL = open_ >= takeProfit, open_ <= takeLoss
+        else:
+            tpHit, slHit = low <= takeProfit, high >= takeLoss
+            tpPrice, slPrice = min(takeProfit, open_), max(takeLoss, open_)
+            gapTP, gapSL = open_ <= takeProfit, open_ >= takeLoss
+        if not (tpHit or slHit):
+            return None
+        if tpHit and slHit:
+            if gapTP or gapSL:
+                targetFirst = gapTP
+            else:
+                targetFirst = self.resolve(position, takeProfit, takeLoss, row, open_)
+        else:
+            targetFirst = tpHit
+        return (float(tpPrice), "take profit") if targetFirst else (float(slPrice), "stop loss")
+
+    def resolve(self, position, takeProfit, takeLoss, row, open_):
+        rule = self.bothTouched
+        if rule == "target":
+            return True
+        if rule == "open":
+            return abs(open_ - takeProfit) < abs(open_ - takeLoss)
+        if rule == "refine":
+            start = int(self.bars.time[row])
+            targetFirst = self.lower.firstTouch(start, start + self.barSeconds, position, takeProfit, takeLoss)
+            if targetFirst is not None:
+                self.refined += 1
+                return targetFirst
+        return False
+
+
+def fromConfig(config, bars):
+    # The fill engine for a run, or None for the original close-only checks
+    if config.fillMode not in FILL_MODES:
+        raise ValueError(f"Unknown fill mode '{config.fillMode}', expected one of {', '.join(FILL_MODES)}")
+    if config.fillMode == "close":
+        return None
+    return IntrabarFills(bars, config.bothTouched, config.refineData or None)
@@ -0,0 +1,180 @@
+#  <kernels.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Sequential kernels for the path-dependent parts of the batch engine: the
+# Parabolic SAR recursion and the entry/exit state machine. They are plain
+# loops over arrays with scalar state, compiled with numba when it is
+# installed. Without numba the same functions run as Python over lists (see
+# inputs()), which is faster than indexing NumPy arrays element by element.
+# Both paths do the same float operations in the same order, so results are
+# identical. Set FX_NO_JIT=1 to force the Python path.
+import os
+import numpy as np
+
+try:
+    if os.environ.get("FX_NO_JIT"):
+        raise ImportError("FX_NO_JIT set")
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+EXIT_TP = 0  # same codes as ledger.EXIT_*
+EXIT_SL = 1
+EXIT_SIGNAL = 2
+EXIT_FORCED = 3
+
+
+def inputs(*arrays):
+    # Arrays for the compiled kernels, lists for the interpreted fallback
+    if HAVE_NUMBA:
+        return tuple(np.ascontiguousarray(arr) for arr in arrays)
+    return tuple(np.asarray(arr).tolist() for arr in arrays)
+
+
+def outputs(n, *dtypes):
+    if HAVE_NUMBA:
+        return tuple(np.zeros(n, dtype=dtype) for dtype in dtypes)
+    return tuple([0] * n for _ in dtypes)
+
+
+@njit(cache=True)
+def sarKernel(high, low, start, first, afStep, afMax, trend, ep, sar, af, out):
+    # Bars first..end of the SAR recursion; out[t - start] gets +1 / -1.
+    # Returns the state (trend, ep, sar, af) after the last bar.
+    for t in range(first, len(high)):
+        barHigh = high[t]
+        barLow = low[t]
+        sar = sar + af * (ep - sar)
+        if trend == 1:
+            sar = min(sar, low[t - 1], barLow)
+            if barLow < sar:
+                trend, sar, ep, af = -1, ep, barLow, afStep
+                out[t - start] = -1
+            else:
+                if barHigh > ep:
+                    ep = barHigh
+                    af = min(af + afStep, afMax)
+                out[t - start] = 1
+        else:
+            sar = max(sar, high[t - 1], barHigh)
+            if barHigh > sar:
+                trend, sar, ep, af = 1, ep, barHigh, afStep
+                out[t - start] = 1
+            else:
+                if barLow < ep:
+                    ep = barLow
+                    af = min(af + afStep, afMax)
+                out[t - start] = -1
+    return trend, ep, sar, af
+
+
+@njit(cache=True)
+def _record(count, entry, exit, side, entryPrice, exitPrice, pnl, reason,
+            entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons):
+    entryRows[count] = entry
+    exitRows[count] = exit
+    sides[count] = side
+    entryPrices[count] = entryPrice
+    exitPrices[count] = exitPrice
+    pnls[count] = pnl
+    reasons[count] = reason
+    return count + 1
+
+
+@njit(cache=True)
+def tradeKernel(close, score, atr, liquid, rsi, william, scoreThreshold, minATR, maxATR, priceReversal,
+                entryAdjustment, commission, tpMultiplier, slMultiplier,
+                entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons):
+    # Entry/exit state machine of TradeLogic.onBar over precomputed columns.
+    # Closed trades are written to the output columns (at most len(close) + 1);
+    # returns how many. Position and side are +1 buy, -1 sell, 0 flat.
+    count = 0
+    position = 0
+    entry = 0
+    entryPrice = 0.0
+    takeProfit = 0.0
+    takeLoss = 0.0
+    buyArmed = False
+    buyPrice = 0.0
+    sellArmed = False
+    sellPrice = 0.0
+    price = 0.0
+    for i in range(len(close)):
+        price = close[i]
+        s = score[i]
+        a = atr[i]
+        atrOk = a > minATR and a < maxATR
+        if s >= scoreThreshold and position == 0 and atrOk and liquid[i] and (rsi[i] >= scoreThreshold or william[i] >= scoreThreshold) and not buyArmed:
+            buyArmed = True
+            buyPrice = price
+        if buyArmed and price < (buyPrice - priceReversal) and s >= scoreThreshold:
+            entryPrice = price + entryAdjustment
+            position = 1
+            entry = i
+            takeLoss = entryPrice - (a * slMultiplier)
+            takeProfit = entryPrice + (a * tpMultiplier)
+            buyArmed = False
+        elif s < scoreThreshold:
+            buyArmed = False
+        if s <= -scoreThreshold and position == 0 and atrOk and liquid[i] and (rsi[i] <= -scoreThreshold or william[i] <= -scoreThreshold) and not sellArmed:
+            sellArmed = True
+            sellPrice = price
+        if sellArmed and price > (sellPrice + priceReversal) and s <= -scoreThreshold:
+            entryPrice = price - entryAdjustment
+            position = -1
+            entry = i
+            takeProfit = entryPrice - (a * tpMultiplier)
+            takeLoss = entryPrice + (a * slMultiplier)
+            sellArmed = False
+        elif s > -scoreThreshold:
+            sellArmed = False
+        if position == 1 and (price >= takeProfit or price <= takeLoss):
+            count = _record(count, entry, i, 1, entryPrice, price, price - entryPrice - commission,
+                            EXIT_TP if price >= takeProfit else EXIT_SL,
+                            entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+            position = 0
+        if position == -1 and (price <= takeProfit or price >= takeLoss):
+            count = _record(count, entry, i, -1, entryPrice, price, entryPrice - price - commission,
+                            EXIT_TP if price <= takeProfit else EXIT_SL,
+                            entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+            position = 0
+        if s <= -scoreThreshold:
+            buyArmed = False
+            if position == 1:
+                count = _record(count, entry, i, 1, entryPrice, price, price - entryPrice - commission, EXIT_SIGNAL,
+                                entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+                position = 0
+        if s >= scoreThreshold:
+            sellArmed = False
+            if position == -1:
+                count = _record(count, entry, i, -1, entryPrice, price, entryPrice - price - commission, EXIT_SIGNAL,
+                                entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+                position = 0
+    # Forced exit on the last bar carries no commission, as in the streaming loop
+    last = len(close) - 1
+    if position == 1:
+        count = _record(count, entry, last, 1, entryPrice, price, price - entryPrice, EXIT_FORCED,
+                        entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+    elif position == -1:
+        count = _record(count, entry, last, -1, entryPrice, price, entryPrice - price, EXIT_FORCED,
+                        entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons)
+    return count
@@ -0,0 +1,99 @@
+#  <ledger.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Struct-of-arrays trade ledger. Every field is its own preallocated NumPy
+# column that doubles when full, so recording a trade is a handful of scalar
+# stores and analytics.py reads whole columns without building objects.
+import numpy as np
+
+BUY = 1
+SELL = -1
+EXIT_TP = 0
+EXIT_SL = 1
+EXIT_SIGNAL = 2
+EXIT_FORCED = 3
+EXIT_REASONS = ("take profit", "stop loss", "signal exit", "forced exit")
+SIDES = {BUY: "buy", SELL: "sell"}
+
+COLUMNS = (
+    ("entryIndex", np.int64),  # bar row of the entry
+    ("exitIndex", np.int64),
+    ("entryTime", np.int64),  # epoch seconds, 0 when unknown
+    ("exitTime", np.int64),
+    ("side", np.int8),  # BUY / SELL
+    ("entryPrice", np.float64),
+    ("exitPrice", np.float64),
+    ("pnl", np.float64),  # price units, commission included
+    ("reason", np.int8),  # EXIT_*
+)
+
+
+class TradeLedger:
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.capacity = max(capacity, 1)
+        self.arrays = {name: np.zeros(self.capacity, dtype=dtype) for name, dtype in COLUMNS}
+
+    def __len__(self):
+        return self.size
+
+    def __getattr__(self, name):
+        # ledger.pnl, ledger.side, ... are views of the filled rows
+        arrays = self.__dict__.get("arrays")
+        if arrays is None or name not in arrays:
+            raise AttributeError(name)
+        return arrays[name][:self.size]
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, arr in self.arrays.items():
+            grown = np.zeros(self.capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.arrays[name] = grown
+
+    def record(self, side, entryIndex, exitIndex, entryPrice, exitPrice, pnl, reason, entryTime=0, exitTime=0):
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        arrays = self.arrays
+        arrays["entryIndex"][row] = entryIndex
+        arrays["exitIndex"][row] = exitIndex
+        arrays["entryTime"][row] = entryTime
+        arrays["exitTime"][row] = exitTime
+        arrays["side"][row] = side
+        arrays["entryPrice"][row] = entryPrice
+        arrays["exitPrice"][row] = exitPrice
+        arrays["pnl"][row] = pnl
+        arrays["reason"][row] = reason
+        self.size += 1
+
+    @property
+    def barsHeld(self):
+        return self.exitIndex - self.entryIndex
+
+    def columns(self):
+        return {name: getattr(self, name) for name, _ in COLUMNS}
+
+    def rows(self):
+        # One readable dict per trade, for JSON output and printing
+        out = []
+        for values in zip(*(getattr(self, name).tolist() for name, _ in COLUMNS)):
+            row = dict(zip((name for name, _ in COLUMNS), values))
+            row["side"] = SIDES[row["side"]]
+            row["reason"] = EXIT_REASONS[row["reason"]]
+            row["barsHeld"] = row["exitIndex"] - row["entryIndex"]
+            out.append(row)
+        return out
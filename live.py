@@ -0,0 +1,324 @@
+#  <live.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Live / paper runner. Bars arrive from an async source (a replayed bar file,
+# a CSV file being appended to, or CSV lines over a TCP socket), go into a
+# BarWindow and through the same StreamingSignals and TradeLogic as
+# run_backtest, so a replay of a file gives the backtest's trades bar for bar.
+# Entries and exits come out as OrderIntent records for a broker adapter;
+# the time from receiving a bar to its decision is measured per bar.
+# --warm-start loads a checkpoint.py snapshot (e.g. the end state of a
+# backtest with --checkpoint) instead of replaying the history; feed bars up
+# to the snapshot's last bar are skipped. --incremental evaluates the bars
+# with incremental.SignalSet (constant work per bar) in place of the window
+# and StreamingSignals; it has no snapshots yet.
+#
+#   python live.py --replay EURUSD_H4.csv --quiet
+#   python live.py --tail feed.csv --idle-timeout 60
+#   python live.py --connect 127.0.0.1:9000
+#   python live.py --replay EURUSD_H4.csv --incremental --quiet
+import argparse
+import asyncio
+import inspect
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import numpy as np
+import backtest as bt
+import barstore
+import checkpoint
+import incremental
+import ledger
+import timeindex
+
+DEFAULT_POLL = 0.5  # seconds between checks of a tailed file
+# Config fields a warm start may differ in: they select history, not strategy
+WARM_START_IGNORED = ("quiet", "dateFrom", "dateTo", "start")
+
+
+@dataclass
+class OrderIntent:
+    time: int  # bar open time, epoch seconds
+    bar: int  # bar number since the feed started
+    action: str  # "open" or "close"
+    side: str  # "buy" or "sell"
+    price: float
+    reason: str = ""
+
+    def __str__(self):
+        stamp = datetime.fromtimestamp(self.time, timezone.utc).strftime("%Y-%m-%d %H:%M")
+        reason = f" ({self.reason})" if self.reason else ""
+        return f"{stamp} {self.action.upper()} {self.side} @ {self.price:.5f}{reason}"
+
+
+async def replaySource(data, delay=0.0):
+    # Bars of a bar file in order, `delay` seconds apart (0 still yields to the loop)
+    bars = barstore.loadBars(data)
+    for i in range(len(bars)):
+        yield bars.bar(i)
+        await asyncio.sleep(delay)
+
+
+async def tailSource(path, poll=DEFAULT_POLL, idleTimeout=None):
+    # Bars of a CSV file, then of the lines appended to it, like tail -f.
+    # Ends after idleTimeout seconds without a new line (None: never).
+    pending = ""
+    idle = 0.0
+    with open(path, "r") as handle:
+        while True:
+            chunk = handle.readline()
+            if not chunk:
+                if idleTimeout is not None and idle >= idleTimeout:
+                    return
+                await asyncio.sleep(poll)
+                idle += poll
+                continue
+            idle = 0.0
+            pending += chunk
+            if not pending.endswith("\n"):
+                continue  # the writer is still in the middle of this line
+            bar = barstore.parseBar(pending)
+            pending = ""
+            if bar is not None:
+                yield bar
+
+
+async def socketSource(host, port):
+    # Bars sent as CSV lines over TCP, until the other side closes the connection
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            bar = barstore.parseBar(line.decode())
+            if bar is not None:
+                yield bar
+    finally:
+        writer.close()
+
+
+def latencyStats(latencies):
+    # Per-bar decision latency in microseconds
+    if not latencies:
+        return {"bars": 0}
+    us = np.asarray(latencies, dtype=np.float64) / 1e3
+    return {"bars": len(us), "mean": float(us.mean()), "p50": float(np.percentile(us, 50)),
+            "p99": float(np.percentile(us, 99)), "max": float(us.max())}
+
+
+def checkIncremental(config, checkpointPath=None):
+    # What SignalSet does not cover yet
+    if config.compact:
+        raise ValueError("The incremental indicators compute in float64; drop --compact")
+    if checkpointPath is not None:
+        raise ValueError("The incremental indicators cannot be snapshotted; drop --checkpoint")
+
+
+class LiveRunner:
+    # One instrument fed bar by bar. onBar is synchronous and returns the bar's
+    # intents; run() drives it from an async source and hands every intent to
+    # onIntent (a function or a coroutine function). With checkpointPath the
+    # engine is snapshotted every checkpointEvery evaluated bars and when the
+    # feed ends. With incrementalSignals the bars are evaluated by
+    # incremental.SignalSet instead.
+    def __init__(self, config=None, onIntent=None, checkpointPath=None, checkpointEvery=checkpoint.DEFAULT_EVERY,
+                 incrementalSignals=False):
+        self.config = config = config or bt.Config()
+        if config.fillMode != "close":
+            raise ValueError("The live runner decides on bar closes; intrabar fills need the whole bar file")
+        log = (lambda *args: None) if config.quiet else print
+        self.window = self.streaming = self.signalSet = None
+        if incrementalSignals:
+            checkIncremental(config, checkpointPath)
+            self.signalSet = incremental.SignalSet(overbought=config.overbought, oversold=config.oversold,
+                                                   window1=config.window1, window2=config.window2,
+                                                   weights=config.weights)
+        else:
+            dtype = barstore.storeDtype(config.compact)
+            window = bt.engineWindow(config.window1, config.window2)
+            self.window = bt.BarWindow(window, dtype, barstore.volumeDtype(dtype))
+            self.streaming = bt.StreamingSignals(overbought=config.overbought, oversold=config.oversold,
+                                                 window1=config.window1, window2=config.window2,
+                                                 weights=config.weights)
+        self.trader = bt.TradeLogic(config, log)
+        self.onIntent = onIntent
+        self.skip = config.start  # bars left to skip after dateFrom
+        self.first = timeindex.toEpoch(config.dateFrom) if config.dateFrom else None
+        self.last = timeindex.toEpoch(config.dateTo, end=True) if config.dateTo else None
+        self.session = config.session or None
+        if self.session:
+            timeindex.sessionHours(self.session)  # unknown sessions fail here, not on the first bar
+        self.received = 0  # bars seen, the row number a backtest of the same feed would give
+        self.lastPrice = None
+        self.lastTime = 0
+        self.resumeAfter = None  # time of the last bar of a warm-start snapshot
+        self.latencies = []  # ns from receiving a bar to its decision
+        self.snapshots = None if checkpointPath is None else checkpoint.Checkpointer(checkpointPath, checkpointEvery)
+
+    def warmStart(self, path):
+        # Continue from a backtest or live snapshot instead of replaying its history
+        if self.signalSet is not None:
+            raise ValueError("The incremental indicators cannot be restored from a snapshot; replay the history")
+        meta, arrays = checkpoint.load(path)
+        checkpoint.checkConfig(meta, self.config, WARM_START_IGNORED)
+        checkpoint.restoreEngine(meta, arrays, self.window, self.streaming, self.trader)
+        self.received = meta["row"] + 1
+        self.skip = 0
+        self.lastPrice = self.window.cacheArr[-1]
+        self.lastTime = self.resumeAfter = int(self.trader.barTime)
+        return meta
+
+    def saveSnapshot(self):
+        self.snapshots.save(self.window, self.streaming, self.trader, self.config, kind="live",
+                            row=self.received - 1, bars=len(self.latencies))
+
+    def onBar(self, bar, received=None):
+        received = time.perf_counter_ns() if received is None else received
+        if self.resumeAfter is not None and bar.time <= self.resumeAfter:
+            return []  # already in the warm-start snapshot
+        row = self.received
+        self.received += 1
+        if (self.first is not None and bar.time < self.first) or (self.last is not None and bar.time >= self.last):
+            return []
+        if self.skip:
+            self.skip -= 1
+            return []
+        if self.signalSet is not None:
+            signals = self.signalSet.update(bar)
+            if signals is None:
+                return []  # still filling the lookback
+            price = bar.close
+        else:
+            self.window.appendBar(bar.close, bar.high, bar.low, bar.volume)
+            if not self.window.isFull():
+                return []  # still loading the indicator window, as Cache does
+            price = self.window.cacheArr[-1]
+            signals = self.streaming.evaluate(self.window)
+        trader = self.trader
+        closed = len(trader.ledger)
+        allowed = self.session is None or bool(timeindex.inSession(bar.time, self.session))
+        trader.onBar(price, signals, allowed, allowed, index=row, timestamp=bar.time)
+        self.lastPrice, self.lastTime = price, bar.time
+        intents = []
+        if trader.entryBar == row:
+            intents.append(OrderIntent(bar.time, row, "open", self.side(trader.ledger.side[-1])
+                                       if trader.position is None else trader.position, trader.entryPrice))
+        intents.extend(self.closedSince(closed))
+        self.latencies.append(time.perf_counter_ns() - received)
+        if self.snapshots is not None and self.snapshots.due(len(self.latencies)):
+            self.saveSnapshot()
+        return intents
+
+    @staticmethod
+    def side(code):
+        return "buy" if code == ledger.BUY else "sell"
+
+    def closedSince(self, count):
+        trades = self.trader.ledger
+        return [OrderIntent(int(trades.exitTime[i]), int(trades.exitIndex[i]), "close", self.side(trades.side[i]),
+                            float(trades.exitPrice[i]), ledger.EXIT_REASONS[trades.reason[i]])
+                for i in range(count, len(trades))]
+
+    def flatten(self):
+        # Close an open position at the last price, as the backtest does at the end of data
+        if self.lastPrice is None:
+            return []
+        closed = len(self.trader.ledger)
+        self.trader.forceExit(self.lastPrice)
+        return self.closedSince(closed)
+
+    async def emit(self, intents):
+        if self.onIntent is None:
+            return
+        for intent in intents:
+            result = self.onIntent(intent)
+            if inspect.isawaitable(result):
+                await result
+
+    async def run(self, source, flatten=True):
+        async for bar in source:
+            received = time.perf_counter_ns()
+            await self.emit(self.onBar(bar, received))
+        if self.snapshots is not None and self.lastPrice is not None:
+            self.saveSnapshot()  # before flattening, so the next session picks up the open position
+        if flatten:
+            await self.emit(self.flatten())
+        logPnL = self.trader.logPnL
+        return bt.Result(logPnL=logPnL, summary=bt.summarizeTrades(logPnL), bars=len(self.latencies),
+                         ledger=self.trader.ledger)
+
+
+def printLatency(stats):
+    print("\n=== DECISION LATENCY (us per bar) ===")
+    if not stats["bars"]:
+        print("No bars evaluated.")
+        return
+    print(f"bars {stats['bars']}  mean {stats['mean']:.1f}  p50 {stats['p50']:.1f}  "
+          f"p99 {stats['p99']:.1f}  max {stats['max']:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the strategy on a live or replayed bar feed")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--replay", help="bar file to replay")
+    source.add_argument("--tail", help="CSV file to follow as it is appended to")
+    source.add_argument("--connect", help="HOST:PORT sending CSV bar lines")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between replayed bars")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL, help="seconds between checks of a tailed file")
+    parser.add_argument("--idle-timeout", type=float, help="stop tailing after this many seconds without a bar")
+    parser.add_argument("--keep-open", action="store_true", help="leave an open position open when the feed ends")
+    parser.add_argument("--incremental", action="store_true",
+                        help="evaluate with the constant-work incremental indicators (incremental.py)")
+    parser.add_argument("--warm-start", help="checkpoint.py snapshot to continue from")
+    parser.add_argument("--checkpoint", help="snapshot the engine to this .npz file while running")
+    parser.add_argument("--checkpoint-every", type=int, default=checkpoint.DEFAULT_EVERY, metavar="N",
+                        help="evaluated bars between snapshots")
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+        runner = LiveRunner(config, onIntent=print, checkpointPath=args.checkpoint,
+                            checkpointEvery=args.checkpoint_every, incrementalSignals=args.incremental)
+        if args.warm_start:
+            meta = runner.warmStart(args.warm_start)
+            print(f"Warm start from {args.warm_start}: row {meta['row']}, "
+                  f"{len(runner.trader.logPnL)} closed trades, position {runner.trader.position or 'flat'}")
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        parser.error(str(e))
+
+    if args.replay:
+        feed = replaySource(args.replay, args.delay)
+    elif args.tail:
+        feed = tailSource(args.tail, args.poll, args.idle_timeout)
+    else:
+        host, _, port = args.connect.rpartition(":")
+        if not host or not port.isdigit():
+            parser.error("--connect expects HOST:PORT")
+        feed = socketSource(host, int(port))
+    try:
+        result = asyncio.run(runner.run(feed, flatten=not args.keep_open))
+    except KeyboardInterrupt:
+        result = None
+    if result is not None:
+        bt.printSummary(result.summary)
+    printLatency(latencyStats(runner.latencies))
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,218 @@
+#  <montecarlo.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Monte Carlo robustness of a run. The trade PnL series (logPnL) or the
+# strategy's per-bar returns are resampled many times and each resample is
+# turned into a final PnL, a maximum drawdown and whether it ruined the
+# account. Methods:
+#   bootstrap  draw with replacement
+#   block      circular block bootstrap, keeps runs of `block` consecutive values
+#   shuffle    the same values in another order (final PnL is fixed, the
+#              drawdown is what changes)
+# Resamples are (rows, length) index matrices processed in chunks of about
+# CHUNK_ELEMENTS values. Chunk i always uses child seed i of the run's seed,
+# so results are the same for any number of workers.
+#
+#   python montecarlo.py EURUSD_H4.csv --maxATR 0.01 --resamples 100000
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import backtest as bt
+
+METHODS = ("bootstrap", "block", "shuffle")
+SERIES = ("trades", "bars")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+CHUNK_ELEMENTS = 1 << 22
+DEFAULT_RESAMPLES = 10000
+DEFAULT_BLOCK = 5
+DEFAULT_CAPITAL = 10000.0  # account currency
+DEFAULT_RUIN = 0.5  # fraction of the capital lost that counts as ruin
+
+
+def barReturns(trades, close):
+    # Per-bar PnL of the strategy in price units: the position marked to the
+    # close while open, corrected on the exit bar so every trade sums to its
+    # ledger PnL (entry adjustment, commission and intrabar fills included)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.zeros(len(close))
+    if not len(trades) or len(close) < 2:
+        return out
+    side = trades.side.astype(np.float64)
+    position = np.zeros(len(close) + 1)
+    np.add.at(position, trades.entryIndex + 1, side)
+    np.add.at(position, trades.exitIndex + 1, -side)
+    position = np.cumsum(position)[:len(close)]
+    out[1:] = position[1:] * np.diff(close)
+    marked = side * (close[trades.exitIndex] - close[trades.entryIndex])
+    np.add.at(out, trades.exitIndex, trades.pnl - marked)
+    return out
+
+
+def resampleIndex(rng, rows, length, method, block=DEFAULT_BLOCK):
+    if method == "bootstrap":
+        return rng.integers(0, length, size=(rows, length))
+    if method == "block":
+        block = max(1, min(block, length))
+        starts = rng.integers(0, length, size=(rows, -(-length // block)))
+        index = (starts[:, :, None] + np.arange(block)) % length
+        return index.reshape(rows, -1)[:, :length]
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(length), (rows, length)), axis=1)
+    raise ValueError(f"Unknown method '{method}', expected one of {', '.join(METHODS)}")
+
+
+def pathStats(paths, lotUnits, capital, ruin):
+    # Final PnL, max drawdown (money, peak starting at 0 as analytics.drawdowns)
+    # and ruin flag for every row of a (rows, length) PnL matrix
+    equity = np.cumsum(paths, axis=1) * lotUnits
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 0)
+    return equity[:, -1], (peak - equity).max(axis=1), equity.min(axis=1) <= -capital * ruin
+
+
+def _simulate(values, seed, rows, method, block, lotUnits, capital, ruin):
+    rng = np.random.default_rng(seed)
+    index = resampleIndex(rng, rows, len(values), method, block)
+    return pathStats(values[index], lotUnits, capital, ruin)
+
+
+def simulate(values, resamples=DEFAULT_RESAMPLES, method="bootstrap", block=DEFAULT_BLOCK, seed=0, workers=1,
+             lotUnits=bt.DEFAULT_LOT_UNITS, capital=DEFAULT_CAPITAL, ruin=DEFAULT_RUIN):
+    # (final PnL, max drawdown, ruined) arrays of `resamples` resampled paths
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        zeros = np.zeros(resamples)
+        return zeros, zeros.copy(), np.zeros(resamples, dtype=bool)
+    rows = max(1, CHUNK_ELEMENTS // len(values))
+    sizes = [min(rows, resamples - first) for first in range(0, resamples, rows)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(values, childSeed, size, method, block, lotUnits, capital, ruin) for childSeed, size in zip(seeds, sizes)]
+    if workers == 1 or len(tasks) == 1:
+        parts = [_simulate(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = [future.result() for future in [pool.submit(_simulate, *task) for task in tasks]]
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def summarize(final, maxDrawdown, ruined, actualFinal=None, actualDrawdown=None):
+    report = {"resamples": len(final),
+              "finalPnL": {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(final, PERCENTILES))},
+              "maxDrawdown": {f"p{q}": float(v) for q, v in zip(PERCENTILES, np.percentile(maxDrawdown, PERCENTILES))},
+              "meanFinalPnL": float(final.mean()), "probLoss": float(np.mean(final < 0)),
+              "riskOfRuin": float(ruined.mean())}
+    # Where the run itself falls: share of resamples that did worse
+    # (to the cent, so reordered sums of the same trades tie)
+    if actualFinal is not None:
+        report["actualFinalPnL"] = float(actualFinal)
+        report["finalPnLRank"] = float(np.mean(np.round(final, 2) < round(float(actualFinal), 2)))
+    if actualDrawdown is not None:
+        report["actualMaxDrawdown"] = float(actualDrawdown)
+        report["maxDrawdownRank"] = float(np.mean(maxDrawdown > actualDrawdown))
+    return report
+
+
+def analyzeRun(values, methods=METHODS, resamples=DEFAULT_RESAMPLES, block=DEFAULT_BLOCK, seed=0, workers=1,
+               lotUnits=bt.DEFAULT_LOT_UNITS, capital=DEFAULT_CAPITAL, ruin=DEFAULT_RUIN):
+    # {method: summary} for one PnL series (trades or bar returns)
+    if resamples < 1:
+        raise ValueError("The number of resamples must be positive")
+    values = np.asarray(values, dtype=np.float64)
+    actualFinal, actualDrawdown, _ = pathStats(values[None, :], lotUnits, capital, ruin) if len(values) else (
+        np.zeros(1), np.zeros(1), None)
+    reports = {}
+    for method in methods:
+        started = time.perf_counter()
+        stats = simulate(values, resamples, method, block, seed, workers, lotUnits, capital, ruin)
+        reports[method] = summarize(*stats, actualFinal[0], actualDrawdown[0])
+        reports[method]["elapsed"] = time.perf_counter() - started
+    return reports
+
+
+def printReport(reports, series, capital, ruin):
+    print(f"\n=== MONTE CARLO ({series}; ruin = losing {ruin:.0%} of {capital:,.0f}) ===")
+    for method, report in reports.items():
+        final, drawdown = report["finalPnL"], report["maxDrawdown"]
+        print(f"{method}: {report['resamples']} resamples in {report['elapsed']:.2f}s")
+        print("  final PnL    " + "  ".join(f"p{q} {final[f'p{q}']:.0f}" for q in PERCENTILES))
+        print("  max drawdown " + "  ".join(f"p{q} {drawdown[f'p{q}']:.0f}" for q in PERCENTILES))
+        print(f"  P(loss) {report['probLoss']:.1%}  risk of ruin {report['riskOfRuin']:.2%}  "
+              f"run: PnL {report['actualFinalPnL']:.0f} (beats {report['finalPnLRank']:.0%}), "
+              f"drawdown {report['actualMaxDrawdown']:.0f} (smaller than {report['maxDrawdownRank']:.0%})")
+
+
+def addArguments(parser):
+    # Monte Carlo flags, shared with backtest.py --montecarlo
+    parser.add_argument("--mc-methods", default=",".join(METHODS), help=f"comma list of {', '.join(METHODS)}")
+    parser.add_argument("--mc-series", choices=SERIES, default="trades", help="resample trade PnL or bar returns")
+    parser.add_argument("--mc-block", type=int, default=DEFAULT_BLOCK, help="block length of the block bootstrap")
+    parser.add_argument("--mc-seed", type=int, default=0)
+    parser.add_argument("--mc-workers", type=int, default=1, help="processes, 0 for all CPUs (results do not depend on it)")
+    parser.add_argument("--capital", type=float, default=DEFAULT_CAPITAL, help="account size for risk of ruin")
+    parser.add_argument("--ruin", type=float, default=DEFAULT_RUIN, help="fraction of capital lost that counts as ruin")
+    return parser
+
+
+def runFromArgs(args, result, data, resamples):
+    # Post-step of a finished run: resample its trades or bar returns and print the report
+    methods = [method.strip() for method in args.mc_methods.split(",") if method.strip()]
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        raise ValueError(f"Unknown Monte Carlo method(s): {', '.join(sorted(unknown))}")
+    if args.mc_series == "bars":
+        import barstore
+        values = barReturns(result.ledger, barstore.loadBars(data).close)
+    else:
+        values = result.logPnL
+    workers = args.mc_workers or os.cpu_count() or 1
+    reports = analyzeRun(values, methods, resamples, args.mc_block, args.mc_seed, workers,
+                         capital=args.capital, ruin=args.ruin)
+    printReport(reports, args.mc_series, args.capital, args.ruin)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo resampling of a backtest's trades or bar returns")
+    parser.add_argument("data", help="CSV bar file")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES)
+    parser.add_argument("--output", help="write the reports as JSON to this file")
+    addArguments(parser)
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    if args.resamples < 1:
+        parser.error("--resamples must be positive")
+    config.quiet = True
+    result = bt.run_backtest(config, args.data)
+    bt.printSummary(result.summary)
+    try:
+        reports = runFromArgs(args, result, args.data, args.resamples)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(reports, handle, indent=2)
+    return reports
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,207 @@
+#  <portfolio.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Multi-symbol, multi-timeframe backtest on one event clock.
+# Every bar file becomes a lazy stream of bar-close events read from its
+# memory-mapped bar store; heapq.merge interleaves the streams by close time.
+# Each stream keeps its own Cache and StreamingSignals, each symbol its own
+# TradeLogic, so a symbol traded alone gives the same trades as run_backtest.
+# A higher-timeframe file can act as a filter for a symbol: new longs need the
+# last closed filter bar's score >= 0, new shorts need it <= 0.
+#
+#   python portfolio.py EURUSD=EURUSD_H4.csv:EURUSD_D1.csv GBPUSD=GBPUSD_H4.csv --quiet
+import argparse
+import heapq
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+import backtest as bt
+import barstore
+import intrabar
+import timeindex
+
+EVENT_BLOCK = 65536  # timestamps pulled from a memory map at a time
+# The colon between the trade and filter files, not one inside a resampling
+# offset such as EURUSD_H4.csv@H8+21:00
+LEG_SEPARATOR = re.compile(r"(?<!\+\d)(?<!\+\d\d):")
+
+
+class BarStream:
+    # One bar file. Events are emitted at bar close (open time + bar length) so
+    # a daily bar is only visible to H4 bars that close after it does.
+    def __init__(self, data, config):
+        self.data = data
+        self.config = config
+        self.bars = barstore.loadBars(data, barstore.storeDtype(config.compact))
+        self.barSeconds = barstore.inferBarSeconds(self.bars.time)
+        self.window = bt.engineWindow(config.window1, config.window2)
+        self.start, self.end = timeindex.rowRange(config, self.bars)
+        self.firstRow = self.start + self.window - 1
+        self.lastRow = self.end - 1
+        index = timeindex.TimeIndex(self.bars.time, self.barSeconds)
+        self.session = index.sessionMask(config.session) if config.session else None
+        self.cache = None
+        self.streaming = bt.StreamingSignals(overbought=config.overbought, oversold=config.oversold,
+                                             window1=config.window1, window2=config.window2, weights=config.weights)
+        self.signals = None
+
+    def events(self, streamId):
+        # (close time, longer bars first on ties, stream id, row), generated block by block
+        for blockStart in range(self.firstRow, self.end, EVENT_BLOCK):
+            closeTimes = np.asarray(self.bars.time[blockStart:min(blockStart + EVENT_BLOCK, self.end)]) + self.barSeconds
+            for row, closeTime in enumerate(closeTimes.tolist(), blockStart):
+                yield (closeTime, -self.barSeconds, streamId, row)
+
+    def advance(self):
+        if self.cache is None:
+            self.cache = bt.Cache(start=self.start, csvFile=self.data, window=self.window, quiet=True,
+                                  end=self.end, bars=self.bars)
+        else:
+            self.cache.shiftCacheOne()
+        self.signals = self.streaming.evaluate(self.cache)
+        return self.signals
+
+
+class SymbolBook:
+    def __init__(self, symbol, stream, filterStream, config, refineData=""):
+        self.symbol = symbol
+        self.stream = stream
+        self.filterStream = filterStream
+        log = (lambda *args: None) if config.quiet else (lambda *args: print(f"[{symbol}]", *args))
+        fills = intrabar.fromConfig(replace(config, refineData=refineData), stream.bars)
+        self.trader = bt.TradeLogic(config, log, fills)
+        self.trades = []  # (exit time, pnl)
+        self.bars = 0
+
+    def onBar(self, closeTime, row):
+        signals = self.stream.advance()
+        self.bars += 1
+        allowBuy = allowSell = True
+        if self.filterStream is not None:
+            higher = self.filterStream.signals
+            allowBuy = higher is not None and higher["score"] >= 0
+            allowSell = higher is not None and higher["score"] <= 0
+        if self.stream.session is not None and not self.stream.session[row]:
+            allowBuy = allowSell = False
+        closed = len(self.trader.logPnL)
+        price = signals["close"]
+        self.trader.onBar(price, signals, allowBuy=allowBuy, allowSell=allowSell, index=row,
+                          timestamp=int(self.stream.bars.time[row]))
+        if row == self.stream.lastRow:
+            self.trader.forceExit(price)
+        for pnl in self.trader.logPnL[closed:]:
+            self.trades.append((closeTime, pnl))
+
+
+@dataclass
+class PortfolioResult:
+    trades: list  # (exit time, symbol, pnl) in time order
+    symbols: dict  # symbol -> backtest.Result
+    summary: dict
+    events: int = 0
+    elapsed: float = 0.0
+
+
+class Portfolio:
+    def __init__(self, config=None):
+        self.config = config or bt.Config()
+        self.books = {}
+
+    def addSymbol(self, symbol, data, filterData=None, refineData=None):
+        # refineData is the lower-timeframe file of this symbol's bars;
+        # config.refineData only stands in for it in a one-symbol portfolio
+        if symbol in self.books:
+            raise ValueError(f"Symbol {symbol} added twice")
+        if self.config.refineData and self.books:
+            raise ValueError("refineData is the lower timeframe of one bar file and needs a single symbol; "
+                             "refine several through Portfolio.addSymbol(refineData=...)")
+        if refineData is None:
+            refineData = self.config.refineData
+        filterStream = BarStream(filterData, self.config) if filterData else None
+        self.books[symbol] = SymbolBook(symbol, BarStream(data, self.config), filterStream, self.config, refineData)
+        return self
+
+    def run(self):
+        started = time.perf_counter()
+        handlers = []
+        streams = []
+        for book in self.books.values():
+            if book.filterStream is not None:
+                handlers.append(lambda closeTime, row, stream=book.filterStream: stream.advance())
+                streams.append(book.filterStream.events(len(streams)))
+            handlers.append(book.onBar)
+            streams.append(book.stream.events(len(streams)))
+
+        events = 0
+        for closeTime, _, streamId, row in heapq.merge(*streams):
+            handlers[streamId](closeTime, row)
+            events += 1
+
+        trades = []
+        symbols = {}
+        for symbol, book in self.books.items():
+            trades.extend((closeTime, symbol, pnl) for closeTime, pnl in book.trades)
+            logPnL = [pnl for _, pnl in book.trades]
+            symbols[symbol] = bt.Result(logPnL=logPnL, summary=bt.summarizeTrades(logPnL), bars=book.bars,
+                                        ledger=book.trader.ledger)
+        trades.sort(key=lambda trade: trade[0])
+        summary = bt.summarizeTrades([pnl for _, _, pnl in trades])
+        return PortfolioResult(trades=trades, symbols=symbols, summary=summary, events=events,
+                               elapsed=time.perf_counter() - started)
+
+
+def parseLeg(spec):
+    # SYMBOL=TRADE_CSV[:FILTER_CSV], or just TRADE_CSV with the symbol taken from its name
+    symbol, sep, files = spec.partition("=")
+    if not sep:
+        files = spec
+        symbol = os.path.basename(spec).split("_")[0].split(".")[0]
+    parts = LEG_SEPARATOR.split(files)
+    if len(parts) > 2 or not all(parts):
+        raise ValueError(f"Bad leg '{spec}', expected SYMBOL=TRADE_CSV[:FILTER_CSV]")
+    return symbol, parts[0], parts[1] if len(parts) == 2 else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-symbol, multi-timeframe portfolio backtest")
+    parser.add_argument("legs", nargs="+", metavar="SYMBOL=TRADE_CSV[:FILTER_CSV]")
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+    portfolio = Portfolio(config)
+    try:
+        for spec in args.legs:
+            portfolio.addSymbol(*parseLeg(spec))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    result = portfolio.run()
+    for symbol, symbolResult in result.symbols.items():
+        summary = symbolResult.summary
+        print(f"{symbol}: {summary['totalTrades']} trades, winrate {summary['winrate']:.2f}%, "
+              f"net PnL {summary['netPnL']:.2f}")
+    bt.printSummary(result.summary)
+    print(f"{result.events} bar events in {result.elapsed:.2f}s")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+#  <profiling.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Stage timing for the main loop. A StageProfiler accumulates
+# perf_counter_ns time and call counts per named stage ("shift",
+# "indicator:rsi", "score", "trade", "log", ...). Callers hold None instead of
+# a profiler when profiling is off, so the untimed path only pays a None check.
+# With trace=True every timed call is also kept as a Chrome trace event
+# (chrome://tracing, Perfetto).
+import json
+import time
+
+
+class StageProfiler:
+    def __init__(self, trace=False):
+        self.totals = {}  # stage -> [ns, calls]
+        self.events = [] if trace else None
+        self.origin = time.perf_counter_ns()
+
+    def record(self, name, started, ended):
+        total = self.totals.get(name)
+        if total is None:
+            total = self.totals[name] = [0, 0]
+        total[0] += ended - started
+        total[1] += 1
+        if self.events is not None:
+            self.events.append((name, started, ended))
+
+    def time(self, name, fn, *args, **kwargs):
+        started = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.record(name, started, time.perf_counter_ns())
+
+    def wrap(self, name, fn):
+        return lambda *args, **kwargs: self.time(name, fn, *args, **kwargs)
+
+    def summary(self):
+        # [(stage, seconds, calls, mean microseconds)], slowest first
+        rows = [(name, ns / 1e9, calls, ns / calls / 1e3) for name, (ns, calls) in self.totals.items()]
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def printSummary(self, wall=None):
+        # Stages nest (log inside trade), so the shares are of wall time and need not add up
+        wall = wall if wall else (time.perf_counter_ns() - self.origin) / 1e9
+        rows = self.summary()
+        width = max([len("stage")] + [len(row[0]) for row in rows])
+        print(f"\n=== STAGE TIMES ({wall:.3f}s wall) ===")
+        print(f"{'stage'.ljust(width)}  {'seconds':>9}  {'share':>6}  {'calls':>8}  {'us/call':>9}")
+        for name, seconds, calls, mean in rows:
+            print(f"{name.ljust(width)}  {seconds:9.3f}  {seconds / wall:6.1%}  {calls:8d}  {mean:9.2f}")
+
+    def writeTrace(self, path):
+        # Chrome trace-event JSON: one complete ("X") event per timed call, in microseconds
+        if self.events is None:
+            raise ValueError("StageProfiler was created without trace=True")
+        events = [{"name": name, "cat": name.partition(":")[0], "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (started - self.origin) / 1e3, "dur": (ended - started) / 1e3}
+                  for name, started, ended in self.events]
+        with open(path, "w") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
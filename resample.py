@@ -0,0 +1,228 @@
+#  <resample.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Higher timeframes from base bars: first open, max high, min low, last
+# close, summed volume per bucket, with ufunc.reduceat over the rows where
+# the bucket changes. A bucket opens at a multiple of the timeframe counted
+# from the offset (UTC midnight by default, "sydney" or "21:00" for the FX
+# day); weekly buckets open on Sunday, when the FX week does. Only buckets
+# with bars exist, so weekends and holidays leave no empty bars.
+# weekend="merge" folds Saturday/Sunday bars into the following Monday
+# instead of keeping them as their own (short) bars, and session= keeps only
+# the bars opening inside a timeindex session (e.g. London-hours daily bars).
+#
+# Base bars are read from the memory-mapped store block by block and the
+# open bucket at the end of a block is carried into the next, so memory is
+# bounded by the block size. The result is written as a bar store next to
+# the CSV (EURUSD_H4.D1.bars) and rebuilt when the CSV changes; every loader
+# accepts "EURUSD_H4.csv@D1" in place of a CSV path.
+#
+#   python resample.py EURUSD_H4.csv D1 --check EURUSD_D1.csv
+#   python resample.py EURUSD_H4.csv W1 --weekend merge
+#   python backtest.py --data EURUSD_H4.csv@H8 --quiet
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import barstore
+import timeindex
+
+UNITS = {"M": 60, "H": 3600, "D": timeindex.DAY, "W": 7 * timeindex.DAY}
+WEEK = UNITS["W"]
+SUNDAY = 3 * timeindex.DAY  # 1970-01-04, the first Sunday after the epoch
+WEEKEND_MODES = ("keep", "merge")
+
+
+def parseTimeframe(text):
+    # Seconds of "M15", "H1", "H8", "D1", "W1", ...
+    text = str(text).strip().upper()
+    try:
+        seconds = UNITS[text[0]] * int(text[1:])
+    except (IndexError, KeyError, ValueError):
+        raise ValueError(f"Cannot read timeframe '{text}', expected M<n>, H<n>, D1 or W1")
+    if seconds <= 0 or (timeindex.DAY % seconds and seconds != WEEK):
+        raise ValueError(f"Timeframe {text} does not divide a day and is not W1")
+    return seconds
+
+
+def timeframeName(seconds):
+    for unit, size in reversed(UNITS.items()):
+        if seconds % size == 0:
+            return f"{unit}{seconds // size}"
+    return f"S{seconds}"
+
+
+def parseOffset(text):
+    # Seconds after midnight UTC at which buckets open: "HH:MM", "HH" or a
+    # timeindex session name (its opening hour, "sydney" for the FX day)
+    if text is None or text == "" or text == 0:
+        return 0
+    text = str(text).strip()
+    if text in timeindex.SESSIONS:
+        return timeindex.SESSIONS[text][0] * 3600
+    hours, _, minutes = text.partition(":")
+    try:
+        seconds = int(hours) * 3600 + int(minutes or 0) * 60
+    except ValueError:
+        raise ValueError(f"Cannot read offset '{text}', expected HH:MM or one of {', '.join(timeindex.SESSIONS)}")
+    if not 0 <= seconds < timeindex.DAY:
+        raise ValueError(f"Offset '{text}' is not within a day")
+    return seconds
+
+
+def bucketTimes(times, period, offset=0, weekend="keep"):
+    # Opening time of the bucket of every bar; non-decreasing for sorted times
+    times = np.asarray(times, dtype=np.int64)
+    if weekend == "merge":
+        day = timeindex.weekday(times)
+        times = np.where(day >= timeindex.SATURDAY, times // timeindex.DAY * timeindex.DAY
+                         + (7 - day) * timeindex.DAY, times)
+    origin = (SUNDAY if period == WEEK else 0) + offset
+    return (times - origin) // period * period + origin
+
+
+def aggregate(buckets, columns):
+    # OHLCV per run of equal bucket times; columns are [open, high, low, close, volume]
+    opens, highs, lows, closes, volumes = columns
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets)) - 1
+    return buckets[starts], [opens[starts], np.maximum.reduceat(highs, starts), np.minimum.reduceat(lows, starts),
+                             closes[ends], np.add.reduceat(np.asarray(volumes, dtype=np.float64), starts)]
+
+
+def resampleBlocks(blocks, period, offset=0, weekend="keep", session=None):
+    # Streaming form: (times, columns) blocks of base bars in, blocks of
+    # resampled bars out. The rows of the last bucket of a block are held
+    # back until a later block (or the end) shows the bucket is complete.
+    if weekend not in WEEKEND_MODES:
+        raise ValueError(f"Unknown weekend mode '{weekend}', expected one of {', '.join(WEEKEND_MODES)}")
+    heldTimes, heldColumns = None, None
+    for times, columns in blocks:
+        times = np.asarray(times, dtype=np.int64)
+        columns = [np.asarray(column) for column in columns]
+        if session:
+            keep = timeindex.inSession(times, session)
+            times, columns = times[keep], [column[keep] for column in columns]
+        if heldTimes is not None:
+            times = np.concatenate((heldTimes, times))
+            columns = [np.concatenate((held, column)) for held, column in zip(heldColumns, columns)]
+        if not len(times):
+            continue
+        buckets = bucketTimes(times, period, offset, weekend)
+        cut = int(np.searchsorted(buckets, buckets[-1]))
+        heldTimes, heldColumns = times[cut:], [column[cut:] for column in columns]
+        if cut:
+            yield aggregate(buckets[:cut], [column[:cut] for column in columns])
+    if heldTimes is not None and len(heldTimes):
+        yield aggregate(bucketTimes(heldTimes, period, offset, weekend), heldColumns)
+
+
+def storeBlocks(bars, blockRows=barstore.CONVERT_BLOCK_ROWS):
+    # A bar store as (times, columns) blocks of memory-mapped rows
+    for lo in range(0, len(bars), blockRows):
+        hi = lo + blockRows
+        yield bars.time[lo:hi], [getattr(bars, name)[lo:hi] for name in barstore.PRICE_COLUMNS]
+
+
+def resampledPath(csvFile, period, offset=0, weekend="keep", session=None, priceDtype=np.float64):
+    # EURUSD_H4.csv -> EURUSD_H4.D1.bars, EURUSD_H4.D1+2100.merge.f32.bars, ...
+    name = timeframeName(period)
+    if offset:
+        name += f"+{offset // 3600:02d}{offset % 3600 // 60:02d}"
+    if weekend != "keep":
+        name += "." + weekend
+    if session:
+        name += "." + session.replace("-", "to")
+    return barstore.barPath(f"{os.path.splitext(csvFile)[0]}.{name}.csv", priceDtype)
+
+
+def checkBase(bars, period, offset):
+    # Every bucket must be made of whole base bars
+    base = barstore.inferBarSeconds(bars.time)
+    if base and (period <= base or period % base or offset % base):
+        raise ValueError(f"{timeframeName(base)} bars cannot be resampled to {timeframeName(period)}"
+                         + (f" opening at {timeindex.formatTime(offset)[11:]}" if offset % base else ""))
+    return base
+
+
+def resample(csvFile, timeframe, priceDtype=np.float64, offset=0, weekend="keep", session=None,
+             blockRows=barstore.CONVERT_BLOCK_ROWS):
+    # Memory-maps the resampled store of csvFile, building it first if it is missing or stale
+    period = parseTimeframe(timeframe)
+    offset = parseOffset(offset)
+    if session:
+        timeindex.sessionHours(session)
+    barFile = resampledPath(csvFile, period, offset, weekend, session, priceDtype)
+    if not barstore.isFresh(csvFile, barFile):
+        bars = barstore.loadBars(csvFile)  # float64 base; selections and sums are exact before the cast
+        checkBase(bars, period, offset)
+        blocks = resampleBlocks(storeBlocks(bars, blockRows), period, offset, weekend, session)
+        barstore.writeStore(blocks, barFile, priceDtype, os.stat(csvFile))
+    return barstore.BarStore(barFile)
+
+
+def parseSpec(spec):
+    # "file.csv@D1" or "file.csv@H8+21:00" -> (file, timeframe, offset)
+    csvFile, _, timeframe = spec.rpartition("@")
+    timeframe, _, offset = timeframe.partition("+")
+    if not csvFile or not timeframe:
+        raise ValueError(f"Bad resampled data '{spec}', expected file.csv@TIMEFRAME[+OFFSET]")
+    return csvFile, timeframe, offset
+
+
+def loadSpec(spec, priceDtype=np.float64):
+    csvFile, timeframe, offset = parseSpec(spec)
+    return resample(csvFile, timeframe, priceDtype, offset)
+
+
+def compareStores(bars, reference):
+    # Rows of `bars` whose time is in `reference`, and how many of those differ in any column
+    common, rows, refRows = np.intersect1d(bars.time, reference.time, return_indices=True)
+    differing = np.zeros(len(common), dtype=bool)
+    for name in barstore.PRICE_COLUMNS:
+        differing |= np.asarray(getattr(bars, name))[rows] != np.asarray(getattr(reference, name))[refRows]
+    return len(common), int(differing.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a higher timeframe from a bar file")
+    parser.add_argument("data", help="CSV bar file of the base timeframe")
+    parser.add_argument("timeframe", help="M<n>, H<n>, D1 or W1")
+    parser.add_argument("--offset", default="", help="bucket opening time, HH:MM UTC or a session name (sydney)")
+    parser.add_argument("--weekend", default="keep", choices=WEEKEND_MODES,
+                        help="merge: fold weekend bars into the following Monday")
+    parser.add_argument("--session", help=f"only bars opening in a session ({', '.join(timeindex.SESSIONS)} or HH-HH)")
+    parser.add_argument("--compact", action="store_true", help="write the float32 store")
+    parser.add_argument("--check", metavar="CSV", help="compare with a bar file of the same timeframe")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    try:
+        bars = resample(args.data, args.timeframe, barstore.storeDtype(args.compact), args.offset, args.weekend,
+                        args.session)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"{args.data} -> {bars.path}: {len(bars)} bars in {time.perf_counter() - started:.2f}s")
+    if len(bars):
+        print(f"  {timeindex.formatTime(bars.time[0])} .. {timeindex.formatTime(bars.time[-1])}")
+    if args.check:
+        reference = barstore.loadBars(args.check, barstore.storeDtype(args.compact))
+        common, differing = compareStores(bars, reference)
+        print(f"  {common} of {len(bars)} bars also in {args.check} ({len(reference)} bars), {differing} differ")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
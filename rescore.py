@@ -0,0 +1,193 @@
+#  <rescore.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Signal-matrix files. exportSignals writes, for every bar a run evaluates,
+# the column of every registered indicator (the nine scored signals and the
+# weight-0 extras), ATR, the liquidity flag, the close and the bar time to one
+# .npz. rescore rebuilds the score from it and reruns only the entry/exit
+# state machine (vectorized.simulateTrades), so changing the weights,
+# scoreThreshold, the ATR band, reversal, costs or TP/SL multipliers needs no
+# indicator work. The indicator parameters, data and date range are fixed by
+# the export (EXPORT_FIELDS); the session filter and intrabar fills need the
+# full engine and are refused.
+# Signal values are the classification levels {-1, -0.2, 0, 0.2, 1}, stored
+# as int8 multiples of 1/SIGNAL_SCALE when that round-trips exactly.
+#
+#   python rescore.py --export EURUSD_H4.csv h4.signals.npz
+#   python rescore.py h4.signals.npz --maxATR 0.01 --weights "adx=0;bollinger=1"
+#   python rescore.py h4.signals.npz -p scoreThreshold=0.15,0.2,0.25 -p maxATR=0.002,0.01
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+import numpy as np
+import backtest as bt
+import barstore
+import checkpoint
+import indicatorcache
+import indicators
+import ledger
+import sweep
+import timeindex
+import vectorized
+
+VERSION = 1
+SIGNAL_SCALE = 5
+# Config fields the exported columns depend on
+EXPORT_FIELDS = ("overbought", "oversold", "window1", "window2", "start", "dateFrom", "dateTo", "compact")
+
+
+def packSignal(values):
+    codes = np.rint(values * SIGNAL_SCALE).astype(np.int8)
+    return codes if np.array_equal(codes / SIGNAL_SCALE, values) else values
+
+
+def unpackSignal(values):
+    return values / SIGNAL_SCALE if values.dtype == np.int8 else values
+
+
+def exportSignals(data, path, config=None):
+    # Writes the signal matrix of config's run over `data`; returns its meta dict
+    config = config or bt.Config()
+    dtype = barstore.storeDtype(config.compact)
+    bars = barstore.loadBars(data, dtype)
+    first, last = timeindex.rowRange(config, bars)
+    everything = {name: 1.0 for name in indicators.INDICATORS}
+    signals = vectorized.computeSignals(bars.close[first:last], bars.high[first:last], bars.low[first:last],
+                                        bars.volume[first:last], overbought=config.overbought,
+                                        oversold=config.oversold, window1=config.window1, window2=config.window2,
+                                        dtype=dtype, weights=everything)
+    index = signals["index"] + first
+    arrays = {"index": index, "time": np.asarray(bars.time[index]), "close": signals["close"],
+              "atr": signals["atr"], "liquidity": signals["liquidity"]}
+    for name in vectorized.SIGNAL_COLUMNS:
+        arrays["signal." + name] = packSignal(signals[name])
+    meta = {"version": VERSION, "data": data, "dataBars": len(bars),
+            "fingerprint": indicatorcache.datasetFingerprint(bars.time, bars.close),
+            "config": {name: getattr(config, name) for name in EXPORT_FIELDS},
+            "indicators": list(vectorized.SIGNAL_COLUMNS)}
+    checkpoint.save(path, meta, arrays)
+    return meta
+
+
+class SignalFile:
+    # A loaded export: the columns as simulateTrades reads them, minus the score
+    def __init__(self, path):
+        meta, arrays = checkpoint.load(path)
+        if meta.get("version") != VERSION or "indicators" not in meta:
+            raise ValueError(f"{path} is not a signal matrix file (version {VERSION})")
+        self.path = path
+        self.meta = meta
+        self.columns = {"index": arrays["index"], "time": arrays["time"], "close": arrays["close"],
+                        "atr": arrays["atr"], "liquidity": arrays["liquidity"]}
+        for name in meta["indicators"]:
+            self.columns[name] = unpackSignal(arrays["signal." + name])
+
+    def __len__(self):
+        return len(self.columns["close"])
+
+    def check(self, config):
+        # The parts of config the export fixed must not have changed
+        saved = self.meta["config"]
+        differing = [name for name in EXPORT_FIELDS if saved[name] != getattr(config, name)]
+        if differing:
+            raise ValueError(f"{self.path} was exported with other {', '.join(differing)}; export it again")
+        if config.session:
+            raise ValueError("Re-scoring does not apply the session filter; run the backtest instead")
+        if config.fillMode != "close":
+            raise ValueError("Re-scoring fills on closes only; run the backtest for intrabar fills")
+        weights = indicators.parseWeights(config.weights)
+        missing = [name for name in indicators.active(weights) if name not in self.columns]
+        if missing:
+            raise ValueError(f"{self.path} has no column for {', '.join(missing)}; export it again")
+        return weights
+
+    def signals(self, weights):
+        signals = dict(self.columns)
+        signals["score"] = indicators.score(signals, weights)
+        return signals
+
+
+def rescore(signalFile, config=None):
+    # Result of config's trades from a SignalFile (or path), as run_backtest would give them
+    config = config or bt.Config()
+    started = time.perf_counter()
+    if not isinstance(signalFile, SignalFile):
+        signalFile = SignalFile(signalFile)
+    signals = signalFile.signals(signalFile.check(config))
+    trades = ledger.TradeLedger()
+    logPnL = vectorized.simulateTrades(signals, **config.tradeParams(), trades=trades)
+    return bt.Result(logPnL=logPnL, summary=bt.summarizeTrades(logPnL), bars=len(signalFile),
+                     elapsed=time.perf_counter() - started, ledger=trades)
+
+
+# Parameters a re-scoring grid may vary
+GRID_PARAMS = ("weights",) + tuple(bt.Config().tradeParams())
+
+
+def rescoreGrid(signalFile, config, grid):
+    unknown = set(grid) - set(GRID_PARAMS)
+    if unknown:
+        raise ValueError(f"Only {', '.join(GRID_PARAMS)} can vary when re-scoring, not {', '.join(sorted(unknown))}")
+    results = []
+    for values in sweep.gridConfigs(grid):
+        row = dict(values)
+        row.update(sweep.resultColumns(rescore(signalFile, replace(config, **values)).logPnL))
+        results.append(row)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a signal matrix, or re-score trades from one")
+    parser.add_argument("signals", help="signal matrix .npz")
+    parser.add_argument("--export", metavar="DATA", help="compute the matrix of this bar file and write it first")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help=f"re-score a grid over {', '.join(GRID_PARAMS)}")
+    parser.add_argument("--sort", default="netPnL", choices=sweep.RESULT_COLUMNS)
+    parser.add_argument("--top", type=int, default=20)
+    bt.addConfigArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = bt.configFromArgs(args)
+    except (OSError, ValueError, TypeError) as e:
+        parser.error(str(e))
+
+    if args.export:
+        started = time.perf_counter()
+        meta = exportSignals(args.export, args.signals, config)
+        print(f"Exported {len(meta['indicators'])} signals of {args.export} to {args.signals} "
+              f"({os.path.getsize(args.signals):,} bytes) in {time.perf_counter() - started:.2f}s")
+    try:
+        started = time.perf_counter()
+        signalFile = SignalFile(args.signals)
+        loaded = time.perf_counter() - started
+        if args.param:
+            grid = sweep.parseGrid(args.param)
+            results = sweep.sortResults(rescoreGrid(signalFile, config, grid), args.sort)
+            sweep.printTable(results, list(grid) + list(sweep.RESULT_COLUMNS), args.top)
+            print(f"{len(results)} re-scorings of {len(signalFile)} bars in {time.perf_counter() - started:.2f}s")
+            return results
+        result = rescore(signalFile, config)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+    bt.printSummary(result.summary)
+    print(f"{result.bars} bars re-scored in {result.elapsed:.3f}s (load {loaded:.3f}s)")
+    return result
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,294 @@
+#  <runstore.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Run manifests and the SQLite result store.
+#
+# A manifest is everything a run's trades depend on: the engine and
+# ENGINE_VERSION, the fingerprint of the bars it reads, every Config field
+# (numbers normalized to their field type, the weights resolved against the
+# indicator registry) and every DEFAULT_* constant of backtest.py. Its hash
+# is the run key, so an identical run finds its stored result instead of
+# being simulated again, and changing a default invalidates the old keys.
+# Bump ENGINE_VERSION with any change to the engines that alters trades.
+#
+# The store keeps one row per key: the Config fields and the result metrics
+# as indexed columns (query them with SQL), the full summary and manifest as
+# JSON and the ledger as an .npz blob in a side table. Writes are buffered
+# and committed batchSize rows per transaction; WAL mode lets other processes
+# read, and write after a short wait, while a sweep is filling the store.
+#
+#   python backtest.py --quiet --store runs.sqlite        # a second run is read back
+#   python sweep.py EURUSD_H4.csv -p maxATR=0.002,0.005,0.01 --store runs.sqlite
+#   python runstore.py runs.sqlite --where "totalTrades >= 10" --sort sharpe
+#   python runstore.py runs.sqlite --show 3f2a9c
+import argparse
+import hashlib
+import io
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import fields
+import numpy as np
+import analytics
+import backtest as bt
+import barstore
+import indicatorcache
+import indicators
+import ledger
+
+ENGINE_VERSION = 3
+DEFAULT_BATCH = 500  # rows per write transaction
+LOOKUP_CHUNK = 500  # keys per SELECT ... IN (...)
+METRICS = ("netPnL", "winrate", "totalTrades", "maxDrawdown", "sharpe", "profitFactor", "expectancy")
+SQL_TYPES = {int: "INTEGER", float: "REAL", bool: "INTEGER", str: "TEXT"}
+CONFIG_FIELDS = {f.name: f.type for f in fields(bt.Config) if f.name != "quiet"}
+RUN_COLUMNS = {"key": "TEXT PRIMARY KEY", "engine": "TEXT", "data": "TEXT", "fingerprint": "TEXT",
+               "created": "REAL", "bars": "INTEGER", "elapsed": "REAL",
+               **{name: SQL_TYPES.get(kind, "TEXT") for name, kind in CONFIG_FIELDS.items()},
+               **{name: "INTEGER" if name == "totalTrades" else "REAL" for name in METRICS},
+               "summary": "TEXT", "manifest": "TEXT"}
+INDEXED = ("fingerprint", "netPnL", "sharpe")
+
+
+def constants():
+    return {name: value for name, value in vars(bt).items() if name.startswith("DEFAULT_")}
+
+
+def configValues(config):
+    # Config fields as the manifest records them; quiet does not change results
+    values = {name: kind(getattr(config, name)) for name, kind in CONFIG_FIELDS.items()}
+    values["weights"] = indicators.parseWeights(config.weights)
+    return values
+
+
+def dataFingerprint(bars):
+    return indicatorcache.datasetFingerprint(bars.time, *(getattr(bars, name) for name in barstore.PRICE_COLUMNS))
+
+
+def configFingerprint(config, data):
+    # Fingerprint of every bar file a run with config reads
+    fingerprint = dataFingerprint(barstore.loadBars(data, barstore.storeDtype(config.compact)))
+    if config.fillMode != "close" and config.refineData:
+        fingerprint += "+" + dataFingerprint(barstore.loadBars(config.refineData))
+    return fingerprint
+
+
+def manifest(config, fingerprint, engine="streaming"):
+    return {"engine": engine, "engineVersion": ENGINE_VERSION, "fingerprint": fingerprint,
+            "config": configValues(config), "constants": constants()}
+
+
+def runKey(manifest):
+    text = json.dumps(manifest, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def metrics(logPnL):
+    # The METRICS of a trade sequence (summarizeTrades and analytics.analyze)
+    summary = bt.summarizeTrades(logPnL)
+    summary.update(analytics.analyze(logPnL))
+    return {name: summary[name] for name in METRICS}
+
+
+def packLedger(trades):
+    # .npz bytes of the ledger columns
+    columns = {name: getattr(trades, name) for name, _ in ledger.COLUMNS}
+    buffer = io.BytesIO()
+    np.savez(buffer, **columns)
+    return buffer.getvalue()
+
+
+def unpackLedger(blob):
+    # (ledger, whether it has every column); stores written before every run
+    # kept its ledger may hold pnl alone
+    with np.load(io.BytesIO(blob), allow_pickle=False) as archive:
+        columns = {name: archive[name] for name in archive.files}
+    size = len(columns["pnl"])
+    trades = ledger.TradeLedger(size)
+    for name, values in columns.items():
+        trades.arrays[name][:size] = values
+    trades.size = size
+    return trades, set(columns) == {name for name, _ in ledger.COLUMNS}
+
+
+class StoredRun:
+    def __init__(self, row, blob):
+        self.key = row["key"]
+        self.row = row
+        self.summary = json.loads(row["summary"])
+        self.manifest = json.loads(row["manifest"])
+        self.ledger, self.fullLedger = unpackLedger(blob) if blob is not None else (ledger.TradeLedger(), False)
+
+    def result(self):
+        # As a backtest.Result; elapsed is that of the stored run
+        return bt.Result(logPnL=self.ledger.pnl.tolist(), summary=self.summary, bars=self.row["bars"],
+                         elapsed=self.row["elapsed"], ledger=self.ledger)
+
+
+class RunStore:
+    def __init__(self, path, batchSize=DEFAULT_BATCH):
+        self.path = path
+        self.batchSize = batchSize
+        self.pending = []
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.createTables()
+
+    def createTables(self):
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS runs ("
+                                    + ", ".join(f"{name} {kind}" for name, kind in RUN_COLUMNS.items()) + ")")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS ledgers (key TEXT PRIMARY KEY, ledger BLOB)")
+            # Config fields added since the store was created
+            existing = {row["name"] for row in self.connection.execute("PRAGMA table_info(runs)")}
+            for name, kind in RUN_COLUMNS.items():
+                if name not in existing:
+                    self.connection.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+            for name in INDEXED:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS runs_{name} ON runs ({name})")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def add(self, key, manifest, data, logPnL, trades, bars=0, elapsed=0.0, summary=None):
+        # Buffers one run with its full ledger; written with the next flush
+        # (every batchSize runs)
+        summary = summary or bt.summarizeTrades(logPnL)
+        row = {"key": key, "engine": manifest["engine"], "data": data, "fingerprint": manifest["fingerprint"],
+               "created": time.time(), "bars": bars, "elapsed": elapsed, **metrics(logPnL),
+               "summary": json.dumps(summary), "manifest": json.dumps(manifest)}
+        for name, value in manifest["config"].items():
+            row[name] = value if name != "weights" else json.dumps(value, sort_keys=True)
+        self.pending.append((row, packLedger(trades)))
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        names = list(RUN_COLUMNS)
+        with self.connection:
+            # The first result of a key stays; an identical rerun would only repeat it
+            self.connection.executemany(f"INSERT OR IGNORE INTO runs ({', '.join(names)}) VALUES "
+                                        f"({', '.join('?' * len(names))})",
+                                        [tuple(row[name] for name in names) for row, _ in self.pending])
+            self.connection.executemany("INSERT OR IGNORE INTO ledgers (key, ledger) VALUES (?, ?)",
+                                        [(row["key"], blob) for row, blob in self.pending])
+        self.pending = []
+
+    def get(self, key):
+        # StoredRun of a full key or unique key prefix, None when not stored
+        self.flush()
+        rows = self.connection.execute("SELECT * FROM runs WHERE key >= ? AND key < ? LIMIT 2",
+                                       (key, key + "\uffff")).fetchall()
+        if len(rows) != 1:
+            if len(rows) > 1:
+                raise ValueError(f"Key prefix '{key}' is not unique")
+            return None
+        blob = self.connection.execute("SELECT ledger FROM ledgers WHERE key = ?", (rows[0]["key"],)).fetchone()
+        return StoredRun(rows[0], blob["ledger"] if blob else None)
+
+    def lookup(self, keys):
+        # {key: METRICS} of the stored keys among `keys`
+        self.flush()
+        keys = list(keys)
+        found = {}
+        for lo in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[lo:lo + LOOKUP_CHUNK]
+            query = f"SELECT key, {', '.join(METRICS)} FROM runs WHERE key IN ({', '.join('?' * len(chunk))})"
+            for row in self.connection.execute(query, chunk):
+                found[row["key"]] = {name: row[name] for name in METRICS}
+        return found
+
+    def query(self, where="", params=(), sort="netPnL", descending=True, limit=20):
+        # Rows of runs (without summary and manifest); `where` is an SQL condition on its columns
+        if sort not in RUN_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort}', expected a column of {', '.join(RUN_COLUMNS)}")
+        self.flush()
+        names = [name for name in RUN_COLUMNS if name not in ("summary", "manifest")]
+        sql = f"SELECT {', '.join(names)} FROM runs" + (f" WHERE {where}" if where else "")
+        sql += f" ORDER BY {sort} {'DESC' if descending else 'ASC'}" + (" LIMIT ?" if limit else "")
+        try:
+            rows = self.connection.execute(sql, tuple(params) + ((limit,) if limit else ())).fetchall()
+        except sqlite3.Error as e:
+            raise ValueError(f"Bad query: {e}")
+        return [dict(row) for row in rows]
+
+    def count(self):
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def backtestKey(config, data):
+    # (key, manifest) of run_backtest(config, data)
+    runManifest = manifest(config, configFingerprint(config, data))
+    return runKey(runManifest), runManifest
+
+
+def varyingColumns(rows):
+    # Config fields that differ between the rows, so a table shows what was swept
+    return [name for name in CONFIG_FIELDS if len({row[name] for row in rows}) > 1]
+
+
+def main(argv=None):
+    import sweep  # imports this module, so not at the top
+    parser = argparse.ArgumentParser(description="Query a run result store")
+    parser.add_argument("store", help="SQLite file written with --store")
+    parser.add_argument("--where", default="", help="SQL condition on the run columns, e.g. \"maxATR >= 0.005\"")
+    parser.add_argument("--sort", default="netPnL")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--show", metavar="KEY", help="print the manifest and trades of one run (key or prefix)")
+    args = parser.parse_args(argv)
+    with RunStore(args.store) as store:
+        try:
+            if args.show:
+                run = store.get(args.show)
+                if run is None:
+                    parser.error(f"No run {args.show} in {args.store}")
+                print(json.dumps(run.manifest, indent=2, sort_keys=True))
+                bt.printSummary(run.summary)
+                if run.fullLedger:
+                    for trade in run.ledger.rows():
+                        print(f"  {trade['side']:4} rows {trade['entryIndex']}..{trade['exitIndex']} "
+                              f"{trade['entryPrice']:.5f} -> {trade['exitPrice']:.5f}  "
+                              f"{trade['pnl'] * bt.DEFAULT_LOT_UNITS:9.2f}  {trade['reason']}")
+                return run
+            started = time.perf_counter()
+            rows = store.query(args.where, sort=args.sort, descending=not args.ascending, limit=args.top)
+            elapsed = time.perf_counter() - started
+            total = store.count()
+        except ValueError as e:
+            parser.error(str(e))
+    for row in rows:
+        row["key"] = row["key"][:12]
+    sweep.printTable(rows, ["key", "engine"] + varyingColumns(rows) + list(METRICS))
+    print(f"{len(rows)} of {total} runs in {elapsed * 1000:.1f} ms")
+    return rows
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,274 @@
+#  <sweep.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Grid / random parameter sweep over a ProcessPoolExecutor.
+# Workers open the memory-mapped bar store themselves, so the bars are shared
+# read-only through the page cache instead of being pickled into every task.
+# Configurations that share the indicator parameters are sent as one
+# task: the signals are computed once and only the trade logic is rerun.
+# Indicator columns that do not depend on the swept parameters (ATR, OBV,
+# CMF, VWAP, SAR, ...) are memoized per worker, optionally on disk.
+# With --store, configurations already in the result store (runstore.py) are
+# read back instead of simulated, and each finished task's runs are added
+# to it in one transaction, so an interrupted sweep resumes where it stopped.
+#
+#   python sweep.py EURUSD_H4.csv -p window1=10,14,20 -p maxATR=0.002,0.005 --sort netPnL
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import backtest as bt
+import barstore
+import indicatorcache
+import indicators
+import ledger
+import runstore
+import vectorized
+
+# Parameters that change the indicator columns (computeSignals)
+SIGNAL_PARAMS = {
+    "overbought": bt.DEFAULT_RSI_OVERBOUGHT,
+    "oversold": bt.DEFAULT_RSI_OVERSOLD,
+    "window1": bt.DEFAULT_WINDOW,
+    "window2": bt.DEFAULT_FAST_WINDOW,
+    "weights": "",  # one indicators.parseWeights spec per value, "name=w;name=w"
+}
+# Parameters that only change the entry/exit logic (simulateTrades)
+TRADE_PARAMS = {
+    "scoreThreshold": bt.DEFAULT_SCORE_THRESHOLD,
+    "minATR": bt.DEFAULT_MIN_ATR,
+    "maxATR": bt.DEFAULT_MAX_ATR,
+    "priceReversal": bt.DEFAULT_PRICE_REVERSAL,
+    "entryAdjustment": bt.DEFAULT_ENTRY_ADJUSTMENT,
+    "commission": bt.DEFAULT_COMMISSION,
+    "tpMultiplier": bt.DEFAULT_TP_ATR_MULTIPLIER,
+    "slMultiplier": bt.DEFAULT_SL_ATR_MULTIPLIER,
+}
+RESULT_COLUMNS = runstore.METRICS
+ENGINE = "vectorized"  # runstore engine name of sweep runs
+
+_bars = None
+_fingerprint = None
+_memo = None
+
+
+def _initWorker(csvFile, cacheDir=None, cacheBytes=indicatorcache.DEFAULT_CACHE_BYTES):
+    global _bars, _fingerprint, _memo
+    _bars = barstore.loadBars(csvFile)
+    _fingerprint = indicatorcache.datasetFingerprint(_bars.close, _bars.high, _bars.low, _bars.volume)
+    _memo = indicatorcache.IndicatorCache(maxBytes=cacheBytes, spillDir=cacheDir)
+
+
+def evaluateGroup(signalParams, tradeParamsList, keep=False):
+    # One worker task: shared indicator parameters, many trade-logic variants.
+    # keep adds each run's (logPnL, ledger, seconds) as row["trades"] for the result store.
+    signals = vectorized.computeSignals(_bars.close, _bars.high, _bars.low, _bars.volume, memo=_memo,
+                                        fingerprint=_fingerprint, **signalParams)
+    results = []
+    for tradeParams in tradeParamsList:
+        started = time.perf_counter()
+        trades = ledger.TradeLedger() if keep else None
+        logPnL = vectorized.simulateTrades(signals, **tradeParams, trades=trades)
+        row = dict(signalParams)
+        row.update(tradeParams)
+        row.update(resultColumns(logPnL))
+        if keep:
+            row["trades"] = (logPnL, trades, time.perf_counter() - started)
+        results.append(row)
+    return results
+
+
+def resultColumns(logPnL):
+    return runstore.metrics(logPnL)
+
+
+def runManifest(values, fingerprint):
+    # runstore manifest of one sweep configuration: the defaults plus the swept values
+    return runstore.manifest(bt.Config(**values), fingerprint, ENGINE)
+
+
+def splitStored(store, configs, fingerprint):
+    # (configs to run, result rows of the stored ones)
+    keys = [runstore.runKey(runManifest(values, fingerprint)) for values in configs]
+    found = store.lookup(keys)
+    stored = []
+    missing = []
+    for key, values in zip(keys, configs):
+        if key in found:
+            stored.append({**{name: values.get(name, default) for name, default in
+                              itertools.chain(SIGNAL_PARAMS.items(), TRADE_PARAMS.items())}, **found[key]})
+        else:
+            missing.append(values)
+    return missing, stored
+
+
+def storeRows(store, rows, csvFile, fingerprint):
+    # Adds a finished task's runs; the store commits them in batches
+    for row in rows:
+        logPnL, trades, elapsed = row.pop("trades")
+        values = {name: row[name] for name in itertools.chain(SIGNAL_PARAMS, TRADE_PARAMS)}
+        manifest = runManifest(values, fingerprint)
+        store.add(runstore.runKey(manifest), manifest, csvFile, logPnL, trades, elapsed=elapsed)
+
+
+def gridConfigs(grid):
+    # grid maps parameter name -> list of values; unspecified names keep their defaults
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def randomConfigs(grid, samples, seed=None):
+    rng = random.Random(seed)
+    total = 1
+    for values in grid.values():
+        total *= len(values)
+    if samples >= total:
+        return list(gridConfigs(grid))
+    seen = set()
+    configs = []
+    while len(configs) < samples:
+        config = tuple(rng.choice(values) for values in grid.values())
+        if config not in seen:
+            seen.add(config)
+            configs.append(dict(zip(grid, config)))
+    return configs
+
+
+def groupConfigs(configs):
+    groups = {}
+    for config in configs:
+        unknown = set(config) - set(SIGNAL_PARAMS) - set(TRADE_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameter(s): {', '.join(sorted(unknown))}")
+        signalParams = {name: config.get(name, default) for name, default in SIGNAL_PARAMS.items()}
+        tradeParams = {name: config.get(name, default) for name, default in TRADE_PARAMS.items()}
+        groups.setdefault(tuple(signalParams.items()), []).append(tradeParams)
+    return groups
+
+
+def runSweep(csvFile, configs, workers=None, cacheDir=None, store=None):
+    # store (a runstore.RunStore) supplies the configs it already has and receives the others.
+    bars = barstore.loadBars(csvFile)  # build the store once, before the workers race to it
+    results = []
+    keep = store is not None
+    if keep:
+        fingerprint = runstore.dataFingerprint(bars)
+        configs, results = splitStored(store, configs, fingerprint)
+    groups = groupConfigs(configs)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(evaluateGroup, dict(signalParams), tradeParamsList, keep)
+             for signalParams, tradeParamsList in groups.items()]
+
+    def collect(rows):
+        if keep:
+            storeRows(store, rows, csvFile, fingerprint)
+            store.flush()
+        results.extend(rows)
+
+    if not tasks:
+        return results
+    if workers == 1:
+        _initWorker(csvFile, cacheDir)
+        for fn, *args in tasks:
+            collect(fn(*args))
+        return results
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(csvFile, cacheDir)) as pool:
+        futures = [pool.submit(fn, *args) for fn, *args in tasks]
+        for future in futures:
+            collect(future.result())
+    return results
+
+
+def sortResults(results, key="netPnL", descending=True):
+    return sorted(results, key=lambda row: row[key], reverse=descending)
+
+
+def printTable(results, columns, limit=None):
+    rows = results[:limit] if limit else results
+    cells = [[f"{row[name]:.6g}" if isinstance(row[name], float) else str(row[name]) for name in columns] for row in rows]
+    widths = [max([len(name)] + [len(line[i]) for line in cells]) for i, name in enumerate(columns)]
+    print("  ".join(name.rjust(width) for name, width in zip(columns, widths)))
+    for line in cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def writeCSV(results, path):
+    if not results:
+        return
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def parseGrid(specs):
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        default = SIGNAL_PARAMS.get(name, TRADE_PARAMS.get(name))
+        if default is None or not values:
+            raise ValueError(f"Bad sweep parameter '{spec}', expected name=v1,v2,... with name in "
+                             f"{', '.join(list(SIGNAL_PARAMS) + list(TRADE_PARAMS))}")
+        cast = float if name in TRADE_PARAMS else type(default)
+        grid[name] = [cast(value) for value in values.split(",")]
+        if name == "weights":
+            for spec in grid[name]:
+                indicators.parseWeights(spec)
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over a bar file")
+    parser.add_argument("data", help="CSV bar file (Date Time, Open, High, Low, Close, Volume)")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="values to sweep for one parameter; repeat for more")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="sample N configs instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sort", default="netPnL", choices=RESULT_COLUMNS)
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="write every result row to this CSV file")
+    parser.add_argument("--cache-dir", help="spill computed indicator arrays here and reuse them on later runs")
+    parser.add_argument("--store", help="SQLite result store (runstore.py): reuse stored runs, add new ones")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parseGrid(args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    configs = randomConfigs(grid, args.random, args.seed) if args.random else list(gridConfigs(grid))
+    store = runstore.RunStore(args.store) if args.store else None
+    try:
+        results = runSweep(args.data, configs, args.workers, args.cache_dir, store)
+    finally:
+        if store is not None:
+            store.close()
+    results = sortResults(results, args.sort, not args.ascending)
+    printTable(results, list(grid) + list(RESULT_COLUMNS), args.top)
+    if args.out:
+        writeCSV(results, args.out)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,158 @@
+#  <timeindex.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Lookups on the sorted time column of a bar store (UTC epoch seconds of the
+# bar opens): date-range selection by binary search, gap detection and
+# trading-session masks.
+#
+#   python timeindex.py EURUSD_H4.csv --from 2015-01-01 --to 2015-12-31
+import argparse
+import sys
+import numpy as np
+import barstore
+
+DAY = 86400
+SATURDAY = 5  # weekday numbers, Monday 0
+# Session hours in UTC, [open, close); a session may wrap past midnight
+SESSIONS = {
+    "sydney": (21, 6),
+    "tokyo": (0, 9),
+    "london": (7, 16),
+    "newyork": (12, 21),
+    "overlap": (12, 16),  # London / New York
+}
+
+
+def toEpoch(value, end=False):
+    # Epoch seconds of "YYYY-MM-DD", "YYYY-MM-DD HH:MM" or an epoch number.
+    # As an end bound a bare date means the whole day.
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        seconds = int(np.datetime64(text, "s").astype(np.int64))
+    except ValueError:
+        raise ValueError(f"Cannot read '{value}' as a date, expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+    if end and len(text) <= 10:
+        seconds += DAY
+    return seconds
+
+
+def weekday(times):
+    return (np.asarray(times, dtype=np.int64) // DAY + 3) % 7  # 1970-01-01 was a Thursday
+
+
+def sessionHours(session):
+    # (open hour, close hour) of a SESSIONS name or "HH-HH"
+    if session in SESSIONS:
+        return SESSIONS[session]
+    try:
+        first, last = (int(part) for part in session.split("-"))
+    except ValueError:
+        raise ValueError(f"Unknown session '{session}', expected one of {', '.join(SESSIONS)} or HH-HH")
+    if not (0 <= first < 24 and 0 <= last <= 24):
+        raise ValueError(f"Session hours out of range in '{session}'")
+    return first, last
+
+
+def inSession(times, session):
+    # True for bars opening inside the session; works on scalars and arrays
+    first, last = sessionHours(session)
+    hour = np.asarray(times, dtype=np.int64) % DAY // 3600
+    if first < last:
+        return (hour >= first) & (hour < last)
+    return (hour >= first) | (hour < last)
+
+
+class TimeIndex:
+    def __init__(self, times, barSeconds=None):
+        self.times = times
+        self.barSeconds = barstore.inferBarSeconds(times) if barSeconds is None else barSeconds
+
+    def __len__(self):
+        return len(self.times)
+
+    def rows(self, start=None, end=None):
+        # Half-open row range [lo, hi) of the bars opening in [start, end), O(log n)
+        lo = 0 if start is None or start == "" else int(np.searchsorted(self.times, toEpoch(start)))
+        hi = len(self.times) if end is None or end == "" else int(np.searchsorted(self.times, toEpoch(end, end=True)))
+        return lo, max(lo, hi)
+
+    def gaps(self, lo=0, hi=None):
+        # Bars followed by a missing stretch: row of the bar before the gap,
+        # number of missing bars, and whether the missing bars all fall on a weekend
+        times = np.asarray(self.times[lo:hi], dtype=np.int64)
+        step = self.barSeconds
+        if len(times) < 2 or step <= 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return {"row": empty, "missing": empty, "weekend": np.zeros(0, dtype=bool)}
+        at = np.flatnonzero(np.diff(times) > step)
+        firstMissing = times[at] + step
+        lastMissing = times[at + 1] - step
+        day = weekday(firstMissing)
+        saturday = firstMissing // DAY * DAY - np.maximum(day - SATURDAY, 0) * DAY
+        weekend = (day >= SATURDAY) & (lastMissing < saturday + 2 * DAY)
+        return {"row": at + lo, "missing": (times[at + 1] - times[at]) // step - 1, "weekend": weekend}
+
+    def sessionMask(self, session, lo=0, hi=None):
+        return inSession(self.times[lo:hi], session)
+
+
+def rowRange(config, bars):
+    # Rows [lo, hi) a run covers: config.dateFrom/dateTo through the index,
+    # then config.start bars skipped on top
+    lo, hi = TimeIndex(bars.time).rows(config.dateFrom, config.dateTo)
+    return min(lo + config.start, hi), hi
+
+
+def formatTime(seconds):
+    return str(np.datetime64(int(seconds), "s")).replace("T", " ")[:16]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Date range, gaps and sessions of a bar file")
+    parser.add_argument("data", help="CSV bar file")
+    parser.add_argument("--from", dest="dateFrom", help="first date, YYYY-MM-DD[ HH:MM]")
+    parser.add_argument("--to", dest="dateTo", help="last date, YYYY-MM-DD[ HH:MM] (a bare date includes that day)")
+    parser.add_argument("--session", help=f"count bars inside a session ({', '.join(SESSIONS)} or HH-HH UTC)")
+    parser.add_argument("--list", type=int, default=10, help="missing-bar gaps to list")
+    args = parser.parse_args(argv)
+    bars = barstore.loadBars(args.data)
+    index = TimeIndex(bars.time)
+    try:
+        lo, hi = index.rows(args.dateFrom, args.dateTo)
+        mask = index.sessionMask(args.session, lo, hi) if args.session else None
+    except ValueError as e:
+        parser.error(str(e))
+    if lo == hi:
+        print("No bars in range.")
+        return
+    print(f"{args.data}: rows {lo}..{hi - 1}, {formatTime(bars.time[lo])} .. {formatTime(bars.time[hi - 1])}, "
+          f"{hi - lo} bars of {index.barSeconds}s")
+    gaps = index.gaps(lo, hi)
+    weekend = gaps["weekend"]
+    print(f"Gaps: {int(weekend.sum())} weekend, {int((~weekend).sum())} other "
+          f"({int(gaps['missing'][~weekend].sum())} bars missing)")
+    for row, missing in list(zip(gaps["row"][~weekend], gaps["missing"][~weekend]))[:args.list]:
+        print(f"  after {formatTime(bars.time[row])}: {missing} bars")
+    if mask is not None:
+        print(f"Session {args.session}: {int(mask.sum())} of {hi - lo} bars")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,595 @@
+#  <vectorized.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Batch mode: every indicator is computed once over the whole loaded series.
+# Row i of every returned column is the bar the streaming loop in backtest.py
+# evaluates on its i-th iteration, i.e. bar (window - 1 + i) of the file.
+import sys
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import backtest as bt
+import barstore
+import indicatorcache
+import indicators
+import kernels
+
+def loadCSV(csvFile, compact=False):
+    # (close, high, low, volume) as memory-mapped columns of the bar store
+    bars = barstore.loadBars(csvFile, barstore.storeDtype(compact))
+    return bars.close, bars.high, bars.low, bars.volume
+
+
+def _floatType(arr):
+    return arr.dtype if arr.dtype.kind == "f" else np.float64
+
+
+def rollingSum(arr, period):
+    # out[t] = sum(arr[t-period+1:t+1]) for t >= period-1, nan before.
+    # A cumsum difference drifts by an ulp and flips the exact comparisons the
+    # indicators make (SMA ties, ADX bands), so reduce over strided windows
+    # instead: same summation order as the np.mean/np.sum calls in backtest.py.
+    # Float32 input (compact runs) gives float32 output.
+    out = np.full(len(arr), np.nan, dtype=_floatType(arr))
+    if 0 < period <= len(arr):
+        out[period - 1:] = sliding_window_view(arr, period).sum(axis=1)
+    return out
+
+
+def rollingMean(arr, period):
+    return rollingSum(arr, period) / period
+
+
+def rollingStd(arr, period):
+    # Population standard deviation, as np.std over the same slice
+    out = np.full(len(arr), np.nan, dtype=_floatType(arr))
+    if 0 < period <= len(arr):
+        out[period - 1:] = sliding_window_view(arr, period).std(axis=1)
+    return out
+
+
+def rollingMax(arr, period):
+    out = np.full(len(arr), np.nan, dtype=_floatType(arr))
+    if period <= len(arr):
+        out[period - 1:] = sliding_window_view(arr, period).max(axis=1)
+    return out
+
+
+def rollingMin(arr, period):
+    out = np.full(len(arr), np.nan, dtype=_floatType(arr))
+    if period <= len(arr):
+        out[period - 1:] = sliding_window_view(arr, period).min(axis=1)
+    return out
+
+
+def wilderFilter(values, window, prev=None):
+    # Recursive filter of EMACalc: y = (x + (w-2)*y_prev) / (w-1), seeded with x[0]
+    # unless a previous output is carried in
+    divisor = window - 1
+    weight = divisor - 1
+    out = np.empty(len(values), dtype=_floatType(values))
+    for i, x in enumerate(values.tolist()):
+        if prev is None:
+            prev = x
+        prev = (x + (weight * prev)) / divisor
+        out[i] = prev
+    return out
+
+
+def emaFilter(values, alpha, seed):
+    # Recursive filter of EMACheck: y = alpha*x + (1-alpha)*y_prev, y_prev starts at seed
+    out = np.empty(len(values), dtype=_floatType(values))
+    prev = seed
+    for i, x in enumerate(values.tolist()):
+        prev = alpha * x + (1 - alpha) * prev
+        out[i] = prev
+    return out
+
+
+def trueRange(close, high, low):
+    tr = high - low
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])))
+    return tr
+
+
+def _sign(arr):
+    return np.select([arr > 0, arr < 0], [1.0, -1.0], 0.0)
+
+
+# Column functions evaluate bars start..end. Rows before `start` are lookback
+# only. `state` is None when `start` is the first bar ever evaluated; a dict
+# carries the recursive parts (EMAs, OBV, SAR, ...) from one call to the next
+# when a long series is processed in chunks (see chunked.py).
+
+def atrSeries(close, high, low, period=bt.DEFAULT_ATR_PERIOD):
+    return rollingMean(trueRange(close, high, low), period)
+
+
+def rsiValues(close, start, window, state=None):
+    n = len(close) - start
+    if window < 2:
+        gains = np.zeros(n)
+        losses = np.zeros(n)
+    else:
+        delta = close[start:] - close[start - 1:-1]
+        gains = np.where(delta > 0, delta, 0)
+        losses = np.where(delta <= 0, -delta, 0)
+    state = {} if state is None else state
+    avgGain = wilderFilter(gains, window, state.get("avgGain"))
+    avgLoss = wilderFilter(losses, window, state.get("avgLoss"))
+    if n:
+        state["avgGain"], state["avgLoss"] = avgGain[-1], avgLoss[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(avgLoss == 0, 100, 100 - (100 / (1 + avgGain / avgLoss)))
+
+
+def classifyRSI(rsi, overBought, overSold):
+    return np.select([rsi > overBought, rsi < overSold, rsi < 40, rsi > 60], [-1, 1, 0.2, -0.2], 0)
+
+
+def rsiSignals(close, start, overBought, overSold, window, state=None):
+    return classifyRSI(rsiValues(close, start, window, state), overBought, overSold)
+
+
+def seededEMA(close, start, period, state=None):
+    # EMACheck over bars start..end, seeded with the mean of the first window
+    # unless the last value is carried in
+    state = {} if state is None else state
+    seed = state.get("value")
+    if seed is None:
+        seed = np.mean(close[start - period + 1:start + 1])
+    out = emaFilter(close[start:], 2 / (period + 1), seed)
+    if len(out):
+        state["value"] = out[-1]
+    return out
+
+
+def smaCrossSignals(smaSlow, smaFast, state=None):
+    # smaSlow/smaFast are the evaluated rows of the two moving averages
+    out = np.zeros(len(smaSlow))
+    if not len(smaSlow):
+        return out
+    state = {} if state is None else state
+    if "prevSlow" in state:
+        prevSlow = np.concatenate(([state["prevSlow"]], smaSlow[:-1]))
+        prevFast = np.concatenate(([state["prevFast"]], smaFast[:-1]))
+        first = 0
+    else:
+        prevSlow, prevFast = smaSlow[:-1], smaFast[:-1]
+        first = 1
+    slow, fast = smaSlow[first:], smaFast[first:]
+    out[first:] = np.select([(slow < fast) & (prevSlow >= prevFast), (slow > fast) & (prevSlow <= prevFast)], [1, -1], 0)
+    state["prevSlow"], state["prevFast"] = smaSlow[-1], smaFast[-1]
+    return out
+
+
+def macdSignals(emaFast, emaSlow, signal, state=None):
+    macdLine = emaFast - emaSlow
+    if not len(macdLine):
+        return macdLine
+    state = {} if state is None else state
+    signalLine = emaFilter(macdLine, 2 / (signal + 1), state.get("signal", macdLine[0]))
+    state["signal"] = signalLine[-1]
+    return _sign(macdLine - signalLine)
+
+
+def williamRSignals(close, highestHigh, lowestLow):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        william = ((highestHigh - close) / (highestHigh - lowestLow)) * -100
+    return np.select(
+        [(william > -20) & (william <= -0), (william <= -80) & (william >= -100), william < -70, william > -30],
+        [-1, 1, 0.2, -0.2], 0)
+
+
+def stochasticSignals(close, highestHigh, lowestLow, start, dPeriod=bt.DEFAULT_STOCHASTIC_D_PERIOD):
+    # %K from the rolling high/low (50 on a flat range), %D its dPeriod mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(highestHigh == lowestLow, 50.0, (close - lowestLow) / (highestHigh - lowestLow) * 100)
+    d = rollingMean(k[start - dPeriod + 1:], dPeriod)[dPeriod - 1:]
+    k = k[start:]
+    return np.select([(k > 80) & (k < d), (k < 20) & (k > d), k > 80, k < 20], [-1, 1, -0.2, 0.2], 0)
+
+
+def bollingerSignals(close, mean, std, numStd=bt.DEFAULT_BOLLINGER_STD):
+    band = numStd * std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentB = (close - (mean - band)) / (2 * band)
+    out = np.select([percentB > 1, percentB < 0, percentB > 0.8, percentB < 0.2], [-1, 1, -0.2, 0.2], 0)
+    out[band == 0] = 0
+    return out
+
+
+def adxSignals(high, low, start, period, smoothedTR):
+    # smoothedTR is the evaluated rows of the period mean of the true range
+    upMove = np.zeros(len(high))
+    downMove = np.zeros(len(high))
+    upMove[1:] = high[1:] - high[:-1]
+    downMove[1:] = low[:-1] - low[1:]
+    plusDM = np.where((upMove > downMove) & (upMove > 0), upMove, 0)
+    minusDM = np.where((downMove > upMove) & (downMove > 0), downMove, 0)
+    smoothedPlusDM = rollingMean(plusDM, period)[start:]
+    smoothedMinusDM = rollingMean(minusDM, period)[start:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plusDI = (smoothedPlusDM / smoothedTR) * 100
+        minusDI = (smoothedMinusDM / smoothedTR) * 100
+        dx = (np.abs(plusDI - minusDI) / (plusDI + minusDI)) * 100
+    up = plusDI > minusDI
+    out = np.select([dx < 20, dx >= 30], [0, np.where(up, 1, -1)], np.where(up, 0.2, -0.2))
+    out[(smoothedTR == 0) | (plusDI + minusDI == 0)] = 0
+    return out
+
+
+def obvSignals(close, volume, start, state=None):
+    n = len(close) - start
+    state = {} if state is None else state
+    history = state.get("history", [0.0])  # last (up to) five OBV values, starting from 0
+    calls = state.get("calls", 0)
+    change = close[start:] - close[start - 1:-1]
+    signedVolume = np.select([change > 0, change < 0], [volume[start:], -volume[start:]], 0)
+    newObv = np.cumsum(np.concatenate(([history[-1]], signedVolume)))[1:]
+    obv = np.concatenate((history, newObv))
+    # OBV.calc compares against the mean of the (up to) five previous values
+    p = len(history)
+    prevMean = np.full(n, np.nan)
+    if len(obv) >= 5:
+        prevMean[:] = rollingMean(obv, 5)[p - 1:p - 1 + n]
+    callNumber = calls + 1 + np.arange(n)
+    if 0 <= 3 - calls < n:
+        j = 3 - calls
+        prevMean[j] = np.mean(obv[p + j - 4:p + j])
+    out = _sign(newObv - prevMean)
+    out[callNumber < 4] = 0
+    state["history"] = obv[-5:].tolist()
+    state["calls"] = calls + n
+    return out
+
+
+def evaluatedSum(values, start, period, state=None):
+    # Rolling sum over bars evaluated so far only, as the CMF/VWAP lists hold
+    state = {} if state is None else state
+    calls = state.get("calls", 0)
+    lookback = min(calls, period - 1)
+    state["calls"] = calls + len(values) - start
+    return rollingSum(values[start - lookback:], period)[lookback:]
+
+
+def cmfSignals(close, high, low, volume, start, volSum, period=bt.DEFAULT_CMF_PERIOD, state=None):
+    # volSum: evaluatedSum of the volume, shared with VWAP
+    rangeHL = high - low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mfm = np.where(rangeHL == 0, 0, ((2 * close) - high - low) / rangeHL)
+    mfvSum = evaluatedSum(mfm * volume, start, period, state)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmf = mfvSum / volSum
+    return np.select([cmf >= 0.2, cmf >= 0.25, cmf <= -0.2, cmf <= -0.25], [1, 0.2, -1, -0.2], 0)
+
+
+def vwapSignals(close, high, low, volume, start, volSum, period=bt.DEFAULT_VWAP_PERIOD, state=None):
+    typicalPrice = (high + low + close) / 3
+    tpvSum = evaluatedSum(typicalPrice * volume, start, period, state)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        priceRatio = close[start:] / (tpvSum / volSum)
+    return np.select([priceRatio >= 1.01, priceRatio >= 1.002, priceRatio <= 0.99, priceRatio <= 0.998],
+                     [1, 0.2, -1, -0.2], 0)
+
+
+def sarSignals(high, low, start, afStep=bt.DEFAULT_SAR_ACCELERATION, afMax=bt.DEFAULT_SAR_MAXIMUM, state=None):
+    # Path dependent, so this is a sequential scan (kernels.sarKernel)
+    n = len(high) - start
+    if n <= 0:
+        return np.zeros(0)
+    if state and "trend" in state:
+        trend, ep, sar, af = state["trend"], state["ep"], state["sar"], state["af"]
+        first = start
+    else:
+        af = afStep
+        if high[start] > high[start - 1]:
+            trend, ep, sar = 1, float(high[start]), float(low[start - 1])
+        else:
+            trend, ep, sar = -1, float(low[start]), float(high[start - 1])
+        first = start + 1
+    highs, lows = kernels.inputs(high, low)
+    (out,) = kernels.outputs(n, np.float64)
+    trend, ep, sar, af = kernels.sarKernel(highs, lows, start, first, afStep, afMax, trend, ep, sar, af, out)
+    if state is not None:
+        state.update(trend=trend, ep=ep, sar=sar, af=af)
+    return np.asarray(out, dtype=np.float64)
+
+
+def liquiditySeries(volume, start, window):
+    with np.errstate(invalid="ignore"):
+        prevMean = rollingMean(volume, window - 1)
+    out = np.zeros(len(volume) - start, dtype=bool)
+    if window > 1:
+        out[:] = volume[start:] > (1.3 * prevMean[start - 1:-1])
+    return out
+
+
+# Computation graph of computeSignals (see indicators.py). Intermediates are
+# full-length series shared by every column that reads them with the same
+# parameters; columns cover the evaluated bars start..end. The params of a
+# column are its IndicatorCache key. The window covers every registered
+# lookback, so no period is cut short.
+
+def signalSettings(overbought, oversold, window1, window2, window, start):
+    return {"overbought": overbought, "oversold": oversold, "window1": window1, "window2": window2,
+            "window": window, "start": start}
+
+
+def _period(key):
+    return lambda settings, params: {"period": params[key]}
+
+
+def _evaluated(key):
+    return lambda settings, params: {"start": params["start"], "period": params[key]}
+
+
+@indicators.node("trueRange")
+def _trueRangeNode(context, params):
+    return trueRange(context.close, context.high, context.low)
+
+
+@indicators.node("meanTrueRange", inputs=[("trueRange", lambda settings, params: {})])
+def _meanTrueRangeNode(context, params, tr):
+    return rollingMean(tr, params["period"])
+
+
+@indicators.node("meanClose")
+def _meanCloseNode(context, params):
+    return rollingMean(context.close, params["period"])
+
+
+@indicators.node("stdClose")
+def _stdCloseNode(context, params):
+    return rollingStd(context.close, params["period"])
+
+
+@indicators.node("highestHigh")
+def _highestHighNode(context, params):
+    return rollingMax(context.high, params["period"])
+
+
+@indicators.node("lowestLow")
+def _lowestLowNode(context, params):
+    return rollingMin(context.low, params["period"])
+
+
+@indicators.node("ema", stateful=True)
+def _emaNode(context, params):
+    return seededEMA(context.close, params["start"], params["period"], context.state("ema", params))
+
+
+@indicators.node("volumeSum", stateful=True)
+def _volumeSumNode(context, params):
+    return evaluatedSum(context.volume, params["start"], params["period"], context.state("volumeSum", params))
+
+
+@indicators.node("rsiValue", memo=True, stateful=True)
+def _rsiValueNode(context, params):
+    return rsiValues(context.close, params["start"], params["window"], context.state("rsi"))
+
+
+@indicators.node("atr", inputs=[("meanTrueRange", _period("period"))], memo=True,
+                 params=lambda s: {"start": s["start"], "period": bt.DEFAULT_ATR_PERIOD})
+def _atrNode(context, params, meanTR):
+    return meanTR[context.start:]
+
+
+@indicators.node("liquidity", memo=True, params=lambda s: {"start": s["start"], "window": s["window"]})
+def _liquidityNode(context, params):
+    return liquiditySeries(context.volume, context.start, context.window)
+
+
+@indicators.node("rsi", inputs=[("rsiValue", lambda s, params: {"start": params["start"], "window": params["window"]})],
+                 memo=True, params=lambda s: {"start": s["start"], "overbought": s["overbought"],
+                                              "oversold": s["oversold"], "window": s["window1"]})
+def _rsiNode(context, params, values):
+    return classifyRSI(values, params["overbought"], params["oversold"])
+
+
+@indicators.node("sma", inputs=[("meanClose", _period("slow")), ("meanClose", _period("fast"))],
+                 memo=True, stateful=True,
+                 params=lambda s: {"start": s["start"], "fast": s["window2"], "slow": s["window1"]})
+def _smaNode(context, params, smaSlow, smaFast):
+    return smaCrossSignals(smaSlow[context.start:], smaFast[context.start:], context.state("sma"))
+
+
+@indicators.node("macd", inputs=[("ema", _evaluated("fast")), ("ema", _evaluated("slow"))], memo=True, stateful=True,
+                 params=lambda s: {"start": s["start"],
+                                   "fast": max(s["window2"], bt.DEFAULT_MACD_FAST),
+                                   "slow": max(s["window1"], bt.DEFAULT_MACD_SLOW),
+                                   "signal": bt.DEFAULT_MACD_SIGNAL})
+def _macdNode(context, params, emaFast, emaSlow):
+    return macdSignals(emaFast, emaSlow, params["signal"], context.state("macd"))
+
+
+@indicators.node("williamR", inputs=[("highestHigh", _period("period")), ("lowestLow", _period("period"))], memo=True,
+                 params=lambda s: {"start": s["start"], "period": s["window1"]})
+def _williamRNode(context, params, highestHigh, lowestLow):
+    start = context.start
+    return williamRSignals(context.close[start:], highestHigh[start:], lowestLow[start:])
+
+
+@indicators.node("stochastic", inputs=[("highestHigh", _period("period")), ("lowestLow", _period("period"))],
+                 memo=True, params=lambda s: {"start": s["start"], "dPeriod": bt.DEFAULT_STOCHASTIC_D_PERIOD,
+                                              "period": s["window1"]})
+def _stochasticNode(context, params, highestHigh, lowestLow):
+    return stochasticSignals(context.close, highestHigh, lowestLow, context.start, params["dPeriod"])
+
+
+@indicators.node("bollinger", inputs=[("meanClose", _period("period")), ("stdClose", _period("period"))], memo=True,
+                 params=lambda s: {"start": s["start"], "period": bt.DEFAULT_BOLLINGER_PERIOD,
+                                   "std": bt.DEFAULT_BOLLINGER_STD})
+def _bollingerNode(context, params, mean, std):
+    start = context.start
+    return bollingerSignals(context.close[start:], mean[start:], std[start:], params["std"])
+
+
+@indicators.node("adx", inputs=[("meanTrueRange", _period("period"))], memo=True,
+                 params=lambda s: {"start": s["start"], "period": s["window1"]})
+def _adxNode(context, params, meanTR):
+    return adxSignals(context.high, context.low, context.start, params["period"], meanTR[context.start:])
+
+
+@indicators.node("obv", memo=True, stateful=True, params=lambda s: {"start": s["start"]})
+def _obvNode(context, params):
+    return obvSignals(context.close, context.volume, context.start, context.state("obv"))
+
+
+@indicators.node("cmf", inputs=[("volumeSum", _evaluated("period"))], memo=True, stateful=True,
+                 params=lambda s: {"start": s["start"], "period": bt.DEFAULT_CMF_PERIOD})
+def _cmfNode(context, params, volSum):
+    return cmfSignals(context.close, context.high, context.low, context.volume, context.start, volSum,
+                      params["period"], context.state("cmf"))
+
+
+@indicators.node("vwap", inputs=[("volumeSum", _evaluated("period"))], memo=True, stateful=True,
+                 params=lambda s: {"start": s["start"], "period": bt.DEFAULT_VWAP_PERIOD})
+def _vwapNode(context, params, volSum):
+    return vwapSignals(context.close, context.high, context.low, context.volume, context.start, volSum,
+                       params["period"], context.state("vwap"))
+
+
+@indicators.node("sar", memo=True, stateful=True,
+                 params=lambda s: {"start": s["start"], "step": bt.DEFAULT_SAR_ACCELERATION,
+                                   "max": bt.DEFAULT_SAR_MAXIMUM})
+def _sarNode(context, params):
+    return sarSignals(context.high, context.low, context.start, params["step"], params["max"], context.state("sar"))
+
+
+SIGNAL_COLUMNS = tuple(indicators.INDICATORS)
+
+
+def planColumns(weights):
+    # Columns computeSignals evaluates for these weights
+    return ["atr", "liquidity"] + indicators.active(weights)
+
+
+def computeSignals(close, high, low, volume, overbought=bt.DEFAULT_RSI_OVERBOUGHT, oversold=bt.DEFAULT_RSI_OVERSOLD,
+                   window1=bt.DEFAULT_WINDOW, window2=bt.DEFAULT_FAST_WINDOW, memo=None, fingerprint=None,
+                   start=None, state=None, dtype=np.float64, weights=None):
+    # Same parameters and derived periods as the interactive prompts in backtest.py.
+    # With an IndicatorCache as memo, each column is looked up by dataset
+    # fingerprint, indicator name and the parameters it actually depends on.
+    # start/state evaluate a later block of a longer series: rows before start
+    # are lookback only and state carries the recursive indicators between
+    # calls (chunked.ChunkedSignals). Such partial columns are never memoized.
+    # dtype=np.float32 keeps compact bar columns and the price series derived
+    # from them in float32; signal columns stay float64 so scores sum exactly.
+    # weights (indicators.parseWeights spec or dict) set the score; indicators
+    # with weight 0 are not computed and come back as zero columns.
+    close = np.asarray(close, dtype=dtype)
+    high = np.asarray(high, dtype=dtype)
+    low = np.asarray(low, dtype=dtype)
+    volume = np.asarray(volume, dtype=dtype)
+    weights = indicators.parseWeights(weights)
+    window = bt.engineWindow(window1, window2)
+    if len(close) < window:
+        raise ValueError(f"Need at least {window} bars, got {len(close)}")
+    if start is None:
+        start = window - 1
+    elif start < window - 1:
+        raise ValueError(f"Need {window - 1} bars of lookback before start, got {start}")
+    if state is not None and memo is not None:
+        raise ValueError("Columns computed with carried state cannot be memoized")
+    state = {} if state is None else state
+    settings = signalSettings(overbought, oversold, window1, window2, window, start)
+    plan = indicators.plan(planColumns(weights), settings)
+    if memo is not None and fingerprint is None:
+        fingerprint = indicatorcache.datasetFingerprint(close, high, low, volume)
+
+    def column(name, params, compute):
+        return memo.getOrCompute(fingerprint, name, params, compute)
+
+    context = indicators.Context(close, high, low, volume, start, window, state)
+    signals = {"index": np.arange(start, len(close)), "close": close[start:]}
+    signals.update(plan.evaluate(context, column if memo is not None else None))
+    for name in SIGNAL_COLUMNS:
+        if name not in signals:
+            signals[name] = np.zeros(len(close) - start)
+    signals["score"] = indicators.score(signals, weights)
+    return signals
+
+
+def simulateTrades(signals, scoreThreshold=bt.DEFAULT_SCORE_THRESHOLD, minATR=bt.DEFAULT_MIN_ATR,
+                   maxATR=bt.DEFAULT_MAX_ATR, priceReversal=bt.DEFAULT_PRICE_REVERSAL,
+                   entryAdjustment=bt.DEFAULT_ENTRY_ADJUSTMENT, commission=bt.DEFAULT_COMMISSION,
+                   tpMultiplier=bt.DEFAULT_TP_ATR_MULTIPLIER, slMultiplier=bt.DEFAULT_SL_ATR_MULTIPLIER, trades=None):
+    # Entry/exit state machine of the main loop (kernels.tradeKernel) over
+    # precomputed columns; returns logPnL. With a ledger.TradeLedger as trades,
+    # every closed trade is also recorded there with the bar rows of signals["index"].
+    n = len(signals["close"])
+    columns = kernels.inputs(signals["close"], signals["score"], signals["atr"], signals["liquidity"],
+                             signals["rsi"], signals["williamR"])
+    out = kernels.outputs(n + 1, np.int64, np.int64, np.int8, np.float64, np.float64, np.float64, np.int8)
+    count = kernels.tradeKernel(*columns, float(scoreThreshold), float(minATR), float(maxATR), float(priceReversal),
+                                float(entryAdjustment), float(commission), float(tpMultiplier), float(slMultiplier),
+                                *out)
+    entryRows, exitRows, sides, entryPrices, exitPrices, pnls, reasons = (list(column[:count]) for column in out)
+    if trades is not None:
+        rows = signals["index"]
+        for i in range(count):
+            trades.record(int(sides[i]), int(rows[entryRows[i]]), int(rows[exitRows[i]]), float(entryPrices[i]),
+                          float(exitPrices[i]), float(pnls[i]), int(reasons[i]))
+    return [float(pnl) for pnl in pnls]
+
+
+def streamSignals(csvFile, overbought=bt.DEFAULT_RSI_OVERBOUGHT, oversold=bt.DEFAULT_RSI_OVERSOLD,
+                  window1=bt.DEFAULT_WINDOW, window2=bt.DEFAULT_FAST_WINDOW, weights=None):
+    # Reference path: the per-bar indicator calls of the main loop, collected into columns
+    cache = bt.Cache(csvFile=csvFile, window=bt.engineWindow(window1, window2), quiet=True)
+    streaming = bt.StreamingSignals(overbought=overbought, oversold=oversold, window1=window1, window2=window2,
+                                    weights=weights)
+    rows = []
+    while True:
+        rows.append(streaming.evaluate(cache))
+        if not cache.shiftCacheOne():
+            break
+    signals = {name: np.array([row[name] for row in rows], dtype=np.float64) for name in rows[0]}
+    signals["liquidity"] = signals["liquidity"].astype(bool)
+    return signals
+
+
+def checkParity(csvFile, **params):
+    # Compares batch and streaming columns bar by bar; returns {column: mismatching rows}
+    t0 = time.perf_counter()
+    streamed = streamSignals(csvFile, **params)
+    t1 = time.perf_counter()
+    batch = computeSignals(*loadCSV(csvFile), **params)
+    t2 = time.perf_counter()
+    print(f"streaming: {t1 - t0:.3f}s, batch: {t2 - t1:.3f}s over {len(batch['close'])} bars")
+    mismatches = {}
+    for name in ("close", "liquidity", "score") + SIGNAL_COLUMNS:
+        bad = np.flatnonzero(streamed[name] != batch[name])
+        if len(bad):
+            mismatches[name] = bad
+    badATR = np.flatnonzero(~np.isclose(streamed["atr"], batch["atr"], rtol=1e-9, atol=0))
+    if len(badATR):
+        mismatches["atr"] = badATR
+    if simulateTrades(streamed) != simulateTrades(batch):
+        mismatches["pnl"] = np.array([])
+    return mismatches
+
+
+if __name__ == "__main__":
+    csvFile = sys.argv[1] if len(sys.argv) > 1 else "./EURUSD_H4.csv"
+    weights = sys.argv[2] if len(sys.argv) > 2 else None  # e.g. "bollinger=1;stochastic=1"
+    mismatches = checkParity(csvFile, weights=weights)
+    if mismatches:
+        for name, rows in mismatches.items():
+            print(f"MISMATCH {name}: {len(rows)} rows, first {rows[:10]}")
+        sys.exit(1)
+    print("Batch signals match the streaming loop.")
@@ -0,0 +1,202 @@
+#  <walkforward.py>
+#  Copyright (C) 2025 Suyyash Raj Arora
+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https:www.gnu.org/licenses/>.
+
+# Walk-forward and time-series k-fold validation.
+# The bar series is cut into train/test windows. On every train window the
+# sweep grid is searched for the best configuration, which is then traded on
+# the test window that follows it. Folds run in a process pool. Workers slice
+# the memory-mapped bar store directly, so a fold is a pair of index ranges
+# and nothing is re-read or copied. Each test window starts its indicators
+# fresh after (window - 1) bars of lookback and force-exits on its last bar;
+# the test trades of all folds together form the out-of-sample equity.
+#
+#   python walkforward.py EURUSD_H4.csv --train-bars 6000 --test-bars 2000 -p window1=10,14,20 -p maxATR=0.005,0.01
+#   python walkforward.py EURUSD_H4.csv --folds 5 --anchored -p scoreThreshold=0.2,0.3
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+import backtest as bt
+import barstore
+import sweep
+import vectorized
+
+_bars = None
+
+
+@dataclass
+class Fold:
+    fold: int
+    trainStart: int
+    trainEnd: int  # exclusive; the test window starts here
+    testEnd: int
+
+
+@dataclass
+class FoldResult:
+    fold: Fold
+    params: dict  # best configuration on the train window
+    train: dict  # summarizeTrades of the train window
+    test: dict  # summarizeTrades of the test window
+    logPnL: list  # test trades
+
+
+def walkForwardFolds(bars, trainBars, testBars, anchored=False):
+    # Rolling train windows of trainBars (growing from bar 0 when anchored),
+    # each followed by testBars of test; the last partial test window is dropped
+    folds = []
+    testStart = trainBars
+    while testStart + testBars <= bars:
+        trainStart = 0 if anchored else testStart - trainBars
+        folds.append(Fold(len(folds), trainStart, testStart, testStart + testBars))
+        testStart += testBars
+    return folds
+
+
+def kFoldSplits(bars, folds, anchored=True):
+    # Time-series k-fold: k + 1 equal blocks, fold i trains on block i (or blocks
+    # 0..i when anchored) and tests on block i + 1, never on the past
+    block = bars // (folds + 1)
+    if block < 1:
+        raise ValueError(f"{bars} bars cannot be split into {folds} folds")
+    return [Fold(i, 0 if anchored else i * block, (i + 1) * block, (i + 2) * block) for i in range(folds)]
+
+
+def _initWorker(csvFile):
+    global _bars
+    _bars = barstore.loadBars(csvFile)
+
+
+def _columns(lo, hi):
+    # Zero-copy views of the memory maps
+    return _bars.close[lo:hi], _bars.high[lo:hi], _bars.low[lo:hi], _bars.volume[lo:hi]
+
+
+def optimize(fold, groups, metric="netPnL"):
+    # Best (signalParams + tradeParams, summary) over the grid on the train window
+    best = None
+    for signalParams, tradeParamsList in groups.items():
+        signalParams = dict(signalParams)
+        try:
+            signals = vectorized.computeSignals(*_columns(fold.trainStart, fold.trainEnd), **signalParams)
+        except ValueError:
+            continue  # train window shorter than this configuration's lookback
+        for tradeParams in tradeParamsList:
+            summary = bt.summarizeTrades(vectorized.simulateTrades(signals, **tradeParams))
+            if best is None or summary[metric] > best[1][metric]:
+                best = ({**signalParams, **tradeParams}, summary)
+    if best is None:
+        raise ValueError(f"Fold {fold.fold}: train window of {fold.trainEnd - fold.trainStart} bars is too short")
+    return best
+
+
+def evaluateFold(fold, groups, metric="netPnL"):
+    params, trainSummary = optimize(fold, groups, metric)
+    signalParams = {name: params[name] for name in sweep.SIGNAL_PARAMS}
+    tradeParams = {name: params[name] for name in sweep.TRADE_PARAMS}
+    lookback = bt.engineWindow(params["window1"], params["window2"]) - 1
+    lo = fold.trainEnd - lookback
+    if lo < 0:
+        raise ValueError(f"Fold {fold.fold}: needs {lookback} bars before the test window")
+    signals = vectorized.computeSignals(*_columns(lo, fold.testEnd), start=lookback, **signalParams)
+    logPnL = vectorized.simulateTrades(signals, **tradeParams)
+    return FoldResult(fold=fold, params=params, train=trainSummary, test=bt.summarizeTrades(logPnL), logPnL=logPnL)
+
+
+def runWalkForward(csvFile, folds, configs, workers=None, metric="netPnL"):
+    barstore.loadBars(csvFile)  # build the store once, before the workers race to it
+    groups = sweep.groupConfigs(configs)
+    workers = min(workers or os.cpu_count() or 1, len(folds)) or 1
+    if workers == 1:
+        _initWorker(csvFile)
+        return [evaluateFold(fold, groups, metric) for fold in folds]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(csvFile,)) as pool:
+        futures = [pool.submit(evaluateFold, fold, groups, metric) for fold in folds]
+        return [future.result() for future in futures]
+
+
+def stitchedEquity(results):
+    # (fold, trade, pnl, equity) rows of the out-of-sample trades, in lots as netPnL
+    rows = []
+    equity = 0.0
+    for result in results:
+        for trade, pnl in enumerate(result.logPnL):
+            equity += pnl * bt.DEFAULT_LOT_UNITS
+            rows.append((result.fold.fold, trade, pnl, equity))
+    return rows
+
+
+def printFolds(results, times):
+    for result in results:
+        fold = result.fold
+        span = f"{_stamp(times[fold.trainEnd])} .. {_stamp(times[fold.testEnd - 1])}"
+        params = ", ".join(f"{name}={value}" for name, value in result.params.items()
+                           if value != sweep.SIGNAL_PARAMS.get(name, sweep.TRADE_PARAMS.get(name)))
+        print(f"fold {fold.fold}: test {span}  train net {result.train['netPnL']:.2f} "
+              f"({result.train['totalTrades']} trades)  test net {result.test['netPnL']:.2f} "
+              f"({result.test['totalTrades']} trades)  [{params or 'defaults'}]")
+
+
+def _stamp(seconds):
+    return np.datetime_as_string(np.datetime64(int(seconds), "s"), unit="m")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward / time-series k-fold validation")
+    parser.add_argument("data", help="CSV bar file (Date Time, Open, High, Low, Close, Volume)")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="values to search on every train window; repeat for more")
+    parser.add_argument("--train-bars", type=int, help="train window length (walk-forward)")
+    parser.add_argument("--test-bars", type=int, help="test window length and step (walk-forward)")
+    parser.add_argument("--folds", type=int, help="time-series k-fold with this many folds instead")
+    parser.add_argument("--anchored", action="store_true", help="train windows all start at the first bar")
+    parser.add_argument("--metric", default="netPnL", choices=("netPnL", "winrate"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--equity-out", help="write the stitched out-of-sample equity to this CSV file")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = sweep.parseGrid(args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    bars = barstore.loadBars(args.data)
+    if args.folds:
+        folds = kFoldSplits(len(bars), args.folds, args.anchored)
+    elif args.train_bars and args.test_bars:
+        folds = walkForwardFolds(len(bars), args.train_bars, args.test_bars, args.anchored)
+    else:
+        parser.error("give --folds, or --train-bars and --test-bars")
+    if not folds:
+        parser.error(f"{len(bars)} bars are not enough for one train/test window")
+
+    results = runWalkForward(args.data, folds, list(sweep.gridConfigs(grid)), args.workers, args.metric)
+    printFolds(results, bars.time)
+    equity = stitchedEquity(results)
+    print("\nOut-of-sample:")
+    bt.printSummary(bt.summarizeTrades([pnl for result in results for pnl in result.logPnL]))
+    if args.equity_out:
+        with open(args.equity_out, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(("fold", "trade", "pnl", "equity"))
+            writer.writerows(equity)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])